@@ -0,0 +1,525 @@
+"""
+Local stand-ins for the Notion, Discord webhook, Google Calendar and PrairieLearn APIs.
+
+Each server runs on 127.0.0.1 in a background thread and keeps its state in memory,
+so the benchmarks (and manual testing) never touch the real services. EventReplayer
+plays the other direction: it delivers webhook events and push notifications.
+"""
+import hashlib
+import hmac
+import itertools
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeServer:
+    handler_class = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.rate_limit_every = 0
+        self.rate_limited = 0
+        self.failures = []
+        self.response_delay = 0.0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, status, count=1):
+        """Answer the next `count` requests with `status` instead of handling them."""
+        with self.lock:
+            self.failures.extend([status] * count)
+
+    def next_failure(self):
+        with self.lock:
+            return self.failures.pop(0) if self.failures else None
+
+    def should_rate_limit(self):
+        """Every `rate_limit_every`-th request gets a 429, to exercise retry paths."""
+        with self.lock:
+            self.request_count += 1
+            limited = bool(self.rate_limit_every) and self.request_count % self.rate_limit_every == 0
+            self.rate_limited += limited
+            return limited
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def read_body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_empty(self, status):
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def dispatch(self):
+                body = self.read_body()
+                if server.should_rate_limit():
+                    self.send_json(429, {'message': 'rate limited', 'retry_after': 0.01}, {'Retry-After': '0.01'})
+                    return
+                failure = server.next_failure()
+                if failure is not None:
+                    self.send_json(failure, {'message': 'injected failure'})
+                    return
+                if server.response_delay:
+                    # Handled anyway, as a slow upstream would: the client may time out after the write lands.
+                    time.sleep(server.response_delay)
+                server.handle(self, self.command, urlparse(self.path), body)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = dispatch
+
+        return Handler
+
+    def handle(self, handler, method, url, body):
+        raise NotImplementedError
+
+
+def notion_page(page_id, name, course, start, end, status='Not started', grade=None, weightage=None, edited=None):
+    return {
+        'object': 'page',
+        'id': page_id,
+        'archived': False,
+        'last_edited_time': edited or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z'),
+        'properties': {
+            'Name': {'title': [{'text': {'content': name}}]},
+            'Course': {'multi_select': [{'name': course}]},
+            'Start Date': {'date': {'start': start} if start else None},
+            'End Date': {'date': {'start': end} if end else None},
+            'Complete': {'status': {'name': status}},
+            'Grade': {'number': grade},
+            'Weightage': {'number': weightage},
+        },
+    }
+
+
+def _date_part(value):
+    return value[:10] if value else None
+
+
+def matches_filter(page, condition):
+    """Evaluate the subset of Notion's filter language the tracker and query planner send."""
+    if 'and' in condition:
+        return all(matches_filter(page, c) for c in condition['and'])
+    if 'or' in condition:
+        return any(matches_filter(page, c) for c in condition['or'])
+    if condition.get('timestamp') == 'last_edited_time':
+        return page['last_edited_time'] >= condition['last_edited_time']['on_or_after']
+    prop = page['properties'].get(condition['property'])
+    if 'date' in condition:
+        day = _date_part(((prop or {}).get('date') or {}).get('start'))
+        test = condition['date']
+        if day is None:
+            return False
+        if 'on_or_after' in test and day < test['on_or_after'][:10]:
+            return False
+        if 'on_or_before' in test and day > test['on_or_before'][:10]:
+            return False
+        return True
+    if 'multi_select' in condition:
+        return any(o['name'] == condition['multi_select']['contains'] for o in (prop or {}).get('multi_select', []))
+    if 'title' in condition:
+        text = ''.join(t['text']['content'] for t in (prop or {}).get('title', []))
+        return condition['title']['contains'].lower() in text.lower()
+    if 'status' in condition:
+        name = ((prop or {}).get('status') or {}).get('name')
+        test = condition['status']
+        return name == test['equals'] if 'equals' in test else name != test['does_not_equal']
+    raise ValueError(f"unsupported filter: {condition}")
+
+
+class FakeNotion(FakeServer):
+    """Notion's /v1/databases/{id}/query (cursor pagination, property and last_edited_time filters) and /v1/pages."""
+
+    def __init__(self):
+        super().__init__()
+        self.pages = {}
+
+    @property
+    def api_url(self):
+        return f"{self.url}/v1"
+
+    def seed(self, count, database_id='db', start=None):
+        start = start or datetime(2025, 1, 6, tzinfo=timezone.utc)
+        courses = ['CS598', 'CS411', 'CS357', 'PLPA', 'CS461', 'CS442']
+        with self.lock:
+            for i in range(count):
+                due = start + timedelta(hours=7 * i)
+                page_id = str(uuid.UUID(int=i + 1))
+                page = notion_page(
+                    page_id, f"Assignment {i}", courses[i % len(courses)],
+                    (due - timedelta(days=3)).isoformat(), due.isoformat(),
+                    status='Complete' if i % 3 == 0 else 'Not started',
+                    grade=float(i % 100) if i % 3 == 0 else None, weightage=0.05,
+                )
+                page['parent'] = {'database_id': database_id}
+                self.pages[page_id] = page
+
+    def touch(self, page_id, **properties):
+        with self.lock:
+            page = self.pages[page_id]
+            page['properties'].update(properties)
+            page['last_edited_time'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z')
+
+    def handle(self, handler, method, url, body):
+        payload = json.loads(body) if body else {}
+        query = re.fullmatch(r'/v1/databases/([^/]+)/query', url.path)
+        page = re.fullmatch(r'/v1/pages/([^/]+)', url.path)
+        if method == 'POST' and query:
+            handler.send_json(200, self._query(query.group(1), payload))
+        elif method == 'POST' and url.path == '/v1/pages':
+            page_id = str(uuid.uuid4())
+            properties = payload.get('properties', {})
+            created = {
+                'object': 'page',
+                'id': page_id,
+                'archived': False,
+                'parent': payload.get('parent', {}),
+                'last_edited_time': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z'),
+                'properties': {k: v for k, v in properties.items() if v is not None},
+            }
+            with self.lock:
+                self.pages[page_id] = created
+            handler.send_json(200, created)
+        elif page and method in ('GET', 'PATCH'):
+            with self.lock:
+                existing = self.pages.get(page.group(1))
+                if existing is not None and method == 'PATCH':
+                    existing['properties'].update(payload.get('properties', {}))
+                    if 'archived' in payload:
+                        existing['archived'] = payload['archived']
+                    existing['last_edited_time'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z')
+            if existing is None:
+                handler.send_json(404, {'object': 'error', 'status': 404, 'code': 'object_not_found'})
+            else:
+                handler.send_json(200, existing)
+        else:
+            handler.send_json(400, {'object': 'error', 'status': 400, 'code': 'invalid_request_url'})
+
+    def _query(self, database_id, payload):
+        with self.lock:
+            pages = [
+                p for p in self.pages.values()
+                if not p['archived'] and p.get('parent', {}).get('database_id', database_id) == database_id
+            ]
+        if payload.get('filter'):
+            pages = [p for p in pages if matches_filter(p, payload['filter'])]
+        pages.sort(key=lambda p: p['id'])
+        offset = int(payload.get('start_cursor') or 0)
+        page_size = min(int(payload.get('page_size', 100)), 100)
+        results = pages[offset:offset + page_size]
+        has_more = offset + page_size < len(pages)
+        return {
+            'object': 'list',
+            'results': results,
+            'has_more': has_more,
+            'next_cursor': str(offset + page_size) if has_more else None,
+        }
+
+
+class FakeDiscordWebhook(FakeServer):
+    """Accepts webhook posts with 204 and records their payloads."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    @property
+    def webhook_url(self):
+        return f"{self.url}/api/webhooks/1/token"
+
+    def handle(self, handler, method, url, body):
+        with self.lock:
+            self.messages.append(json.loads(body) if body else {})
+        handler.send_empty(204)
+
+
+class FakeCalendar(FakeServer):
+    """
+    Calendar v3 events insert/patch/delete/list, plus the multipart /batch/calendar/v3 endpoint.
+
+    Lists page with pageToken and end with a nextSyncToken; a list given a syncToken returns
+    only events changed since, with deletions as cancelled events, or a 410 once
+    expire_sync_tokens() has been called.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = {}
+        self.ids = itertools.count(1)
+        self.changes = []
+        self.token_floor = 0
+        self.list_calls = 0
+
+    def edit(self, event_id, **fields):
+        """An edit made by the user in Calendar."""
+        with self.lock:
+            self.events[event_id].update(fields)
+            self.changes.append(event_id)
+
+    def remove(self, event_id):
+        with self.lock:
+            del self.events[event_id]
+            self.changes.append(event_id)
+
+    def expire_sync_tokens(self):
+        with self.lock:
+            self.token_floor = len(self.changes)
+
+    def _list(self, query):
+        self.list_calls += 1
+        token = query.get('syncToken', [None])[0]
+        if token is not None:
+            if int(token) < self.token_floor:
+                return 410, {'error': {'code': 410, 'message': 'Sync token is no longer valid'}}
+            changed = dict.fromkeys(self.changes[int(token):])
+            items = [self.events.get(event_id, {'id': event_id, 'status': 'cancelled'}) for event_id in changed]
+        else:
+            items = list(self.events.values())
+        offset = int(query.get('pageToken', ['0'])[0])
+        size = int(query.get('maxResults', ['250'])[0])
+        response = {'kind': 'calendar#events', 'items': items[offset:offset + size]}
+        if offset + size < len(items):
+            response['nextPageToken'] = str(offset + size)
+        else:
+            response['nextSyncToken'] = str(len(self.changes))
+        return 200, response
+
+    def handle(self, handler, method, url, body):
+        if method == 'POST' and url.path == '/batch/calendar/v3':
+            self._batch(handler, body)
+            return
+        status, response = self.apply(method, url.path, parse_qs(url.query), body)
+        if response is None:
+            handler.send_empty(status)
+        else:
+            handler.send_json(status, response)
+
+    def apply(self, method, path, query, body):
+        collection = re.fullmatch(r'/calendar/v3/calendars/([^/]+)/events', path)
+        item = re.fullmatch(r'/calendar/v3/calendars/([^/]+)/events/([^/]+)', path)
+        payload = json.loads(body) if body else {}
+        with self.lock:
+            if collection and method == 'POST':
+                event_id = f"evt{next(self.ids)}"
+                event = dict(payload, id=event_id, status='confirmed', htmlLink=f"http://calendar.local/{event_id}")
+                self.events[event_id] = event
+                self.changes.append(event_id)
+                return 200, event
+            if collection and method == 'GET':
+                return self._list(query)
+            if item and item.group(2) not in self.events:
+                return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+            if item and method == 'PATCH':
+                self.events[item.group(2)].update(payload)
+                self.changes.append(item.group(2))
+                return 200, self.events[item.group(2)]
+            if item and method == 'DELETE':
+                del self.events[item.group(2)]
+                self.changes.append(item.group(2))
+                return 204, None
+            if item and method == 'GET':
+                return 200, self.events[item.group(2)]
+        return 400, {'error': {'code': 400, 'message': 'Bad Request'}}
+
+    def _batch(self, handler, body):
+        content_type = handler.headers['Content-Type']
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        boundary = f"batch_{uuid.uuid4().hex}"
+        out = []
+        for part in message.iter_parts():
+            request_line, _, rest = part.get_payload(decode=True).partition(b'\r\n')
+            if not rest:
+                request_line, _, rest = request_line.partition(b'\n')
+            method, path, _ = request_line.decode().split(' ', 2)
+            _, _, request_body = rest.replace(b'\r\n', b'\n').partition(b'\n\n')
+            parsed = urlparse(path)
+            status, response = self.apply(method, parsed.path, parse_qs(parsed.query), request_body)
+            response_body = json.dumps(response) if response is not None else ''
+            content_id = part['Content-ID'].strip('<>')
+            out.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(response_body)}\r\n\r\n"
+                f"{response_body}\r\n"
+            )
+        data = (''.join(out) + f"--{boundary}--\r\n").encode()
+        handler.send_response(200)
+        handler.send_header('Content-Type', f"multipart/mixed; boundary={boundary}")
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class FakePrairieLearn(FakeServer):
+    """
+    PrairieLearn's course instance API: assessments and their access rules.
+
+    Responses carry an ETag and a matching If-None-Match gets an empty 304, like the real API.
+    """
+
+    def __init__(self, token='benchmark-token'):
+        super().__init__()
+        self.token = token
+        self.instances = {}
+        self.not_modified = 0
+
+    def seed(self, instance_id, count, start=None):
+        start = start or datetime(2025, 1, 6, 23, 59, tzinfo=timezone.utc)
+        assessments = {}
+        for i in range(count):
+            due = start + timedelta(days=i)
+            assessments[str(i + 1)] = {
+                'assessment': {
+                    'assessment_id': str(i + 1),
+                    'assessment_label': f"HW{i + 1}",
+                    'title': f"Homework {i + 1}",
+                },
+                'rules': [
+                    {'credit': 100, 'uids': None, 'start_date': (due - timedelta(days=7)).isoformat(),
+                     'end_date': due.isoformat()},
+                    {'credit': 100, 'uids': ['late@example.edu'], 'start_date': due.isoformat(),
+                     'end_date': (due + timedelta(days=3)).isoformat()},
+                ],
+            }
+        with self.lock:
+            self.instances[str(instance_id)] = assessments
+
+    def retitle(self, instance_id, assessment_id, title):
+        with self.lock:
+            self.instances[str(instance_id)][str(assessment_id)]['assessment']['title'] = title
+
+    def extend(self, instance_id, assessment_id, days):
+        """Move the class-wide deadline of an assessment `days` later."""
+        with self.lock:
+            rule = self.instances[str(instance_id)][str(assessment_id)]['rules'][0]
+            rule['end_date'] = (datetime.fromisoformat(rule['end_date']) + timedelta(days=days)).isoformat()
+
+    def handle(self, handler, method, url, body):
+        if handler.headers.get('Private-Token') != self.token:
+            handler.send_json(401, {'message': 'Unauthorized'})
+            return
+        match = re.fullmatch(r'/pl/api/v1/course_instances/([^/]+)/assessments(?:/([^/]+)/assessment_access_rules)?', url.path)
+        with self.lock:
+            assessments = self.instances.get(match.group(1)) if match else None
+            if assessments is None or (match.group(2) and match.group(2) not in assessments):
+                payload = None
+            elif match.group(2):
+                payload = assessments[match.group(2)]['rules']
+            else:
+                payload = [entry['assessment'] for entry in assessments.values()]
+            data = json.dumps(payload, sort_keys=True)
+        if payload is None:
+            handler.send_json(404, {'message': 'Not Found'})
+            return
+        etag = f'"{hashlib.sha1(data.encode()).hexdigest()}"'
+        if handler.headers.get('If-None-Match') == etag:
+            with self.lock:
+                self.not_modified += 1
+            handler.send_empty(304)
+            return
+        handler.send_json(200, payload, {'ETag': etag})
+
+
+class EventReplayer:
+    """
+    Delivers Notion webhook events and Google Calendar push notifications to a receiver,
+    signed and shaped the way the real services send them.
+    """
+
+    def __init__(self, receiver_url, notion_secret=None, calendar_token=None):
+        self.receiver_url = receiver_url.rstrip('/')
+        self.notion_secret = notion_secret
+        self.calendar_token = calendar_token
+
+    def notion_event(self, event_type, page_id, database_id, updated_properties=()):
+        event = {
+            'id': str(uuid.uuid4()),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'workspace_id': 'workspace',
+            'subscription_id': 'subscription',
+            'integration_id': 'integration',
+            'type': event_type,
+            'attempt_number': 1,
+            'entity': {'id': page_id, 'type': 'page'},
+            'data': {'parent': {'id': database_id, 'type': 'database'}, 'updated_properties': list(updated_properties)},
+        }
+        return self.replay(event)
+
+    def replay(self, event, secret=None):
+        """POST one recorded event body; returns the receiver's status code."""
+        body = json.dumps(event).encode()
+        headers = {'Content-Type': 'application/json'}
+        secret = secret or self.notion_secret
+        if secret:
+            headers['X-Notion-Signature'] = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return self._post('/notion', body, headers)
+
+    def calendar_push(self, channel_id, state='exists', token=None):
+        return self._post('/google/calendar', b'', {
+            'X-Goog-Channel-ID': channel_id,
+            'X-Goog-Channel-Token': token or self.calendar_token or '',
+            'X-Goog-Resource-ID': 'resource',
+            'X-Goog-Resource-State': state,
+            'X-Goog-Message-Number': '1',
+        })
+
+    def _post(self, path, body, headers):
+        request = urllib.request.Request(self.receiver_url + path, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
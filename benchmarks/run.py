@@ -0,0 +1,499 @@
+"""
+Benchmarks against local stand-ins for Notion, Discord, Google Calendar and PrairieLearn.
+
+    python -m benchmarks.run --sizes 100,1000,10000 --output bench.json
+
+Results are printed (and optionally written) as JSON so they can be diffed between runs.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.fake_servers import EventReplayer, FakeCalendar, FakeDiscordWebhook, FakeNotion, FakePrairieLearn
+
+DATABASE_ID = 'db'
+COMMAND_ITERATIONS = 20
+
+
+def configure_environment(webhook, calendar):
+    os.environ['API_KEY'] = 'benchmark-token'
+    os.environ['DATABASE_ID'] = DATABASE_ID
+    os.environ['DISCORD_WEBHOOK_URL'] = webhook.webhook_url
+    os.environ['CALENDAR_API_ROOT'] = calendar.url
+
+
+def make_tracker(tmpdir, name):
+    from src.assignment_tracker import AssignmentTracker
+    # A fresh mirror per run, so no benchmark starts warm from another's state.
+    os.environ['MIRROR_PATH'] = os.path.join(tmpdir, f"{name}.db")
+    return AssignmentTracker()
+
+
+def write_csv(path, size):
+    start = datetime(2025, 1, 6, 23, 0)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Course', 'Start Date', 'End Date', 'Complete', 'Grade', 'Weightage',
+                         'Repeat Assignment (Yes/No)', 'Repeat Weeks'])
+        for i in range(size):
+            due = start + timedelta(hours=i)
+            writer.writerow([f"Imported {i}", f"CS{400 + i % 6}", due.strftime('%Y-%m-%d %H:%M:%S'),
+                             (due + timedelta(minutes=59)).strftime('%Y-%m-%d %H:%M:%S'),
+                             'Not Started', '0', '0.05', 'No', '1'])
+
+
+def bench_csv_import(size, tmpdir):
+    with FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        path = os.path.join(tmpdir, f"import_{size}.csv")
+        write_csv(path, size)
+        tracker = make_tracker(tmpdir, f"csv_import_{size}")
+        started = time.perf_counter()
+        outcomes = tracker.read_csv(path)
+        elapsed = time.perf_counter() - started
+    uploaded = sum(1 for o in outcomes if o['status'] == 'uploaded')
+    return {'seconds': elapsed, 'rows': size, 'uploaded': uploaded, 'rows_per_second': size / elapsed}
+
+
+def bench_snapshot_refresh(size, tmpdir):
+    with FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        notion.seed(size, DATABASE_ID)
+        tracker = make_tracker(tmpdir, f"snapshot_{size}")
+
+        started = time.perf_counter()
+        tracker.fetch_assignments_from_notion(full=True)
+        full = time.perf_counter() - started
+
+        started = time.perf_counter()
+        tracker.fetch_assignments_from_notion(force=True)
+        delta = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(COMMAND_ITERATIONS):
+            tracker.fetch_assignments_from_notion()
+        cached = (time.perf_counter() - started) / COMMAND_ITERATIONS
+
+        started = time.perf_counter()
+        restarted = make_tracker(tmpdir, f"snapshot_{size}")
+        warm_start = time.perf_counter() - started
+    return {
+        'full_seconds': full,
+        'delta_seconds': delta,
+        'cached_seconds': cached,
+        'warm_start_seconds': warm_start,
+        'rows': len(tracker.store),
+        'warm_start_rows': len(restarted.store),
+    }
+
+
+def bench_cold_query(size, tmpdir):
+    """
+    A date-range query on a cold cache: filter push-down against a full snapshot refresh. The
+    push-down warms the snapshot in the background, so the queries after it make no requests.
+    """
+    from src.query_planner import AssignmentQuery, run_local, run_query
+
+    query = AssignmentQuery(due_from=datetime(2025, 1, 10).date(), due_to=datetime(2025, 1, 12).date())
+    with FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        notion.seed(size, DATABASE_ID)
+
+        tracker = make_tracker(tmpdir, f"cold_pushdown_{size}")
+        started = time.perf_counter()
+        pushed = run_query(tracker, query)
+        pushdown = time.perf_counter() - started
+        deadline = time.monotonic() + 30
+        while not tracker.snapshot_is_fresh() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        before = notion.request_count
+        for _ in range(COMMAND_ITERATIONS):
+            run_query(tracker, query)
+        followup_requests = notion.request_count - before
+
+        tracker = make_tracker(tmpdir, f"cold_refresh_{size}")
+        started = time.perf_counter()
+        local = run_local(tracker.fetch_assignments_from_notion(), query)
+        refresh = time.perf_counter() - started
+    return {
+        'pushdown_seconds': pushdown,
+        'refresh_seconds': refresh,
+        'rows': len(pushed),
+        'rows_match': len(pushed) == len(local),
+        'followup_requests': followup_requests,
+    }
+
+
+def bench_rate_limited(size, tmpdir, every=7):
+    """
+    The CSV import and a full refresh against a Notion that answers every `every`-th request
+    with a 429. Each one must be retried, and no row may be lost or written twice.
+    """
+    with FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        notion.rate_limit_every = every
+        path = os.path.join(tmpdir, f"rate_limited_{size}.csv")
+        write_csv(path, size)
+        tracker = make_tracker(tmpdir, f"rate_limited_{size}")
+        started = time.perf_counter()
+        outcomes = tracker.read_csv(path)
+        imported = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store = tracker.fetch_assignments_from_notion(full=True)
+        refresh = time.perf_counter() - started
+        pages = len(notion.pages)
+    uploaded = sum(1 for o in outcomes if o['status'] == 'uploaded')
+    return {
+        'import_seconds': imported,
+        'refresh_seconds': refresh,
+        'rate_limited': notion.rate_limited,
+        'uploaded': uploaded,
+        'rows_match': uploaded == size and pages == size and len(store) == size,
+    }
+
+
+# Runs in a fresh interpreter so module imports are timed from scratch.
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import src.discord_bot as discord_bot
+imported = time.perf_counter() - started
+google_loaded = any(name.startswith('googleapiclient') for name in sys.modules)
+if sys.argv[2] == 'unthrottled':
+    from src.transport import get_transport
+    get_transport().set_rate_limit('notion', 1e9, 1e9)
+started = time.perf_counter()
+discord_bot.get_default_tracker().read_csv(sys.argv[1])
+deferred = time.perf_counter() - started
+print(json.dumps({'imported': imported, 'deferred': deferred, 'google_loaded': google_loaded}))
+"""
+
+
+def bench_startup(size, tmpdir, rate_limits=False):
+    """
+    Time to on_ready: the bot can log in as soon as its module is imported; building the
+    tracker and the startup CSV import now run after login. `eager_ready_seconds` adds
+    them back in front, which is the order main.py used to run them in.
+    """
+    path = os.path.join(tmpdir, f"startup_{size}.csv")
+    write_csv(path, size)
+    with FakeNotion() as notion:
+        env = dict(os.environ, NOTION_API_URL=notion.api_url, MIRROR_PATH=os.path.join(tmpdir, f"startup_{size}.db"))
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT, path, 'throttled' if rate_limits else 'unthrottled'],
+            cwd=root, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    return {
+        'lazy_ready_seconds': timings['imported'],
+        'eager_ready_seconds': timings['imported'] + timings['deferred'],
+        'deferred_seconds': timings['deferred'],
+        'google_imported_at_startup': timings['google_loaded'],
+    }
+
+
+class FakeMessage:
+    async def edit(self, **kwargs):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+        return FakeMessage()
+
+
+def bench_bot_commands(size, tmpdir):
+    from src import discord_bot
+
+    commands = [
+        ('due_today', {}),
+        ('due_this_week', {}),
+        ('due_on', {'date_str': '2025-01-10'}),
+        ('due_in', {'course': 'CS598'}),
+        ('exam_in', {'course': 'CS598'}),
+        ('remaining', {}),
+        ('weekly_todo', {}),
+        ('course_grade', {'course': 'CS598'}),
+    ]
+    with FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        notion.seed(size, DATABASE_ID)
+        discord_bot.default_tracker = make_tracker(tmpdir, f"commands_{size}")
+
+        async def run():
+            latencies = {}
+            for name, kwargs in commands:
+                callback = discord_bot.bot.get_command(name).callback
+                samples = []
+                for _ in range(COMMAND_ITERATIONS):
+                    started = time.perf_counter()
+                    await callback(FakeContext(), **kwargs)
+                    samples.append(time.perf_counter() - started)
+                latencies[name] = {
+                    'first_seconds': samples[0],
+                    'median_seconds': statistics.median(samples),
+                    'max_seconds': max(samples),
+                }
+            return latencies
+
+        return asyncio.run(run())
+
+
+def bench_sync_calendar(size, tmpdir):
+    """
+    A first sync, a repeat with nothing changed (one incremental list, no writes), a sync
+    after events were edited and deleted in Calendar (drift repaired), and one after Google
+    expired the sync token (a full list again).
+    """
+    from src.calendar_sync import CalendarSync
+
+    with FakeNotion() as notion, FakeCalendar() as calendar:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        notion.seed(size, DATABASE_ID)
+        tracker = make_tracker(tmpdir, f"calendar_{size}")
+        records = list(tracker.fetch_assignments_from_notion())
+        sync = CalendarSync(map_path=os.path.join(tmpdir, f"calendar_{size}.json"), api_root=calendar.url)
+
+        started = time.perf_counter()
+        first = sync.sync(records)
+        initial = time.perf_counter() - started
+
+        requests_before = calendar.request_count
+        started = time.perf_counter()
+        second = sync.sync(records)
+        repeat = time.perf_counter() - started
+        repeat_requests = calendar.request_count - requests_before
+
+        edited, deleted = sorted(calendar.events)[:2]
+        calendar.edit(edited, summary='Moved by hand')
+        calendar.remove(deleted)
+        drift = sync.sync(records)
+
+        calendar.expire_sync_tokens()
+        expired = sync.sync(records)
+    return {
+        'initial_seconds': initial,
+        'repeat_seconds': repeat,
+        'repeat_requests': repeat_requests,
+        'initial': first,
+        'repeat': second,
+        'drift': drift,
+        'expired_token': expired,
+        'events': len(calendar.events),
+    }
+
+
+def bench_push(size, tmpdir, edits=5, reads=60):
+    """
+    Notion requests made while `reads` commands run and `edits` pages change: polling
+    (each read past the TTL runs a delta query) against pushed webhook events (each edit
+    costs one page fetch and reads are served from the snapshot).
+    """
+    from src.push_receiver import PushReceiver, normalize_id
+
+    with FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        notion.seed(size, DATABASE_ID)
+        edited = sorted(notion.pages)[:edits]
+
+        tracker = make_tracker(tmpdir, f"poll_{size}")
+        tracker.fetch_assignments_from_notion(full=True)
+        tracker.snapshot_ttl = 0
+        before = notion.request_count
+        for i in range(reads):
+            if i < edits:
+                notion.touch(edited[i], Grade={'number': 99.0})
+            tracker.fetch_assignments_from_notion()
+        polling = notion.request_count - before
+
+        tracker = make_tracker(tmpdir, f"push_{size}")
+        tracker.fetch_assignments_from_notion(full=True)
+        tracker.snapshot_ttl = 3600
+        receiver = PushReceiver(
+            lambda database_id: [tracker] if database_id == normalize_id(DATABASE_ID) else [],
+            notion_secret='benchmark-secret', coalesce_seconds=0.05,
+        ).start(port=0)
+        replayer = EventReplayer(receiver.url, notion_secret='benchmark-secret')
+        before = notion.request_count
+        started = time.perf_counter()
+        for i in range(reads):
+            if i < edits:
+                notion.touch(edited[i], Grade={'number': 98.0})
+                replayer.notion_event('page.properties_updated', edited[i], DATABASE_ID, ['Grade'])
+            tracker.fetch_assignments_from_notion()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            store = tracker.fetch_assignments_from_notion()
+            if all(store.get(page_id).grade == 98.0 for page_id in edited):
+                break
+            time.sleep(0.01)
+        propagated = time.perf_counter() - started
+        pushed = notion.request_count - before
+        rejected = replayer.replay({'type': 'page.deleted', 'entity': {'id': edited[0]}}, secret='wrong')
+        receiver.stop()
+    return {
+        'polling_requests': polling,
+        'push_requests': pushed,
+        'push_propagation_seconds': propagated,
+        'edits_applied': all(store.get(page_id).grade == 98.0 for page_id in edited),
+        'forged_event_status': rejected,
+    }
+
+
+def bench_connectors(size, tmpdir, courses=4):
+    """
+    PrairieLearn requests and time for a first fetch of `courses` course instances, a repeat with
+    nothing changed (one 304 per course), and one after an assessment was renamed and another's
+    deadline extended. Each fetch is reconciled into Notion, where those two must update their
+    pages rather than add new ones.
+    """
+    from src.connectors import ConditionalCache, PrairieLearnConnector
+    from src.reconcile import Reconciler
+
+    per_course = max(2, size // courses)
+    with FakePrairieLearn() as prairielearn, FakeNotion() as notion:
+        os.environ['NOTION_API_URL'] = notion.api_url
+        for i in range(courses):
+            prairielearn.seed(1000 + i, per_course)
+        connector = PrairieLearnConnector(
+            courses={f"CS{400 + i}": str(1000 + i) for i in range(courses)},
+            token=prairielearn.token, base_url=prairielearn.url,
+            cache=ConditionalCache(os.path.join(tmpdir, f"connector_cache_{size}.json")),
+        )
+        tracker = make_tracker(tmpdir, f"connectors_{size}")
+
+        def sync(rows):
+            reconciler = Reconciler(tracker)
+            return reconciler.apply(reconciler.plan(rows))
+
+        started = time.perf_counter()
+        rows = connector.fetch()
+        initial = time.perf_counter() - started
+        initial_requests = prairielearn.request_count
+        first = sync(rows)
+
+        before = prairielearn.request_count
+        started = time.perf_counter()
+        repeat_rows = connector.fetch()
+        repeat = time.perf_counter() - started
+        repeat_requests = prairielearn.request_count - before
+        repeat_not_modified = connector.cache.not_modified
+        repeat_sync = sync(repeat_rows)
+
+        prairielearn.retitle(1000, 1, 'Homework 1 (revised)')
+        prairielearn.extend(1000, 2, 3)
+        before = prairielearn.request_count
+        changed_rows = connector.fetch()
+        changed_requests = prairielearn.request_count - before
+        changed = sync(changed_rows)
+        pages = [page for page in notion.pages.values() if not page['archived']]
+        titles = {page['properties']['Name']['title'][0]['text']['content'] for page in pages}
+    return {
+        'initial_seconds': initial,
+        'repeat_seconds': repeat,
+        'rows': len(rows),
+        'initial_requests': initial_requests,
+        'repeat_requests': repeat_requests,
+        'repeat_not_modified': repeat_not_modified,
+        'changed_requests': changed_requests,
+        'created': first['created'],
+        'repeat_writes': repeat_sync['created'] + repeat_sync['updated'],
+        'changed': changed,
+        'rows_stable': repeat_rows == rows and len(changed_rows) == len(rows),
+        'updated_in_place': len(pages) == len(rows) and 'HW1: Homework 1 (revised)' in titles and changed['updated'] == 2,
+    }
+
+
+BENCHMARKS = {
+    'csv_import': bench_csv_import,
+    'snapshot_refresh': bench_snapshot_refresh,
+    'cold_query': bench_cold_query,
+    'startup': bench_startup,
+    'bot_commands': bench_bot_commands,
+    'sync_calendar': bench_sync_calendar,
+    'push': bench_push,
+    'connectors': bench_connectors,
+    'rate_limited': bench_rate_limited,
+}
+
+# Values a result must report for its run to count; main() exits non-zero when one doesn't.
+CHECKS = {
+    'cold_query': {'rows_match': True, 'followup_requests': 0},
+    'sync_calendar': {'repeat_requests': 1},
+    'push': {'edits_applied': True},
+    'connectors': {'rows_stable': True, 'updated_in_place': True, 'repeat_writes': 0},
+    'rate_limited': {'rows_match': True},
+}
+
+
+def failed_checks(results):
+    return [
+        f"{result['benchmark']} @ {result['size']}: {name} is {result.get(name)!r}, expected {expected!r}"
+        for result in results
+        for name, expected in CHECKS.get(result['benchmark'], {}).items()
+        if result.get(name) != expected
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000', help='comma-separated assignment counts')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='comma-separated benchmark names')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    parser.add_argument('--rate-limits', action='store_true',
+                        help="keep the transport's production rate limits (off by default to measure code paths)")
+    args = parser.parse_args(argv)
+
+    with FakeDiscordWebhook() as webhook, FakeCalendar() as calendar:
+        configure_environment(webhook, calendar)
+        from src.transport import get_transport
+        if not args.rate_limits:
+            for service in ('notion', 'discord', 'google', 'prairielearn'):
+                get_transport().set_rate_limit(service, 1e9, 1e9)
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in args.only.split(','):
+                for size in (int(s) for s in args.sizes.split(',')):
+                    print(f"running {name} @ {size}", file=sys.stderr)
+                    kwargs = {'rate_limits': args.rate_limits} if name == 'startup' else {}
+                    results.append({'benchmark': name, 'size': size, **BENCHMARKS[name](size, tmpdir, **kwargs)})
+
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rate_limits': args.rate_limits,
+            'results': results,
+            'transport': get_transport().endpoint_stats(),
+        }
+
+    text = json.dumps(report, indent=2, default=str)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    failures = failed_checks(results)
+    for failure in failures:
+        print(f"check failed: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
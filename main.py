@@ -1,15 +1,63 @@
+import argparse
 import os
 from dotenv import load_dotenv
 from src.assignment_tracker import AssignmentTracker
+from src.connectors import CONNECTORS, CsvConnector, fetch_all
 from src.discord_bot import run_bot
+from src.reconcile import Reconciler
 
 
-def main():
-    load_dotenv('config/.env')
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Notionize: track assignments in Notion from Discord.")
+    parser.add_argument('--platform', action='append', choices=['all', *CONNECTORS],
+                        help="fetch assignments from a platform into Notion and exit (repeatable)")
+    parser.add_argument('--csv', action='append', metavar='PATH',
+                        help="import a CSV file into Notion and exit (repeatable)")
+    return parser.parse_args(argv)
+
+
+def import_sources(platforms, csv_paths):
+    """
+    Fetch every requested source concurrently and bring Notion in line with them.
+
+    Platform rows carry a stable source id and go through the Reconciler, so a renamed assessment
+    or an extended deadline updates its page; CSV rows are imported as `!upload_csv` does.
+    """
+    names = list(CONNECTORS) if 'all' in platforms else platforms
+    connectors = [CONNECTORS[name]() for name in dict.fromkeys(names)]
+    connectors += [CsvConnector(path) for path in csv_paths]
+    rows, failures = fetch_all(connectors)
     tracker = AssignmentTracker()
-    tracker.read_csv("data/assignments.csv")
-    run_bot(os.getenv('DISCORD_TOKEN'))
+    # Without the bot running, each import is also when recurring assignments roll forward.
+    tracker.materialize_recurrences()
+
+    platform_rows = [row for row in rows if not isinstance(row, Exception) and row.get('source id')]
+    if platform_rows:
+        reconciler = Reconciler(tracker)
+        summary = reconciler.apply(reconciler.plan(platform_rows))
+        print(f"Synced {len(platform_rows)} platform assignments: {summary['created']} created, "
+              f"{summary['updated']} updated, {summary['failed']} failed")
+
+    csv_rows = [row for row in rows if isinstance(row, Exception) or not row.get('source id')]
+    if csv_rows:
+        outcomes = tracker.import_rows(csv_rows)
+        counts = {status: 0 for status in ('uploaded', 'duplicate', 'scheduled', 'failed', 'invalid')}
+        for outcome in outcomes:
+            counts[outcome['status']] += 1
+        print(f"Imported {len(outcomes)} CSV rows: {counts['uploaded']} uploaded, "
+              f"{counts['duplicate']} already in Notion, {counts['failed']} failed, {counts['invalid']} invalid")
+    for name, error in failures.items():
+        print(f"{name} could not be fetched: {error}")
+
+
+def main(argv=None):
+    load_dotenv('config/.env')
+    args = parse_args(argv)
+    if args.platform or args.csv:
+        import_sources(args.platform or [], args.csv or [])
+        return
+    # The sample CSV is imported in the background once the bot has logged in.
+    run_bot(os.getenv('DISCORD_TOKEN'), startup_csv_path="data/assignments.csv")
 
 if __name__ == "__main__":
     main()
-
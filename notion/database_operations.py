@@ -1,9 +1,15 @@
 from notion.notion_client import NotionClient
 
+_notion_client = None
+
+def get_notion_client():
+    global _notion_client
+    if _notion_client is None:
+        _notion_client = NotionClient()
+    return _notion_client
+
 def upload_assignment_to_notion(assignment_data):
-    notion_client = NotionClient()
-    notion_client.upload_assignment(assignment_data)
+    return get_notion_client().upload_assignment(assignment_data)
 
 def query_assignments_in_notion(filters):
-    notion_client = NotionClient()
-    return notion_client.query_assignments(filters)
+    return get_notion_client().query_assignments(filters)
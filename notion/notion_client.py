@@ -1,13 +1,55 @@
 import os
 import dotenv
-from notion_client import Client
+from src.transport import get_transport
 
 dotenv.load_dotenv()
 
+NOTION_VERSION = '2022-06-28'
+
+
+class NotionAPIError(Exception):
+    def __init__(self, status_code, body):
+        super().__init__(f"Notion API error {status_code}: {body}")
+        self.status_code = status_code
+        self.body = body
+
+
 class NotionClient:
-    def __init__(self):
-        self.notion = Client(auth=os.getenv("NOTION_API_KEY"))
-        self.database_id = os.getenv("DATABASE_ID")
+    """Minimal Notion REST client that sends every call through the shared transport."""
+
+    def __init__(self, auth=None, database_id=None, base_url=None, transport=None):
+        self.auth = auth or os.getenv("NOTION_API_KEY") or os.getenv("API_KEY")
+        self.database_id = database_id or os.getenv("DATABASE_ID")
+        self.base_url = (base_url or os.getenv("NOTION_API_URL", "https://api.notion.com/v1")).rstrip('/')
+        self.transport = transport or get_transport()
+        self.headers = {
+            'Authorization': f'Bearer {self.auth}',
+            'Content-Type': 'application/json',
+            'Notion-Version': NOTION_VERSION,
+        }
+
+    def request(self, method, path, endpoint, body=None, idempotent=None):
+        response = self.transport.request(
+            method, f"{self.base_url}{path}", service='notion', endpoint=endpoint,
+            headers=self.headers, json=body, idempotent=idempotent,
+        )
+        if response.status_code >= 400:
+            raise NotionAPIError(response.status_code, response.text)
+        return response.json()
+
+    def query_database(self, database_id=None, **body):
+        database_id = database_id or self.database_id
+        # A query only reads, so it is safe to resend despite being a POST.
+        return self.request('POST', f"/databases/{database_id}/query", 'notion.databases.query', body, idempotent=True)
+
+    def create_page(self, payload):
+        return self.request('POST', "/pages", 'notion.pages.create', payload)
+
+    def update_page(self, page_id, **body):
+        return self.request('PATCH', f"/pages/{page_id}", 'notion.pages.update', body)
+
+    def retrieve_page(self, page_id):
+        return self.request('GET', f"/pages/{page_id}", 'notion.pages.retrieve')
 
     def upload_assignment(self, assignment_data):
         """ Upload an assignment to Notion. """
@@ -22,8 +64,8 @@ class NotionClient:
                 "Weightage": {"number": assignment_data['weightage']}
             }
         }
-        self.notion.pages.create(**payload)
+        return self.create_page(payload)
 
     def query_assignments(self, filters):
         """ Query assignments in Notion database. """
-        return self.notion.databases.query(database_id=self.database_id, filter=filters)
+        return self.query_database(**({'filter': filters} if filters else {}))
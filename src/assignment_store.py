@@ -0,0 +1,293 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+COMPLETE_STATUS = 'Complete'
+# CSV status values and the Notion status options they are written as.
+CSV_STATUSES = {
+    'Not Started': 'Not started',
+    'In Progress': 'In progress',
+    'Completed': 'Complete',
+}
+
+
+@dataclass(slots=True)
+class AssignmentRecord:
+    page_id: str
+    name: str
+    courses: tuple
+    start: datetime | None
+    due: datetime | None
+    due_day: date | None
+    complete: str
+    grade: float | None
+    weightage: float | None
+    last_edited: str | None = None
+
+    @property
+    def is_complete(self):
+        return self.complete == COMPLETE_STATUS
+
+    def in_course(self, course):
+        course = course.lower()
+        return any(c.lower() == course for c in self.courses)
+
+
+def parse_notion_datetime(value):
+    """Parse a Notion date string into an aware datetime (naive values are UTC, as Notion stores them)."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace(' ', 'T'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def parse_notion_day(value):
+    """The calendar day a date string names, read off its date part as parse_date always has."""
+    if not value:
+        return None
+    return date.fromisoformat(value.replace(' ', 'T').split('T')[0])
+
+
+def record_from_page(page):
+    properties = page['properties']
+    title = properties['Name']['title']
+    start = properties['Start Date']['date'] if 'Start Date' in properties else None
+    end = properties['End Date']['date'] if 'End Date' in properties else None
+    start_value = start['start'] if start else None
+    end_value = end['start'] if end else None
+    return AssignmentRecord(
+        page_id=page['id'],
+        name=title[0]['text']['content'] if title else '',
+        courses=tuple(c['name'] for c in properties['Course']['multi_select']),
+        start=parse_notion_datetime(start_value),
+        due=parse_notion_datetime(end_value),
+        due_day=parse_notion_day(end_value),
+        complete=properties['Complete']['status']['name'],
+        grade=properties['Grade']['number'] if 'Grade' in properties else None,
+        weightage=properties['Weightage']['number'] if 'Weightage' in properties else None,
+        last_edited=page.get('last_edited_time'),
+    )
+
+
+class CourseGrades:
+    """
+    Running grade totals per course, kept as parallel columns with one slot per course.
+
+    An assignment counts as graded once it has a grade and a weightage, whatever its status, as
+    !course_grade always counted it; until then its weight is remaining. Scores are grade (percent) times weightage (a fraction of the course), so a course's
+    projected final lies between its weighted score and that plus 100 times the remaining weight.
+    """
+    __slots__ = ('slots', 'names', 'count', 'weighted', 'graded_weight', 'remaining_weight')
+
+    def __init__(self):
+        self.slots = {}
+        self.names = []
+        self.count = array('l')
+        self.weighted = array('d')
+        self.graded_weight = array('d')
+        self.remaining_weight = array('d')
+
+    def copy(self):
+        clone = CourseGrades()
+        clone.slots = dict(self.slots)
+        clone.names = list(self.names)
+        for column in ('count', 'weighted', 'graded_weight', 'remaining_weight'):
+            setattr(clone, column, array(getattr(self, column).typecode, getattr(self, column)))
+        return clone
+
+    def add(self, record, sign=1):
+        weight = record.weightage or 0.0
+        graded = record.grade is not None and record.weightage is not None
+        for course in record.courses:
+            slot = self._slot(course)
+            self.count[slot] += sign
+            if not self.count[slot]:
+                # Reset rather than trust repeated float subtraction to land on zero.
+                self.weighted[slot] = self.graded_weight[slot] = self.remaining_weight[slot] = 0.0
+            elif graded:
+                self.weighted[slot] += sign * record.grade * weight
+                self.graded_weight[slot] += sign * weight
+            else:
+                self.remaining_weight[slot] += sign * weight
+
+    def report(self, course=None):
+        """Columns for every course with assignments (or just `course`), in course-name order."""
+        if course is not None:
+            slot = self.slots.get(course.lower())
+            live = [slot] if slot is not None and self.count[slot] else []
+        else:
+            live = sorted((i for i, n in enumerate(self.count) if n), key=lambda i: self.names[i].lower())
+        weighted = [self.weighted[i] for i in live]
+        graded_weight = [self.graded_weight[i] for i in live]
+        remaining_weight = [self.remaining_weight[i] for i in live]
+        return {
+            'course': [self.names[i] for i in live],
+            'assignments': [self.count[i] for i in live],
+            'weighted': weighted,
+            'graded_weight': graded_weight,
+            'remaining_weight': remaining_weight,
+            'average': [w / g if g else None for w, g in zip(weighted, graded_weight)],
+            'projected_min': weighted,
+            'projected_max': [w + 100 * r for w, r in zip(weighted, remaining_weight)],
+        }
+
+    def _slot(self, course):
+        key = course.lower()
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.names)
+            self.names.append(course)
+            for column in (self.count, self.weighted, self.graded_weight, self.remaining_weight):
+                column.append(0)
+        return slot
+
+
+class AssignmentStore:
+    """
+    In-memory assignment records with a sorted due-date index and hash indexes on course and status.
+
+    Range queries bisect the due index, so they cost O(log n + k) instead of a scan of every record.
+    A frozen store rejects writes; changes go into a copy, which then replaces it.
+    """
+
+    def __init__(self, records=()):
+        self._records = {}
+        self._due_index = []
+        self._by_course = defaultdict(set)
+        self._by_status = defaultdict(set)
+        self._grades = CourseGrades()
+        self.frozen = False
+        self._bulk_load(records)
+
+    def _bulk_load(self, records):
+        # One sort instead of an insort per record, for warm starts and full syncs.
+        for record in records:
+            self._records[record.page_id] = record
+        for record in self._records.values():
+            if record.due_day is not None:
+                self._due_index.append(self._due_key(record))
+            for course in record.courses:
+                self._by_course[course.lower()].add(record.page_id)
+            self._by_status[record.complete].add(record.page_id)
+            self._grades.add(record)
+        self._due_index.sort()
+
+    def copy(self):
+        """An unfrozen copy; records are shared, since they are replaced rather than changed in place."""
+        clone = AssignmentStore()
+        clone._records = dict(self._records)
+        clone._due_index = list(self._due_index)
+        clone._by_course = defaultdict(set, {course: set(ids) for course, ids in self._by_course.items()})
+        clone._by_status = defaultdict(set, {status: set(ids) for status, ids in self._by_status.items()})
+        clone._grades = self._grades.copy()
+        return clone
+
+    def freeze(self):
+        self.frozen = True
+        return self
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        """Iterate records by due date; undated records come last."""
+        for _, _, page_id in self._due_index:
+            yield self._records[page_id]
+        for record in self._records.values():
+            if record.due_day is None:
+                yield record
+
+    def __contains__(self, page_id):
+        return page_id in self._records
+
+    def get(self, page_id):
+        return self._records.get(page_id)
+
+    def page_ids(self):
+        return set(self._records)
+
+    def upsert(self, record):
+        if self.frozen:
+            raise TypeError("cannot modify a frozen AssignmentStore")
+        self.remove(record.page_id)
+        self._records[record.page_id] = record
+        if record.due_day is not None:
+            insort(self._due_index, self._due_key(record))
+        for course in record.courses:
+            self._by_course[course.lower()].add(record.page_id)
+        self._by_status[record.complete].add(record.page_id)
+        self._grades.add(record)
+
+    def remove(self, page_id):
+        if self.frozen:
+            raise TypeError("cannot modify a frozen AssignmentStore")
+        record = self._records.pop(page_id, None)
+        if record is None:
+            return None
+        if record.due_day is not None:
+            key = self._due_key(record)
+            del self._due_index[bisect_left(self._due_index, key)]
+        for course in record.courses:
+            ids = self._by_course[course.lower()]
+            ids.discard(page_id)
+            if not ids:
+                del self._by_course[course.lower()]
+        ids = self._by_status[record.complete]
+        ids.discard(page_id)
+        if not ids:
+            del self._by_status[record.complete]
+        self._grades.add(record, -1)
+        return record
+
+    def due_between(self, start_day, end_day):
+        """Records due on any day from start_day to end_day inclusive, in due order."""
+        lo = bisect_left(self._due_index, (start_day,))
+        hi = bisect_left(self._due_index, (end_day + timedelta(days=1),))
+        return [self._records[page_id] for _, _, page_id in self._due_index[lo:hi]]
+
+    def due_on(self, day):
+        return self.due_between(day, day)
+
+    def for_course(self, course):
+        return self._sorted(self._by_course.get(course.lower(), ()))
+
+    def with_status(self, status):
+        return self._sorted(self._by_status.get(status, ()))
+
+    def incomplete(self):
+        return self._sorted(
+            page_id
+            for status, ids in self._by_status.items() if status != COMPLETE_STATUS
+            for page_id in ids
+        )
+
+    def courses(self):
+        return sorted(self._by_course)
+
+    def grade_report(self, course=None, extra=()):
+        """Grade columns for the snapshot, counting `extra` records (not in the store) as well."""
+        if not extra:
+            return self._grades.report(course)
+        grades = self._grades.copy()
+        for record in extra:
+            grades.add(record)
+        return grades.report(course)
+
+    def _sorted(self, page_ids):
+        records = [self._records[page_id] for page_id in page_ids]
+        records.sort(key=self._sort_key)
+        return records
+
+    @staticmethod
+    def _due_key(record):
+        return (record.due_day, record.due.timestamp(), record.page_id)
+
+    @staticmethod
+    def _sort_key(record):
+        if record.due_day is None:
+            return (1, date.max, 0.0, record.page_id)
+        return (0, record.due_day, record.due.timestamp(), record.page_id)
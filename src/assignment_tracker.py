@@ -1,13 +1,22 @@
-import asyncio
-import json
 import os
-from httplib2 import Credentials
-import requests
-import csv
+import threading
+import time
+from concurrent.futures import Future, wait
 import dotenv
-from notion_client import Client
+from notion.notion_client import NotionClient
 import discord
 from datetime import datetime, timedelta
+from src import metrics
+from src.async_io import get_executor
+from src.assignment_store import CSV_STATUSES, AssignmentStore, record_from_page
+from src.calendar_sync import CalendarSync
+from src.mirror import AssignmentMirror
+from src.snapshot_file import read_snapshot, write_snapshot
+from src.connectors import CsvConnector, SourcePages
+from src.csv_import import CsvImporter, record_keys
+from src.import_journal import ImportJournal
+from src.notifications import get_dispatcher
+from src.recurrence import RecurrenceStore, horizon_end
 
 COURSE_COLORS = {
     "CS598": discord.Color.blue(),
@@ -23,33 +32,57 @@ def get_course_embed(course_name, title):
     return discord.Embed(title=title, color=color)
 
 class AssignmentTracker:
-    def __init__(self):
+    def __init__(self, auth=None, database_id=None, mirror_path=None, webhook_url=None, snapshot_path=None,
+                 recurrence_path=None, journal_path=None):
+        """Settings not passed in come from the environment (.env), as for a single-student deployment."""
         dotenv.load_dotenv()
-        self.headers = {
-            'Authorization': f'Bearer {os.getenv("API_KEY")}',
-            'Content-Type': 'application/json',
-            'Notion-Version': '2022-06-28'
-        }
-        self.notion = Client(auth=os.getenv("API_KEY"))
-        self.database_id = os.getenv("DATABASE_ID")
-        self.discord_webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
-        self.assignments = []
-        self.assignments_in_database = set()
+        self.database_id = database_id or os.getenv("DATABASE_ID")
+        self._auth = auth or os.getenv("API_KEY")
+        self._notion = None
+        self.discord_webhook_url = webhook_url if webhook_url is not None else os.getenv("DISCORD_WEBHOOK_URL")
+        self.store = AssignmentStore()
+        self._dedupe_keys = None
+        # With the push receiver on, edits arrive as events, so the snapshot stays fresh far longer.
+        self.snapshot_ttl = float(os.getenv("SNAPSHOT_TTL", "3600" if os.getenv("PUSH_RECEIVER_PORT") else "60"))
+        self.full_sync_interval = float(os.getenv("FULL_SYNC_INTERVAL", "3600"))
+        self.stale_retry_interval = float(os.getenv("STALE_RETRY_INTERVAL", "15"))
+        self.high_water_mark = None
+        self.stale = False
+        self._snapshot_fetched_at = None
+        self._last_full_sync = None
+        self._lock = threading.RLock()
+        self._flight_lock = threading.Lock()
+        self._in_flight = None
+        self._full_sync_queued = False
+        self._pending_writes = {}
+        self._refresh_writes = None
+        self._listeners = []
+        self.calendar_service = None
+        self.calendar_sync = None
+        mirror_path = mirror_path or os.getenv("MIRROR_PATH", "notionize.db")
+        self.mirror = AssignmentMirror(mirror_path)
+        self.snapshot_path = snapshot_path or os.getenv("SNAPSHOT_PATH") or os.path.splitext(mirror_path)[0] + '.snapshot'
+        self.recurrences = RecurrenceStore(recurrence_path or os.path.splitext(mirror_path)[0] + '.recurrences.json')
+        self.journal = ImportJournal(journal_path or os.path.splitext(mirror_path)[0] + '.journal')
+        self.source_pages = SourcePages(os.path.splitext(mirror_path)[0] + '.sources.json')
+        self._warm_start()
+
+    @property
+    def notion(self):
+        """The Notion client, built on first use."""
+        if self._notion is None:
+            self._notion = NotionClient(auth=self._auth, database_id=self.database_id)
+        return self._notion
 
     def generate_payload(self, assignment, course, start_date, end_date, cp, grade, weightage):
-        valid_statuses = {
-            'Not Started': 'Not started',
-            'In Progress': 'In progress',
-            'Completed': 'Complete',
-        }
-        notion_status = valid_statuses.get(cp, "Not started")
+        notion_status = CSV_STATUSES.get(cp, "Not started")
         
         payload = {
             "parent": {"database_id": self.database_id},
             "properties": {
                 'Name': {'title': [{'text': {'content': str(assignment)}}]},
                 'Course': {'multi_select': [{'name': str(course)}]},
-                'Start Date': {'date': {'start': start_date}},
+                'Start Date': {'date': {'start': start_date} if start_date else None},
                 'End Date': {'date': {'start': end_date}},
                 'Complete': {'status': {'name': notion_status}},
                 'Grade': {'number': float(grade)} if grade and grade != 'Not Started' else None,
@@ -59,96 +92,401 @@ class AssignmentTracker:
         return payload
 
     def send_discord_notification(self, message):
-        payload = {"content": message}
+        """Queue a webhook message; the dispatcher coalesces and delivers it in the background."""
+        if self.discord_webhook_url:
+            get_dispatcher(self.discord_webhook_url).send(message)
+
+    def read_csv(self, filepath):
+        """Import a CSV in either supported layout and return one outcome dict per (expanded) row."""
+        return self.import_rows(CsvConnector(filepath).rows(), source=filepath)
+
+    def import_rows(self, rows, source=None):
+        """Upload rows from any source connector; returns one outcome dict per (expanded) row."""
+        return CsvImporter(self, source=source).run(rows)
+
+    def resume_imports(self):
+        """Finish any imports the journal shows were cut short; returns their outcomes."""
+        outcomes = []
+        for state in self.journal.unfinished():
+            print(f"Resuming interrupted import of {state.source or 'assignments'}")
+            outcomes.extend(CsvImporter(self).resume(state))
+        return outcomes
+
+    def materialize_recurrences(self):
+        """Create Notion pages for recurring occurrences that have come into the horizon window."""
+        rows = self.recurrences.pending_rows(horizon_end())
+        if not rows:
+            return []
+        return CsvImporter(self).run(rows)
+
+    def skip_occurrence(self, key, day):
+        """
+        Skip a recurring assignment's occurrence due on `day`, archiving its page if it already has one.
+
+        Returns False if there is no such series.
+        """
+        rule = self.recurrences.get(key)
+        if rule is None:
+            return False
+        page_id = self.recurrences.add_exception(key, day)
+        if page_id is None:
+            # Occurrences that matched an existing page on import were recorded without its id.
+            page_id = next((
+                r.page_id for r in self._current_snapshot().due_on(day)
+                if r.name.startswith(rule.name) and r.in_course(rule.course)
+            ), None)
+        if page_id is not None:
+            self.record_written_page(self.notion.update_page(page_id, archived=True))
+        self.recurrences.save()
+        return True
+
+    def query_database_pages(self, **query):
+        """Return every page of the database, following Notion's cursor pagination."""
+        pages = []
+        cursor = None
+        while True:
+            if cursor:
+                query['start_cursor'] = cursor
+            response = self.notion.query_database(page_size=100, **query)
+            pages.extend(response['results'])
+            if not response.get('has_more'):
+                return pages
+            cursor = response.get('next_cursor')
+
+    @property
+    def assignments(self):
+        """Every assignment in the snapshot, ordered by due date."""
+        return list(self._current_snapshot())
+
+    def snapshot_is_fresh(self):
+        if self._snapshot_fetched_at is None:
+            return False
+        return time.monotonic() - self._snapshot_fetched_at < self.snapshot_ttl
+
+    def invalidate_snapshot(self):
+        self._snapshot_fetched_at = None
+
+    def _warm_start(self):
+        """
+        Start from the last synced state on disk, served as stale until Notion confirms it.
+
+        The columnar snapshot file loads fastest; the SQLite mirror is the fallback when the file
+        is missing or was written by another schema version.
+        """
+        snapshot = read_snapshot(self.snapshot_path)
+        if snapshot is not None:
+            records, high_water_mark, last_full_sync = snapshot
+        else:
+            records = self.mirror.load()
+            high_water_mark = self.mirror.get_state('high_water_mark')
+            last_full_sync = self.mirror.get_state('last_full_sync')
+        if not records:
+            return
+        self.store = AssignmentStore(records).freeze()
+        self.high_water_mark = high_water_mark
+        self._last_full_sync = float(last_full_sync) if last_full_sync else None
+        self.stale = True
+        self._publish()
+
+    def _save_snapshot(self):
+        try:
+            write_snapshot(self.snapshot_path, self.store, self.high_water_mark, self._last_full_sync)
+        except OSError as e:
+            print(f"Could not write the snapshot file: {str(e)}")
+
+    def refresh_in_flight(self):
+        return self._in_flight is not None
+
+    def needs_full_sync(self):
+        if self._last_full_sync is None or self.high_water_mark is None:
+            return True
+        return time.time() - self._last_full_sync >= self.full_sync_interval
+
+    def can_delta_sync(self):
+        """True once a sync has set the high-water mark, so a cheap delta query can bring the snapshot current."""
+        return self.high_water_mark is not None
+
+    def queue_full_sync(self):
+        """
+        Run a full sync on the I/O pool unless one is already queued; returns its future, or None.
+
+        Nobody waits on it, so failures are only logged.
+        """
+        with self._flight_lock:
+            if self._full_sync_queued:
+                return None
+            self._full_sync_queued = True
+
+        def run():
+            try:
+                return self.fetch_assignments_from_notion(full=True)
+            except Exception as e:
+                print(f"Background Notion refresh failed: {str(e)}")
+            finally:
+                self._full_sync_queued = False
+        return get_executor().submit(run)
+
+    def fetch_assignments_from_notion(self, force=False, full=False):
+        """
+        Return the current AssignmentStore snapshot, refreshing it from Notion once it is older than the TTL.
+
+        Refreshes only pull pages edited since the high-water mark; a full reconciliation (which also
+        drops deleted and archived pages) runs when `full` is set, when there is no high-water mark yet,
+        and in the background every FULL_SYNC_INTERVAL seconds.
+        If Notion cannot be reached the last known snapshot is returned with `stale` set.
+
+        Callers that arrive while a refresh is running wait for it and share its result instead of
+        starting their own. Snapshots are frozen: a refresh builds a new store and swaps it in, so a
+        snapshot a caller holds never changes underneath it.
+        """
+        if not force and not full and self.snapshot_is_fresh():
+            metrics.inc('notionize_snapshot_requests_total', result='hit')
+            return self._current_snapshot()
+
+        while True:
+            with self._flight_lock:
+                flight = self._in_flight
+                if flight is None:
+                    flight = self._in_flight = (Future(), full)
+                    leader = True
+                    break
+                # A delta refresh can't stand in for a requested full one; wait it out, then lead.
+                if flight[1] or not full:
+                    leader = False
+                    break
+            wait([flight[0]])
+
+        future = flight[0]
+        if not leader:
+            metrics.inc('notionize_snapshot_requests_total', result='joined')
+            return future.result()
+
+        metrics.inc('notionize_snapshot_requests_total', result='miss')
         try:
-            response = requests.post(self.discord_webhook_url, json=payload)
-            if response.status_code == 204:
-                print("Discord notification sent successfully.")
+            store = self._refresh(full)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(store)
+            return store
+        finally:
+            with self._flight_lock:
+                self._in_flight = None
+
+    def _refresh(self, full):
+        # Notion is queried without holding the lock, so imports keep recording their writes meanwhile.
+        previous = self.store
+        with self._lock:
+            self._refresh_writes = {}
+        try:
+            if full or not self.can_delta_sync():
+                self._full_sync()
             else:
-                print(f"Error sending Discord notification: {response.status_code}")
+                self._delta_sync()
+                if self.needs_full_sync():
+                    # The delta serves this caller; the periodic reconciliation needn't hold it up.
+                    self.queue_full_sync()
         except Exception as e:
-            print(f"Error sending Discord notification: {str(e)}")
+            with self._lock:
+                self._refresh_writes = None
+                if not len(self.store) and not self.stale:
+                    raise
+                print(f"Notion refresh failed, serving cached assignments: {str(e)}")
+                self.stale = True
+                # Retry after a short pause instead of on every command while Notion is down.
+                self._snapshot_fetched_at = time.monotonic() - self.snapshot_ttl + self.stale_retry_interval
+                return self._apply_pending_writes()
+        self.stale = False
+        # The syncs keep the same store when Notion had nothing new, so this only writes real changes.
+        if self.store is not previous:
+            self._publish()
+            self._save_snapshot()
+        self._snapshot_fetched_at = time.monotonic()
+        return self.store
 
-    def read_csv(self, filepath):
-        url = 'https://api.notion.com/v1/pages'
-        responses = []
-        
-        with open(filepath, mode='r', newline='') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)
-            
-            for row in csv_reader:
-                assignment = row[0].strip()
-                course = row[1].strip()
-                start_date = row[2].strip()
-                end_date = row[3].strip()
-                cp = row[4].strip()
-                grade = row[5].strip()
-                weightage = row[6].strip()
-                repeat_assignment = row[7].strip()
-                repeat_weeks = int(row[8].strip()) if repeat_assignment.lower() == 'yes' else 1
-
-                self.fetch_assignments_from_notion()
-                if (assignment, course, end_date) in self.assignments_in_database:
-                    print(f'Duplicate assignment!')
-                    continue
-                else:
-                    for week in range(repeat_weeks):
-                        current_assignment = f"{assignment}{week+1}" if repeat_weeks > 1 else assignment
-                        current_start_date = (datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S") + timedelta(weeks=week)).strftime("%Y-%m-%d %H:%M:%S")
-                        current_end_date = (datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S") + timedelta(weeks=week)).strftime("%Y-%m-%d %H:%M:%S")
-                        payload = self.generate_payload(current_assignment, course, current_start_date, current_end_date, cp, grade, weightage)
-                        try:
-                            response = requests.post(url, headers=self.headers, data=json.dumps(payload))
-                            responses.append(response.status_code)
-                            if response.status_code == 200:
-                                print(f'{current_assignment} successfully uploaded to Notion')
-                                self.send_discord_notification(
-                                    f"Assignment Uploaded: {current_assignment} - {course}, Date: {current_end_date}, Grade: {grade}, Weightage: {weightage}"
-                                )
-                            else:
-                                print("Error:", response.status_code, response.text)
-                        except Exception as e:
-                            print(f"Exception occurred while uploading row: {str(e)}")
-
-        return responses
-
-
-    def fetch_assignments_from_notion(self):
-        response = self.notion.databases.query(database_id=self.database_id)
-        query = response.json()
-        self.assignments = []
-        for page in query['results']:
-            assignment = page['properties']['Name']['title'][0]['text']['content']
-            course = tuple([c['name'] for c in page['properties']['Course']['multi_select']])
-            start_date = page['properties']['Start Date']['date']['start'] if 'Start Date' in page['properties'] else None
-            end_date = page['properties']['End Date']['date']['start'] if 'End Date' in page['properties'] else None
-            
-            complete = page['properties']['Complete']['status']['name']
-            grade = page['properties']['Grade']['number'] if 'Grade' in page['properties'] and page['properties']['Grade']['number'] is not None else None
-            weightage = page['properties']['Weightage']['number'] if 'Weightage' in page['properties'] and page['properties']['Weightage']['number'] is not None else None
-            
-            assignment_json = {
-                'assignment': assignment,
-                'course': course,
-                'start date': start_date,
-                'due date': end_date,
-                'complete': complete,
-                'grade': grade,
-                'weightage': weightage
-            }
-            
-            self.assignments.append(assignment_json)
-            self.assignments_in_database.add((assignment, course, end_date))
+    def add_listener(self, callback):
+        """Register callback(upserted_records, removed_page_ids), called after every change to the snapshot."""
+        self._listeners.append(callback)
+
+    def _notify(self, upserts, removed):
+        if not upserts and not removed:
+            return
+        for callback in self._listeners:
+            try:
+                callback(upserts, removed)
+            except Exception as e:
+                print(f"Assignment listener failed: {str(e)}")
+
+    def _full_sync(self):
+        pages = self.query_database_pages()
+        with self._lock:
+            store = AssignmentStore()
+            self.high_water_mark = None
+            self._merge_pages(store, pages)
+            # Writes recorded while the query ran may be newer than the copies it read.
+            self._merge_writes(store, self._refresh_writes)
+            self._pending_writes = {}
+            self._refresh_writes = None
+            self._last_full_sync = time.time()
+            changed = [record for record in store if self.store.get(record.page_id) != record]
+            removed = list(self.store.page_ids() - store.page_ids())
+            if not changed and not removed:
+                # Nothing moved: keep the current store so the snapshot file isn't rewritten for nothing.
+                self.mirror.apply([], [], self._sync_state())
+                return
+            self.store = store.freeze()
+            self.mirror.replace_all(self.store, self._sync_state())
+            self._notify(changed, removed)
+
+    def _delta_sync(self):
+        # Notion truncates last_edited_time to the minute, so on_or_after re-reads the boundary minute
+        # rather than risk missing an edit made in it.
+        pages = self.query_database_pages(filter={
+            'timestamp': 'last_edited_time',
+            'last_edited_time': {'on_or_after': self.high_water_mark},
+        })
+        with self._lock:
+            # Those re-read pages come back on every refresh; skip any the snapshot already holds as-is, so
+            # a refresh with nothing new keeps the current store (no copy, mirror write or listener calls).
+            mark = self.high_water_mark
+            pages = [page for page in pages if self._page_changed(page)]
+            refresh_writes, self._refresh_writes = self._refresh_writes, None
+            if not pages and not self._pending_writes:
+                if self.high_water_mark != mark:
+                    self.mirror.apply([], [], self._sync_state())
+                return
+            # Earlier local writes go in first so the copies just read from Notion, which are at least as
+            # new, win a tie; writes recorded while the query ran go in last and win it instead.
+            store = self.store.copy()
+            self._merge_writes(store, self._pending_writes)
+            self._pending_writes = {}
+            upserts, removed = self._merge_pages(store, pages)
+            self._merge_writes(store, refresh_writes)
+            self.store = store.freeze()
+            self.mirror.apply(upserts, removed, self._sync_state())
+            self._notify(upserts, removed)
+
+    def _page_changed(self, page):
+        """False for a page the snapshot already has unchanged, newer or already dropped; advances the mark either way."""
+        edited = page.get('last_edited_time')
+        if edited and (self.high_water_mark is None or edited > self.high_water_mark):
+            self.high_water_mark = edited
+        current = self.store.get(page['id'])
+        if page.get('archived') or page.get('in_trash'):
+            return current is not None
+        if current is not None and edited and current.last_edited and current.last_edited > edited:
+            return False
+        # Compare whole records, not just last_edited_time: two edits in one minute share a timestamp.
+        return current is None or record_from_page(page) != current
+
+    def _merge_pages(self, store, pages):
+        upserts, removed = [], []
+        for page in pages:
+            edited = page.get('last_edited_time')
+            if edited and (self.high_water_mark is None or edited > self.high_water_mark):
+                self.high_water_mark = edited
+            if page.get('archived') or page.get('in_trash'):
+                store.remove(page['id'])
+                removed.append(page['id'])
+                continue
+            current = store.get(page['id'])
+            if current is not None and edited and current.last_edited and current.last_edited > edited:
+                continue  # a local write already holds a newer copy
+            record = record_from_page(page)
+            store.upsert(record)
+            upserts.append(record)
+        return upserts, removed
+
+    @staticmethod
+    def _merge_writes(store, writes):
+        """Fold recorded writes (page id -> record, or None for a removed page) into `store`, keeping newer copies."""
+        for page_id, record in (writes or {}).items():
+            if record is None:
+                store.remove(page_id)
+                continue
+            current = store.get(page_id)
+            if current is not None and record.last_edited and current.last_edited and current.last_edited > record.last_edited:
+                continue
+            store.upsert(record)
+
+    def _sync_state(self):
+        return {'high_water_mark': self.high_water_mark, 'last_full_sync': self._last_full_sync}
+
+    def _current_snapshot(self):
+        if not self._pending_writes:
+            return self.store
+        with self._lock:
+            return self._apply_pending_writes()
+
+    def _apply_pending_writes(self):
+        # Writes are batched into the next snapshot handed out, so an import of n rows costs one
+        # store copy per read rather than one per row.
+        if self._pending_writes:
+            store = self.store.copy()
+            self._merge_writes(store, self._pending_writes)
+            self._pending_writes = {}
+            self.store = store.freeze()
+        return self.store
+
+    def record_written_page(self, page):
+        """
+        Apply a page returned by a Notion write to the mirror now and to the next snapshot handed out.
+
+        Only the parsed record is held until then, and a page written twice is held once. The
+        high-water mark is left alone: other pages edited before this write may not have been seen yet.
+        """
+        if page.get('archived') or page.get('in_trash'):
+            record, upserts, removed = None, [], [page['id']]
+        else:
+            record = record_from_page(page)
+            upserts, removed = [record], []
+        with self._lock:
+            self._pending_writes[page['id']] = record
+            if self._refresh_writes is not None:
+                self._refresh_writes[page['id']] = record
+            self.mirror.apply(upserts, removed)
+            self._notify(upserts, removed)
+            if self._dedupe_keys is not None:
+                self._dedupe_keys.update(self._record_keys(upserts))
+
+    def apply_page_change(self, page_id, removed=False):
+        """Apply a change pushed for one page: refetch just that page, or drop it if it was deleted."""
+        page = None if removed else self.notion.retrieve_page(page_id)
+        parent = (page or {}).get('parent', {}).get('database_id')
+        if page is None or (parent and parent.replace('-', '') != self.database_id.replace('-', '')):
+            page = {'id': page_id, 'archived': True}  # deleted, or moved out of this database
+        self.record_written_page(page)
+
+    @property
+    def assignments_in_database(self):
+        """Dedupe keys of every assignment in the snapshot, built when an import first asks for them."""
+        keys = self._dedupe_keys
+        if keys is None:
+            keys = self._dedupe_keys = self._record_keys(self._current_snapshot())
+        return keys
+
+    @staticmethod
+    def _record_keys(records):
+        return {key for record in records for key in record_keys(record)}
+
+    def _publish(self):
+        self._dedupe_keys = None
 
     def setup_google_calendar(self):
+        # Imported here so the Google libraries load only when a calendar is actually used.
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         SCOPES = ['https://www.googleapis.com/auth/calendar']
         creds = None
         if os.path.exists('token.json'):
             creds = Credentials.from_authorized_user_file('token.json', SCOPES)
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
-                creds.refresh(requests.Request())
+                creds.refresh(Request())
             else:
                 flow = InstalledAppFlow.from_client_secrets_file(
                     'credentials.json', SCOPES)
@@ -158,59 +496,10 @@ class AssignmentTracker:
         self.calendar_service = build('calendar', 'v3', credentials=creds)
 
     def add_to_google_calendar(self, assignment):
-        # Check for existing events
-        start_time = assignment['start date']['start']
-        end_time = assignment['due date']['start']
-        events_result = self.events().list(
-            calendarId='primary',
-            timeMin=start_time,
-            timeMax=end_time,
-            q=assignment['assignment'] 
-        ).execute()
-        existing_events = events_result.get('items', [])
-
-        # If no matching event is found, create a new one
-        if not existing_events:
-            event = {
-                'summary': f"{assignment['assignment']} - {assignment['course'][0]['name']}",
-                'description': f"Grade: {assignment['grade']}, Weightage: {assignment['weightage']}",
-                'start': {
-                    'dateTime': start_time,
-                    'timeZone': 'America/Chicago',
-                },
-                'end': {
-                    'dateTime': end_time,
-                    'timeZone': 'America/Chicago',
-                },
-            }
-            event = self.calendar_service.events().insert(calendarId='primary', body=event).execute()
-            print(f"Event created: {event.get('htmlLink')}")
-        else:
-            print(f"Event already exists: {assignment['assignment']}")
-
-
-    def generate_repeating_assignments(self, assignment_name, course, start_date, end_date, weightage, repeat_weeks):
-        """
-        Generate multiple assignments for repeated weeks but do not include 'Repeat Assignment' or 'Repeat Weeks' in the payload.
-        """
-        assignments = []
-        start_datetime = datetime.strptime(start_date, '%Y-%m-%d %H:%M:%S')
-        end_datetime = datetime.strptime(end_date, '%Y-%m-%d %H:%M:%S')
-
-        for i in range(repeat_weeks):
-            # Adjust dates for each week
-            assignment_start = start_datetime + timedelta(weeks=i)
-            assignment_end = end_datetime + timedelta(weeks=i)
-            assignments.append({
-                "Assignment Name": assignment_name + str(i+1),
-                "Course": course,
-                "Start Date": assignment_start.strftime('%Y-%m-%d %H:%M:%S'),
-                "End Date": assignment_end.strftime('%Y-%m-%d %H:%M:%S'),
-                "Complete": "Not Started",
-                "Grade": 0,  
-                "Weightage": weightage, 
-            })
-        return assignments
+        """Create or update one assignment's Calendar event, checked against the synced event mirror."""
+        if self.calendar_sync is None:
+            self.calendar_sync = CalendarSync(service=self.calendar_service)
+        return self.calendar_sync.sync([assignment], prune=False)
 
     def parse_date(self, date_str):
         date_str = date_str.split('T')[0]
@@ -225,11 +514,10 @@ class AssignmentTracker:
 
     def get_due_today(self):
         """Return a list of assignments that are due today."""
-        today = datetime.now().date()
-        return [assignment for assignment in self.assignments if self.parse_date(assignment['due date']['start']) == today]
+        return self._current_snapshot().due_on(datetime.now().date())
 
 
     def get_due_this_week(self):
         start_of_week = datetime.now().date() - timedelta(days=datetime.now().weekday())
         end_of_week = start_of_week + timedelta(days=6)
-        return [a for a in self.assignments if start_of_week <= self.parse_date(a['due date']['start']) <= end_of_week]
\ No newline at end of file
+        return self._current_snapshot().due_between(start_of_week, end_of_week)
@@ -0,0 +1,100 @@
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the shared pool that blocking Notion/Google/webhook calls are offloaded to."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("IO_WORKERS", "8")),
+                thread_name_prefix="notionize-io",
+            )
+        return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the I/O pool so the event loop (and the gateway heartbeat) keeps running."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor(wait=True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+class LoopLagMonitor:
+    """
+    Detects callbacks that block the event loop.
+
+    A heartbeat task stamps the time every `interval` seconds; a watchdog thread
+    notices when the stamp goes stale for longer than `threshold` and prints the
+    loop thread's stack while it is still blocked, so the offending call is named.
+    """
+
+    def __init__(self, threshold=None, interval=None):
+        self.threshold = threshold if threshold is not None else float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+        self.interval = interval if interval is not None else min(self.threshold / 2, 0.5)
+        self.max_lag = 0.0
+        self._last_beat = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = now - expected
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                print(f"Event loop lagged {lag * 1000:.0f} ms (threshold {self.threshold * 1000:.0f} ms)")
+            self._last_beat = now
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.interval):
+            last_beat = self._last_beat
+            stalled_for = time.monotonic() - last_beat - self.interval
+            if stalled_for <= self.threshold or reported_beat == last_beat:
+                continue
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '<unavailable>\n'
+            print(f"Event loop blocked for {stalled_for * 1000:.0f} ms so far, currently in:\n{stack}")
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import pickle
+import uuid
+from zoneinfo import ZoneInfo
+
+from src.transport import get_transport
+
+# The Google client libraries are slow to import, so they are imported where they are
+# used; a bot that never syncs a calendar never loads them.
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+# Google accepts up to 1000 calls per batch but recommends staying around 50.
+BATCH_SIZE = 50
+PAGE_ID_PROPERTY = 'notionPageId'
+
+
+def authenticate_google_account(api_root=None):
+    from googleapiclient.discovery import build
+
+    if api_root:
+        from google.auth.credentials import AnonymousCredentials
+
+        # Local stand-in for the Calendar API (benchmarks, manual testing): no OAuth round-trip.
+        return build(
+            'calendar', 'v3',
+            credentials=AnonymousCredentials(),
+            client_options={'api_endpoint': f"{api_root.rstrip('/')}/calendar/v3/"},
+            static_discovery=True,
+        )
+
+    creds = None
+    if os.path.exists('token.pickle'):
+        with open('token.pickle', 'rb') as token:
+            creds = pickle.load(token)
+
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+        else:
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            flow = InstalledAppFlow.from_client_secrets_file(
+                'credentials.json', SCOPES)
+            creds = flow.run_local_server(port=0)
+        with open('token.pickle', 'wb') as token:
+            pickle.dump(creds, token)
+
+    return build('calendar', 'v3', credentials=creds)
+
+
+def build_event(assignment, tz_name):
+    local_tz = ZoneInfo(tz_name)
+    start_date = (assignment.start or assignment.due).astimezone(local_tz)
+    end_date = assignment.due.astimezone(local_tz)
+    course = assignment.courses[0] if assignment.courses else ''
+    return {
+        'summary': f"{assignment.name} - {course}",
+        'description': f"Grade: {assignment.grade}, Weightage: {assignment.weightage}",
+        'start': {
+            'dateTime': start_date.isoformat(),
+            'timeZone': tz_name,
+        },
+        'end': {
+            'dateTime': end_date.isoformat(),
+            'timeZone': tz_name,
+        },
+        'extendedProperties': {'private': {PAGE_ID_PROPERTY: assignment.page_id}},
+    }
+
+
+def is_gone(exception):
+    """True for the 404/410 Calendar returns when an event no longer exists."""
+    from googleapiclient.errors import HttpError
+    return isinstance(exception, HttpError) and exception.resp.status in (404, 410)
+
+
+def event_fingerprint(event):
+    return hashlib.sha1(json.dumps(event, sort_keys=True).encode()).hexdigest()
+
+
+def managed_page_id(event):
+    return ((event.get('extendedProperties') or {}).get('private') or {}).get(PAGE_ID_PROPERTY)
+
+
+def remote_fingerprint(event):
+    """Fingerprint of the fields we write, as Calendar reports them, to spot edits made in Calendar."""
+    return event_fingerprint({
+        'summary': event.get('summary'),
+        'description': event.get('description'),
+        'start': event.get('start'),
+        'end': event.get('end'),
+    })
+
+
+class CalendarSync:
+    """
+    Mirrors Notion assignments into Google Calendar without duplicates.
+
+    A JSON file maps each Notion page id to the Google event created for it together
+    with a fingerprint of the event body, so a sync only sends the inserts, patches and
+    deletes needed to converge, grouped into batch HTTP requests.
+
+    The same file keeps a mirror of the events this sync manages, built by one full list
+    and then kept current with Calendar's incremental (syncToken) lists. Checking it before
+    each sync catches events deleted or edited in Calendar, and duplicates for one page,
+    so they are repaired; a sync with nothing to do costs a single list request.
+    """
+
+    def __init__(self, map_path=None, calendar_id='primary', service=None, api_root=None, tz_name=None):
+        self.map_path = map_path or os.getenv('CALENDAR_MAP_PATH', 'calendar_map.json')
+        self.calendar_id = calendar_id
+        # Root URL of a Calendar API stand-in, e.g. http://127.0.0.1:8090/ (unset for Google itself).
+        self.api_root = api_root or os.getenv('CALENDAR_API_ROOT')
+        self.tz_name = tz_name or os.getenv('CALENDAR_TIMEZONE', 'America/Los_Angeles')
+        self._service = service
+        self.sync_token = None
+        self.events = {}
+        self._duplicates = []
+        self.mapping = self.load_mapping()
+
+    @property
+    def service(self):
+        if self._service is None:
+            self._service = authenticate_google_account(self.api_root)
+        return self._service
+
+    def watch(self, address, token, ttl_seconds=7 * 24 * 3600):
+        """Ask Google to push change notifications for the calendar to `address`; returns the channel id."""
+        channel_id = uuid.uuid4().hex
+        body = {
+            'id': channel_id,
+            'type': 'web_hook',
+            'address': address,
+            'token': token,
+            'params': {'ttl': str(ttl_seconds)},
+        }
+        request = self.service.events().watch(calendarId=self.calendar_id, body=body)
+        get_transport().call('google', 'google.calendar.watch', request.execute)
+        return channel_id
+
+    def load_mapping(self):
+        if not os.path.exists(self.map_path):
+            return {}
+        with open(self.map_path, 'r') as f:
+            state = json.load(f)
+        if 'mapping' not in state:
+            return state  # written before the event mirror existed; the first sync lists everything
+        self.sync_token = state.get('sync_token')
+        self.events = state.get('events', {})
+        return state['mapping']
+
+    def save_mapping(self):
+        tmp_path = f"{self.map_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'mapping': self.mapping, 'sync_token': self.sync_token, 'events': self.events}, f)
+        os.replace(tmp_path, self.map_path)
+
+    def refresh_events(self):
+        """
+        Bring the event mirror up to date: an incremental list from the stored sync token, or a
+        full list when there is none or Google has expired it (410). Returns how many managed
+        events changed.
+        """
+        if self.sync_token is not None:
+            try:
+                return self._list_events(syncToken=self.sync_token)
+            except Exception as e:
+                if not is_gone(e):
+                    raise
+                print("Calendar sync token expired; listing all events again")
+        self.sync_token = None
+        self.events = {}
+        return self._list_events()
+
+    def _list_events(self, **params):
+        events = self.service.events()
+        changed = 0
+        page_token = None
+        while True:
+            request = events.list(calendarId=self.calendar_id, maxResults=2500, pageToken=page_token, **params)
+            response = get_transport().call('google', 'google.calendar.list', request.execute)
+            for event in response.get('items', []):
+                if event.get('status') == 'cancelled':
+                    changed += self.events.pop(event['id'], None) is not None
+                    continue
+                page_id = managed_page_id(event)
+                if page_id is None:
+                    continue  # not one of ours
+                self.events[event['id']] = {'page_id': page_id, 'fingerprint': remote_fingerprint(event)}
+                changed += 1
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                self.sync_token = response.get('nextSyncToken')
+                return changed
+
+    def repair(self):
+        """
+        Reconcile the page mapping with the event mirror. Returns counts of what was found.
+
+        A mapped event that is gone is forgotten so the page's event is recreated; one edited in
+        Calendar has its fingerprint cleared so plan() compares it afresh; an unmapped event for a page
+        (from an older sync, or the mapping file was lost) is adopted, and further events for a
+        page that already has one are queued for deletion.
+        """
+        found = {'deleted': 0, 'edited': 0, 'duplicate': 0}
+        by_page = {}
+        for event_id, remote in self.events.items():
+            by_page.setdefault(remote['page_id'], []).append(event_id)
+        self._duplicates = []
+        for page_id, mapped in list(self.mapping.items()):
+            remote = self.events.get(mapped['event_id'])
+            if remote is None:
+                del self.mapping[page_id]
+                found['deleted'] += 1
+            elif remote['fingerprint'] != mapped.get('remote'):
+                mapped['fingerprint'] = None
+                mapped['remote'] = remote['fingerprint']
+                found['edited'] += 1
+        for page_id, event_ids in by_page.items():
+            mapped = self.mapping.get(page_id)
+            if mapped is None:
+                remote = self.events[event_ids[0]]['fingerprint']
+                mapped = self.mapping[page_id] = {'event_id': event_ids[0], 'fingerprint': None, 'remote': remote}
+            extra = [event_id for event_id in event_ids if event_id != mapped['event_id']]
+            self._duplicates.extend((page_id, event_id) for event_id in extra)
+            found['duplicate'] += len(extra)
+        return found
+
+    def plan(self, assignments, prune=True):
+        """Return (inserts, patches, deletes) needed to make the calendar match `assignments`."""
+        inserts, patches = [], []
+        desired = set()
+        for assignment in assignments:
+            if assignment.due is None:
+                continue
+            desired.add(assignment.page_id)
+            event = build_event(assignment, self.tz_name)
+            fingerprint = event_fingerprint(event)
+            mapped = self.mapping.get(assignment.page_id)
+            if mapped is None:
+                inserts.append((assignment.page_id, event, fingerprint))
+            elif mapped['fingerprint'] is None and mapped.get('remote') == remote_fingerprint(event):
+                mapped['fingerprint'] = fingerprint  # what Calendar has already matches
+            elif mapped['fingerprint'] != fingerprint:
+                patches.append((assignment.page_id, mapped['event_id'], event, fingerprint))
+        deletes = list(self._duplicates)
+        if prune:
+            deletes.extend(
+                (page_id, mapped['event_id'])
+                for page_id, mapped in self.mapping.items()
+                if page_id not in desired
+            )
+        return inserts, patches, deletes
+
+    def sync(self, assignments, prune=True):
+        """
+        Make the calendar match `assignments`. With prune=False, events for pages not in
+        `assignments` are left alone (for adding a few assignments rather than the whole term).
+        """
+        self.refresh_events()
+        repaired = self.repair()
+        inserts, patches, deletes = self.plan(assignments, prune)
+        events = self.service.events()
+        calls = []
+        for page_id, event, fingerprint in inserts:
+            calls.append((
+                events.insert(calendarId=self.calendar_id, body=event),
+                self._on_written(page_id, fingerprint),
+            ))
+        for page_id, event_id, event, fingerprint in patches:
+            calls.append((
+                events.patch(calendarId=self.calendar_id, eventId=event_id, body=event),
+                self._on_written(page_id, fingerprint),
+            ))
+        for page_id, event_id in deletes:
+            calls.append((
+                events.delete(calendarId=self.calendar_id, eventId=event_id),
+                self._on_deleted(page_id, event_id),
+            ))
+
+        result = {'inserted': 0, 'patched': 0, 'deleted': 0, 'failed': 0, 'repaired': repaired}
+        self._result = result
+        try:
+            for i in range(0, len(calls), BATCH_SIZE):
+                batch = self._new_batch()
+                for request, callback in calls[i:i + BATCH_SIZE]:
+                    batch.add(request, callback=callback)
+                get_transport().call('google', 'google.calendar.batch', batch.execute)
+        finally:
+            self._duplicates = []
+            self.save_mapping()
+        result['unchanged'] = len(self.mapping) - result['inserted'] - result['patched']
+        return result
+
+    def _new_batch(self):
+        if self.api_root:
+            from googleapiclient.http import BatchHttpRequest
+            return BatchHttpRequest(batch_uri=f"{self.api_root.rstrip('/')}/batch/calendar/v3")
+        return self.service.new_batch_http_request()
+
+    def _on_written(self, page_id, fingerprint):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                if is_gone(exception):
+                    # The event was removed in Calendar; forget it so the next sync recreates it.
+                    self.mapping.pop(page_id, None)
+                print(f"Calendar write failed for {page_id}: {exception}")
+                self._result['failed'] += 1
+                return
+            kind = 'patched' if page_id in self.mapping else 'inserted'
+            remote = remote_fingerprint(response)
+            self.mapping[page_id] = {'event_id': response['id'], 'fingerprint': fingerprint, 'remote': remote}
+            # Our own write comes back in the next incremental list; matching fingerprints mark it as ours.
+            self.events[response['id']] = {'page_id': page_id, 'fingerprint': remote}
+            self._result[kind] += 1
+        return callback
+
+    def _on_deleted(self, page_id, event_id):
+        def callback(request_id, response, exception):
+            if exception is not None and not is_gone(exception):
+                print(f"Calendar delete failed for {page_id}: {exception}")
+                self._result['failed'] += 1
+                return
+            if self.mapping.get(page_id, {}).get('event_id') == event_id:
+                del self.mapping[page_id]
+            self.events.pop(event_id, None)
+            self._result['deleted'] += 1
+        return callback
@@ -0,0 +1,8 @@
+from .base import ConditionalCache, SourceConnector, SourcePages, assignment_row, fetch_all
+from .csv_source import CsvConnector
+from .prairielearn import PrairieLearnConnector, prairielearn_courses
+
+# Names accepted by main.py's --platform.
+CONNECTORS = {
+    'prairielearn': PrairieLearnConnector,
+}
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.transport import get_transport
+
+
+class SourceConnector:
+    """
+    A place assignments come from.
+
+    fetch() returns rows in the shape CsvImporter uploads ('assignment', 'course', 'start date',
+    'end date', 'complete', 'grade', 'weightage', 'repeat weeks'). Rows from a platform also carry
+    a stable 'source id', so the Reconciler can find their page again after a rename or a
+    deadline change; CSV rows don't, and are matched on (name, course, due date) as before.
+    """
+    name = None
+
+    def fetch(self):
+        raise NotImplementedError
+
+
+def assignment_row(assignment, course, end_date, start_date=None, complete='', grade='', weightage='',
+                   repeat_weeks=1, source_id=None):
+    """A row as CsvImporter and the Reconciler read it; blank status, grade and weightage leave Notion's alone."""
+    return {
+        'assignment': assignment,
+        'course': course,
+        'start date': start_date,
+        'end date': end_date,
+        'complete': complete,
+        'grade': grade,
+        'weightage': weightage,
+        'repeat weeks': repeat_weeks,
+        'source id': source_id,
+    }
+
+
+def fetch_all(connectors, max_workers=4):
+    """
+    Fetch every connector concurrently and return (rows, failures), rows in connector order.
+
+    A source that fails is reported in `failures` (name -> error) rather than stopping the others.
+    """
+    def fetch(connector):
+        try:
+            return connector.fetch(), None
+        except Exception as e:
+            print(f"Fetching from {connector.name} failed: {str(e)}")
+            return [], str(e)
+
+    rows, failures = [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for connector, (fetched, error) in zip(connectors, pool.map(fetch, connectors)):
+            rows.extend(fetched)
+            if error is not None:
+                failures[connector.name] = error
+    return rows, failures
+
+
+class ConditionalCache:
+    """
+    ETag / Last-Modified validators and bodies of earlier GET responses, kept in a JSON file.
+
+    get() sends the stored validators, so a resource that hasn't changed comes back as a 304
+    with no body and the cached copy is used.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("CONNECTOR_CACHE_PATH", "connector_cache.json")
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self.not_modified = 0
+
+    def get(self, url, service, endpoint, headers=None):
+        """Return (body, changed); changed is False when the server answered 304."""
+        headers = dict(headers or {})
+        with self._lock:
+            cached = self._entries.get(url)
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        response = get_transport().request('GET', url, service=service, endpoint=endpoint, headers=headers)
+        if response.status_code == 304:
+            if cached is None:
+                # No validators were sent, so there is no body to fall back on.
+                raise ValueError(f"{endpoint} answered 304 Not Modified to an unconditional GET")
+            with self._lock:
+                cached['fetched_at'] = time.time()
+                self.not_modified += 1
+            return cached['body'], False
+        response.raise_for_status()
+        body = response.json()
+        with self._lock:
+            self._entries[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body': body,
+                'fetched_at': time.time(),
+            }
+        return body, True
+
+    def cached(self, url, max_age):
+        """The stored body for `url` if it was fetched or revalidated within `max_age` seconds."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or time.time() - entry.get('fetched_at', 0) > max_age:
+                return None
+            return entry['body']
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._entries)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+
+class SourcePages:
+    """Which Notion page each connector row was written to, by its 'source id', in a JSON file loaded on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages = None
+
+    def mapping(self):
+        with self._lock:
+            return dict(self._loaded())
+
+    def set(self, source_id, page_id):
+        with self._lock:
+            self._loaded()[source_id] = page_id
+
+    def save(self):
+        with self._lock:
+            if self._pages is None:
+                return
+            data = json.dumps(self._pages)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _loaded(self):
+        if self._pages is None:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self._pages = json.load(f)
+            else:
+                self._pages = {}
+        return self._pages
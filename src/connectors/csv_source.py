@@ -0,0 +1,17 @@
+from src.connectors.base import SourceConnector
+from src.csv_import import read_source_rows
+
+
+class CsvConnector(SourceConnector):
+    """A CSV file (or URL) in either layout csv_import reads; invalid rows come through as CsvRowError."""
+    name = 'csv'
+
+    def __init__(self, path):
+        self.path = path
+
+    def rows(self):
+        """The rows lazily, for an import that streams the file chunk by chunk."""
+        return read_source_rows(self.path)
+
+    def fetch(self):
+        return list(self.rows())
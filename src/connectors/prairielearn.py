@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.connectors.base import ConditionalCache, SourceConnector, assignment_row
+
+
+def prairielearn_courses(value=None):
+    """Course name -> course instance id, from PRAIRIELEARN_COURSES ("CS225:12345,CS374:6789")."""
+    value = value if value is not None else os.getenv("PRAIRIELEARN_COURSES", "")
+    courses = {}
+    for entry in value.split(','):
+        name, _, instance_id = entry.strip().rpartition(':')
+        if name and instance_id:
+            courses[name.strip()] = instance_id.strip()
+    return courses
+
+
+def deadline(rules):
+    """
+    (start, end) of an assessment's full-credit window open to everyone, or None.
+
+    Rules limited to particular students (uids) are extensions and don't set the class deadline.
+    """
+    open_rules = [
+        rule for rule in rules
+        if not rule.get('uids') and (rule.get('credit') or 0) >= 100 and rule.get('end_date')
+    ]
+    if not open_rules:
+        return None
+    last = max(open_rules, key=lambda rule: rule['end_date'])
+    return last.get('start_date'), last['end_date']
+
+
+class PrairieLearnConnector(SourceConnector):
+    """
+    Assessments and their deadlines from PrairieLearn's course instance API.
+
+    Courses are fetched concurrently. Every GET is conditional, and when a course's assessment
+    list comes back 304 its access rules are reused for up to `rules_max_age` seconds, so an
+    unchanged course costs one 304.
+    """
+    name = 'prairielearn'
+
+    def __init__(self, courses=None, token=None, base_url=None, cache=None, max_workers=4, rules_max_age=None):
+        self.courses = courses if courses is not None else prairielearn_courses()
+        self.token = token or os.getenv("PRAIRIELEARN_API_KEY")
+        self.base_url = (base_url or os.getenv("PRAIRIELEARN_URL", "https://us.prairielearn.com")).rstrip('/')
+        self.cache = cache or ConditionalCache()
+        self.max_workers = max_workers
+        self.rules_max_age = rules_max_age if rules_max_age is not None else float(
+            os.getenv("PRAIRIELEARN_RULES_MAX_AGE", "21600"))
+
+    def fetch(self):
+        if not self.courses:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            per_course = list(pool.map(lambda item: self.fetch_course(*item), self.courses.items()))
+        self.cache.save()
+        return [row for rows in per_course for row in rows]
+
+    def fetch_course(self, course, instance_id):
+        root = f"{self.base_url}/pl/api/v1/course_instances/{instance_id}/assessments"
+        assessments, changed = self._get(root, 'prairielearn.assessments')
+        rows = []
+        for assessment in assessments:
+            url = f"{root}/{assessment['assessment_id']}/assessment_access_rules"
+            rules = None if changed else self.cache.cached(url, self.rules_max_age)
+            if rules is None:
+                rules, _ = self._get(url, 'prairielearn.access_rules')
+            window = deadline(rules)
+            if window is None:
+                continue
+            start, end = window
+            label = assessment.get('assessment_label') or ''
+            title = assessment.get('title') or assessment.get('assessment_name') or ''
+            rows.append(assignment_row(
+                f"{label}: {title}" if label else title, course, end, start_date=start,
+                source_id=f"prairielearn:{instance_id}:{assessment['assessment_id']}",
+            ))
+        return rows
+
+    def _get(self, url, endpoint):
+        return self.cache.get(url, 'prairielearn', endpoint, headers={'Private-Token': self.token or ''})
@@ -0,0 +1,388 @@
+import codecs
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timezone
+
+from notion.notion_client import NotionAPIError
+from src.import_journal import idempotency_key
+from src.recurrence import horizon_end, rule_from_row
+from src.transport import get_transport
+
+CSV_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def normalize_date(value):
+    """Reduce CSV and Notion date strings to one comparable form (UTC, minute precision)."""
+    if not value:
+        return None
+    value = value.strip().replace(' ', 'T')
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if 'T' not in value:
+        return parsed.date().isoformat()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%dT%H:%M")
+
+
+def dedupe_key(assignment, course, end_date):
+    return (assignment.strip(), course.strip().lower(), normalize_date(end_date))
+
+
+def record_keys(record):
+    """The dedupe keys a stored assignment answers to, one per course."""
+    due = record.due.isoformat() if record.due else None
+    # Notion returns a date-only due date as midnight, so that could also be how a CSV named it.
+    date_only = record.due.date().isoformat() if record.due and record.due.time() == time() else None
+    for course in record.courses:
+        yield dedupe_key(record.name, course, due)
+        if date_only:
+            yield dedupe_key(record.name, course, date_only)
+
+
+class CsvRowError(ValueError):
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def _normalize_csv_date(value, field):
+    """Accept 'YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DD' or 'DD-MM-YYYY' and return the first or second form."""
+    for fmt, out in ((CSV_DATE_FORMAT, CSV_DATE_FORMAT), ("%Y-%m-%d", "%Y-%m-%d"), ("%d-%m-%Y", "%Y-%m-%d")):
+        try:
+            return datetime.strptime(value, fmt).strftime(out)
+        except ValueError:
+            continue
+    raise ValueError(f"invalid {field} '{value}'")
+
+
+def _validate_number(value, field):
+    if value and value != 'Not Started':
+        try:
+            float(value)
+        except ValueError:
+            raise ValueError(f"invalid {field} '{value}'")
+    return value
+
+
+def _assignments_row(cells):
+    """Name, Course, Start Date, End Date, Complete, Grade, Weightage, Repeat (Yes/No), Repeat Weeks."""
+    cells = cells + [''] * (9 - len(cells))
+    repeat_assignment = cells[7] or 'No'
+    return {
+        'assignment': cells[0],
+        'course': cells[1],
+        'start date': _normalize_csv_date(cells[2], 'start date') if cells[2] else None,
+        'end date': _normalize_csv_date(cells[3], 'end date'),
+        'complete': cells[4],
+        'grade': _validate_number(cells[5], 'grade'),
+        'weightage': _validate_number(cells[6], 'weightage'),
+        'repeat weeks': int(cells[8]) if repeat_assignment.lower() == 'yes' else 1,
+    }
+
+
+def _due_date_row(cells):
+    """The headerless data/a.csv layout: assignment, course, due date, status, grade, weightage."""
+    cells = cells + [''] * (6 - len(cells))
+    due_date = _normalize_csv_date(cells[2], 'due date')
+    return {
+        'assignment': cells[0],
+        'course': cells[1],
+        'start date': due_date,
+        'end date': due_date,
+        'complete': cells[3],
+        'grade': _validate_number(cells[4], 'grade'),
+        'weightage': _validate_number(cells[5], 'weightage'),
+        'repeat weeks': 1,
+    }
+
+
+def iter_csv_rows(lines):
+    """
+    Lazily parse CSV lines into normalized row dicts.
+
+    The layout is detected from the first row: a header starting with "Name" means the
+    data/assignments.csv layout, otherwise the headerless data/a.csv layout. Rows that fail
+    validation are yielded as CsvRowError instances so the caller can report them and go on.
+    """
+    reader = csv.reader(lines)
+    parse_row = None
+    for cells in reader:
+        cells = [cell.strip() for cell in cells]
+        if not any(cells):
+            continue
+        if parse_row is None:
+            if cells[0].lower() in ('name', 'assignment'):
+                parse_row = _assignments_row
+                continue
+            parse_row = _due_date_row
+        try:
+            if not cells[0] or len(cells) < 2 or not cells[1]:
+                raise ValueError("missing assignment name or course")
+            yield parse_row(cells)
+        except ValueError as e:
+            yield CsvRowError(reader.line_num, str(e))
+
+
+def iter_decoded_lines(byte_chunks, encoding='utf-8-sig'):
+    """Turn an iterable of byte chunks into text lines without holding more than one chunk."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in byte_chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def stream_url_chunks(url, chunk_size=64 * 1024):
+    response = get_transport().request('GET', url, service=None, endpoint='discord.attachment', stream=True)
+    response.raise_for_status()
+    try:
+        yield from response.iter_content(chunk_size)
+    finally:
+        response.close()
+
+
+def read_assignment_rows(filepath):
+    """Yield normalized rows from a CSV file in either supported layout."""
+    with open(filepath, mode='r', newline='', encoding='utf-8-sig') as file:
+        yield from iter_csv_rows(file)
+
+
+def read_source_rows(source):
+    """Rows from a local CSV path or an http(s) URL, such as a Discord attachment."""
+    if source.startswith(('http://', 'https://')):
+        return iter_csv_rows(iter_decoded_lines(stream_url_chunks(source)))
+    return read_assignment_rows(source)
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CsvImporter:
+    """
+    Uploads CSV rows to Notion after a single dedupe scan, through a bounded worker pool.
+
+    Rows can be fed all at once with run(), or chunk by chunk with start()/import_chunk()/finish()
+    so a large upload never holds more than one chunk. The shared transport's Notion token bucket
+    keeps the pool at Notion's ~3 requests/second.
+
+    A row that repeats weekly is stored as a recurrence rule on the tracker; only its occurrences
+    due within the horizon window get pages now, and the rest are created as the window rolls on.
+
+    Every page write goes through the tracker's import journal, so an import cut short by a crash
+    can be finished with resume() without re-sending what already reached Notion. `source` (a
+    file path or URL) is journaled so the rows never reached can be read again.
+    """
+
+    def __init__(self, tracker, max_workers=3, source=None):
+        self.tracker = tracker
+        self.max_workers = max_workers
+        self.source = source
+        self.import_id = None
+        # Whether any of this import's writes are in the journal, i.e. whether resume() has anything to finish.
+        self.planned = False
+        self.existing = None
+        self.summary = {
+            'rows': 0, 'uploaded': 0, 'duplicate': 0, 'failed': 0, 'invalid': 0, 'series': 0, 'scheduled': 0,
+        }
+        self.problems = []
+
+    def run(self, rows):
+        """Import `rows` and return one outcome dict per expanded row, in input order."""
+        self.start()
+        return self._import_all(rows)
+
+    def start(self):
+        self.tracker.fetch_assignments_from_notion(force=True)
+        self.existing = set(self.tracker.assignments_in_database)
+        self.import_id = self.tracker.journal.begin(self.source)
+
+    def resume(self, state):
+        """
+        Finish an interrupted import and return its outcomes, without scanning the whole database.
+
+        Writes journaled as committed are known to be in Notion. A write can also have landed
+        with the crash before its commit entry, so one query for pages edited since the import
+        began settles those. The rest of the source is then imported as usual; if it can't be
+        read any more, the journaled but unsent rows still are.
+        """
+        if not self.tracker.journal.claim(state.import_id):
+            return []
+        self.import_id = state.import_id
+        self.source = state.source
+        self.planned = bool(state.planned)
+        try:
+            rows = self._resume_rows(state)
+        except Exception:
+            self.abandon()
+            raise
+        return self._import_all(rows)
+
+    def _resume_rows(self, state):
+        if state.began_at:
+            for page in self.tracker.query_database_pages(
+                filter={'timestamp': 'last_edited_time', 'last_edited_time': {'on_or_after': state.began_at}}
+            ):
+                self.tracker.record_written_page(page)
+        self.existing = set(self.tracker.assignments_in_database)
+        self.existing.update(
+            dedupe_key(row['assignment'], row['course'], row['end date'])
+            for key, row in state.planned.items() if key in state.committed
+        )
+        rows = [dict(row, occurrence=tuple(row['occurrence'])) if 'occurrence' in row else row
+                for row in state.uncommitted().values()]
+        if self.source:
+            try:
+                rows = list(read_source_rows(self.source))
+            except Exception as e:
+                print(f"Could not re-read {self.source}, resuming the journaled rows only: {str(e)}")
+        return rows
+
+    def _import_all(self, rows):
+        outcomes = []
+        try:
+            for chunk in chunked(rows, 500):
+                outcomes.extend(self.import_chunk(chunk))
+        except Exception:
+            self.abandon()
+            raise
+        self.finish()
+        return outcomes
+
+    def abandon(self):
+        """Stop without finishing; the journal keeps the import for resume() if it planned any writes."""
+        self.tracker.recurrences.save()
+        if self.import_id is None:
+            return
+        if self.planned:
+            self.tracker.journal.release(self.import_id)
+        else:
+            self.tracker.journal.end(self.import_id)
+
+    def finish(self):
+        self.tracker.recurrences.save()
+        self.tracker.journal.end(self.import_id)
+        if self.summary['uploaded']:
+            self.tracker.invalidate_snapshot()
+
+    def expand_rows(self, rows):
+        """
+        Turn each repeating row into a recurrence rule and yield its occurrences due within the horizon.
+
+        A repeating row with none to create now is yielded once, with the outcome it gets in
+        'series_status': 'duplicate' if every occurrence already has a page, else 'scheduled'.
+        Rows that failed to parse are passed through in place.
+        """
+        last_day = horizon_end()
+        for row in rows:
+            if isinstance(row, CsvRowError) or row.get('repeat weeks', 1) <= 1:
+                yield row
+                continue
+            rule = rule_from_row(row)
+            self.tracker.recurrences.put(rule)
+            remaining = [i for i in rule.indices_between(None, rule.due_day(rule.count - 1)) if i not in rule.materialized]
+            due_now = [index for index in remaining if rule.due_day(index) <= last_day]
+            self.summary['series'] += 1
+            self.summary['scheduled'] += len(remaining) - len(due_now)
+            if not due_now:
+                yield dict(row, series_status='scheduled' if remaining else 'duplicate')
+            for index in due_now:
+                yield rule.occurrence(index)
+
+    def import_chunk(self, rows):
+        outcomes = []
+        pending = []
+        for row in self.expand_rows(rows):
+            if isinstance(row, CsvRowError):
+                outcomes.append({
+                    'assignment': None,
+                    'course': None,
+                    'end date': None,
+                    'status': 'invalid',
+                    'status_code': None,
+                    'error': str(row),
+                })
+                continue
+            outcome = {
+                'assignment': row['assignment'],
+                'course': row['course'],
+                'end date': row['end date'],
+                'status': 'pending',
+                'status_code': None,
+                'error': None,
+            }
+            outcomes.append(outcome)
+            if 'series_status' in row:
+                outcome['status'] = row['series_status']
+                continue
+            key = dedupe_key(row['assignment'], row['course'], row['end date'])
+            if key in self.existing:
+                outcome['status'] = 'duplicate'
+                if 'occurrence' in row:
+                    self.tracker.recurrences.mark_materialized(*row['occurrence'], None)
+                continue
+            self.existing.add(key)
+            pending.append((row, outcome, idempotency_key(key)))
+
+        if pending:
+            self.tracker.journal.plan(self.import_id, [(write_key, row) for row, _, write_key in pending])
+            self.planned = True
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                list(pool.map(lambda item: self._upload(*item), pending))
+
+        for outcome in outcomes:
+            self.summary['rows'] += 1
+            # A 'scheduled' series row's occurrences were counted as it was expanded.
+            if outcome['status'] != 'scheduled':
+                self.summary[outcome['status']] += 1
+            if outcome['status'] in ('failed', 'invalid') and len(self.problems) < 20:
+                self.problems.append(outcome)
+        return outcomes
+
+    def _upload(self, row, outcome, write_key):
+        payload = self.tracker.generate_payload(
+            row['assignment'], row['course'], row['start date'], row['end date'],
+            row['complete'], row['grade'], row['weightage']
+        )
+        try:
+            page = self.tracker.notion.create_page(payload)
+        except NotionAPIError as e:
+            outcome['status'] = 'failed'
+            outcome['status_code'] = e.status_code
+            outcome['error'] = e.body
+            print("Error:", e.status_code, e.body)
+            self.tracker.journal.fail(self.import_id, write_key, e.status_code)
+            return
+        except Exception as e:
+            outcome['status'] = 'failed'
+            outcome['error'] = str(e)
+            print(f"Exception occurred while uploading row: {str(e)}")
+            self.tracker.journal.fail(self.import_id, write_key)
+            return
+
+        self.tracker.journal.commit(self.import_id, write_key, page['id'])
+        self.tracker.record_written_page(page)
+        if 'occurrence' in row:
+            self.tracker.recurrences.mark_materialized(*row['occurrence'], page['id'])
+        outcome['status'] = 'uploaded'
+        outcome['status_code'] = 200
+        print(f"{row['assignment']} successfully uploaded to Notion")
+        self.tracker.send_discord_notification(
+            f"Assignment Uploaded: {row['assignment']} - {row['course']}, Date: {row['end date']}, "
+            f"Grade: {row['grade']}, Weightage: {row['weightage']}"
+        )
@@ -1,87 +1,275 @@
-from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
+from datetime import date, datetime, timedelta
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 from src.assignment_tracker import AssignmentTracker
-from utils import parse_date
+from notion.notion_client import NotionAPIError, NotionClient
+from src.async_io import LoopLagMonitor, run_blocking, shutdown_executor
+from src.calendar_sync import CalendarSync
+from src.csv_import import CsvImporter, chunked, iter_csv_rows, iter_decoded_lines, stream_url_chunks
+from src.notifications import close_all as close_notifications
+from src.query_planner import AssignmentQuery, run_query
+from src.push_receiver import PushReceiver, normalize_id
+from src.reconcile import Reconciler
+from src.recurrence import horizon_end, rule_key
+from src.reminders import ReminderScheduler, reminder_message
+from src.tenants import TenantPool, TenantRegistry, guild_key, user_key
+from src.transport import get_transport
+from src import metrics
+import asyncio
 import os
-import pickle
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from notion.notion_client import Client
-
-SCOPES = ['https://www.googleapis.com/auth/calendar']
-
-def authenticate_google_account():
-    creds = None
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                'credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
+import threading
+import time
 
-    return build('calendar', 'v3', credentials=creds)
+CSV_CHUNK_SIZE = 200
 
 
-def add_to_google_calendar(assignment):
-    service = authenticate_google_account()
+def format_date(due):
+    return due.strftime("%d %b %Y") if due is not None else "No due date available"
 
-    # Use your local timezone explicitly here:
-    local_tz_name = "America/Los_Angeles"  
-    local_tz = ZoneInfo(local_tz_name)
-    
-    start_date = datetime.fromisoformat(assignment['start date']['start']).replace(tzinfo=timezone.utc).astimezone(local_tz)
-    end_date = datetime.fromisoformat(assignment['due date']['start']).replace(tzinfo=timezone.utc).astimezone(local_tz)
-
-    event = {
-        'summary': f"{assignment['assignment']} - {assignment['course'][0]['name']}",
-        'description': f"Grade: {assignment['grade']}, Weightage: {assignment['weightage']}",
-        'start': {
-            'dateTime': start_date.isoformat(),
-            'timeZone': local_tz_name,
-        },
-        'end': {
-            'dateTime': end_date.isoformat(),
-            'timeZone': local_tz_name,
-        },
-    }
 
-    try:
-        event = service.events().insert(calendarId='primary', body=event).execute()
-        print(f"Event created: {event.get('htmlLink')}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+def format_courses(assignment):
+    return ', '.join(assignment.courses)
 
 
-def format_date(date_str):
-    try:
-        return datetime.fromisoformat(date_str).strftime("%d %b %Y")
-    except ValueError:
-        return "Invalid date"
+def mark_stale(embed, tracker):
+    if tracker.stale:
+        embed.set_footer(text="Notion is unreachable; showing the last synced assignments.")
+    return embed
     
 intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
-tracker = AssignmentTracker()
 load_dotenv()
-NOTION_TOKEN = os.getenv('API_KEY')
-NOTION_DATABASE_ID = os.getenv('DATABASE_ID')
+loop_monitor = LoopLagMonitor()
+tenant_registry = TenantRegistry()
+tenants = TenantPool(tenant_registry)
+
+
+def tenant_keys(ctx):
+    keys = []
+    guild = getattr(ctx, 'guild', None)
+    if guild is not None:
+        keys.append(guild_key(guild.id))
+    author = getattr(ctx, 'author', None)
+    if author is not None:
+        keys.append(user_key(author.id))
+    return keys
+
+
+# Built on first use rather than at import, so the bot logs in without waiting on disk or Notion.
+default_tracker = None
+_default_tracker_lock = threading.Lock()
+calendar_sync = None
+startup_csv = None
+_background_started = False
+
+
+def get_default_tracker():
+    """The .env-configured tracker; building it warm-starts from disk, so call it off the event loop."""
+    global default_tracker
+    with _default_tracker_lock:
+        if default_tracker is None:
+            default_tracker = AssignmentTracker()
+        return default_tracker
+
+
+def get_calendar_sync():
+    global calendar_sync
+    if calendar_sync is None:
+        calendar_sync = CalendarSync()
+    return calendar_sync
+
+
+async def tracker_for(ctx):
+    """The tracker for the guild (else the user) a command came from; unregistered callers get the default one."""
+    for key in tenant_keys(ctx):
+        if key in tenant_registry:
+            return await run_blocking(tenants.get, key)
+    return await run_blocking(get_default_tracker)
+
+
+def may_archive(ctx):
+    """
+    Whether the author may archive pages in the database their commands use, which could empty it:
+    the bot owner anywhere, a user in a database they registered themselves, and a server's
+    administrators in the database registered for that server.
+    """
+    owner_id = os.getenv("OWNER_ID")
+    if owner_id and ctx.author.id == int(owner_id):
+        return True
+    key = next((key for key in tenant_keys(ctx) if key in tenant_registry), None)
+    if key is None:
+        return False  # the default database belongs to the bot's owner
+    if key == user_key(ctx.author.id):
+        return True
+    return ctx.guild is not None and ctx.author.guild_permissions.administrator
+
+
+async def evict_idle_tenants():
+    while True:
+        await asyncio.sleep(60)
+        tenants.evict_idle()
+
+
+async def send_reminder(record, offset):
+    channel = bot.get_channel(int(os.getenv("REMINDER_CHANNEL_ID")))
+    if channel is not None:
+        await channel.send(reminder_message(record, offset))
+
+
+reminders = ReminderScheduler(send_reminder)
+
+
+async def refresh_assignments(tracker):
+    # Keeps the reminder heap current when nobody runs a command; each pass is a delta query.
+    interval = float(os.getenv("REMINDER_REFRESH_INTERVAL", "900"))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_blocking(tracker.fetch_assignments_from_notion)
+        except Exception as e:
+            print(f"Background refresh failed: {str(e)}")
+
+
+async def start_reminders():
+    tracker = await run_blocking(get_default_tracker)
+    try:
+        await run_blocking(tracker.fetch_assignments_from_notion)
+    except Exception as e:
+        print(f"Could not load assignments for reminders: {str(e)}")
+    reminders.start(tracker)
+    bot.loop.create_task(refresh_assignments(tracker))
+    print(f"Scheduled reminders for {len(reminders)} upcoming deadlines")
+
+
+async def materialize_recurrences():
+    # Rolls the recurrence window forward for the default database and every registered tenant:
+    # occurrences get their Notion page once they are near.
+    interval = float(os.getenv("RECURRENCE_CHECK_INTERVAL", "21600"))
+    while True:
+        try:
+            trackers = [await run_blocking(get_default_tracker)]
+            trackers += await run_blocking(tenants.with_due_recurrences, horizon_end())
+        except Exception as e:
+            print(f"Recurring assignment update failed: {str(e)}")
+            trackers = []
+        for tracker in trackers:
+            try:
+                outcomes = await run_blocking(tracker.materialize_recurrences)
+            except Exception as e:
+                print(f"Recurring assignment update for {tracker.database_id} failed: {str(e)}")
+                continue
+            if outcomes:
+                uploaded = sum(1 for o in outcomes if o['status'] == 'uploaded')
+                print(f"Added {uploaded} recurring assignments to Notion for {tracker.database_id}")
+        await asyncio.sleep(interval)
+
+
+async def resume_interrupted_imports():
+    try:
+        tracker = await run_blocking(get_default_tracker)
+        outcomes = await run_blocking(tracker.resume_imports)
+    except Exception as e:
+        print(f"Resuming interrupted imports failed: {str(e)}")
+        return
+    if outcomes:
+        uploaded = sum(1 for o in outcomes if o['status'] == 'uploaded')
+        print(f"Resumed interrupted imports: {uploaded} more assignments uploaded")
+
+
+async def import_startup_csv(path):
+    try:
+        tracker = await run_blocking(get_default_tracker)
+        outcomes = await run_blocking(tracker.read_csv, path)
+    except Exception as e:
+        print(f"Startup import of {path} failed: {str(e)}")
+        return
+    uploaded = sum(1 for o in outcomes if o['status'] == 'uploaded')
+    print(f"Startup import of {path}: {uploaded} of {len(outcomes)} rows uploaded")
+
+
+def trackers_for_database(database_id):
+    # Only loaded trackers: a tenant that isn't in memory catches up with a delta sync when next used.
+    loaded = tenants.loaded() + ([default_tracker] if default_tracker is not None else [])
+    return [tracker for tracker in loaded if normalize_id(tracker.database_id) == database_id]
+
+
+async def resync_calendar_on_push(changed):
+    while True:
+        await changed.wait()
+        # Google pushes one notification per edited event; let a burst settle into one sync.
+        await asyncio.sleep(float(os.getenv("CALENDAR_PUSH_DEBOUNCE", "10")))
+        changed.clear()
+        try:
+            tracker = await run_blocking(get_default_tracker)
+            store = await run_blocking(tracker.fetch_assignments_from_notion)
+            await run_blocking(get_calendar_sync().sync, list(store))
+        except Exception as e:
+            print(f"Calendar resync after a push notification failed: {str(e)}")
+
+
+async def watch_calendar(receiver, address):
+    # Google expires watch channels; open a new one a day before the current one lapses.
+    ttl = 7 * 24 * 3600
+    while True:
+        try:
+            channel_id = await run_blocking(get_calendar_sync().watch, address, receiver.calendar_token, ttl)
+            receiver.calendar_channels.add(channel_id)
+        except Exception as e:
+            print(f"Could not watch Google Calendar for changes: {str(e)}")
+        await asyncio.sleep(ttl - 24 * 3600)
+
+
+async def start_push_receiver():
+    changed = asyncio.Event()
+    receiver = PushReceiver(
+        trackers_for_database,
+        on_calendar_change=lambda: bot.loop.call_soon_threadsafe(changed.set),
+    )
+    await run_blocking(receiver.start)
+    address = os.getenv("CALENDAR_PUSH_URL")
+    if address and receiver.calendar_token:
+        bot.loop.create_task(watch_calendar(receiver, address))
+        bot.loop.create_task(resync_calendar_on_push(changed))
+
+
+async def startup_imports():
+    # Resume first, so the startup CSV doesn't race the import it may have been in the middle of.
+    await resume_interrupted_imports()
+    if startup_csv:
+        await import_startup_csv(startup_csv)
 
-notion = Client(auth=NOTION_TOKEN)
 
 @bot.event
 async def on_ready():
+    global _background_started
     print(f'Logged in as {bot.user}')
+    # on_ready fires again after every reconnect; the background work starts once.
+    if _background_started:
+        return
+    _background_started = True
+    loop_monitor.start()
+    metrics.start_http_server()
+    bot.loop.create_task(evict_idle_tenants())
+    bot.loop.create_task(materialize_recurrences())
+    if os.getenv("PUSH_RECEIVER_PORT"):
+        bot.loop.create_task(start_push_receiver())
+    if os.getenv("REMINDER_CHANNEL_ID"):
+        bot.loop.create_task(start_reminders())
+    bot.loop.create_task(startup_imports())
+
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.command_started = time.perf_counter()
+
+
+@bot.after_invoke
+async def record_command_latency(ctx):
+    started = getattr(ctx, 'command_started', None)
+    if started is not None:
+        metrics.observe('notionize_command_seconds', time.perf_counter() - started, command=ctx.command.name)
 
 @bot.command()
 async def menu(ctx):
@@ -94,94 +282,93 @@ async def menu(ctx):
     embed.add_field(name="!exam_in <course>", value="Shows exams for a specific course", inline=False)
     embed.add_field(name="!remaining", value="Displays all incomplete assignments", inline=False)
     embed.add_field(name="!course_grade <course>", value="Displays grades for a course, including assignments, weightages, and final score", inline=False)
+    embed.add_field(name="!grades", value="Shows the score so far and projected range for every course", inline=False)
     embed.add_field(name="!weekly_todo", value="Displays a weekly to-do list of assignments grouped by day", inline=False)
     embed.add_field(name="!upload_csv", value="Uploads assignments from a CSV file to Notion database", inline=False)
+    embed.add_field(name="!resume_import", value="Finishes a CSV upload that was interrupted", inline=False)
+    embed.add_field(name="!reconcile_csv [archive]", value="Previews and applies only the changes a re-imported CSV makes (archive, owner or server admins only: also remove rows missing from it)", inline=False)
+    embed.add_field(name="!recurring", value="Lists recurring assignments and when each is next due", inline=False)
+    embed.add_field(name="!skip_week <date> <course> <name>", value="Skips one week of a recurring assignment, owner or server admins only (date: YYYY-MM-DD)", inline=False)
     embed.add_field(name="!sync_calendar", value="Syncs Notion assignments with Google Calendar", inline=False)
+    embed.add_field(name="!register <token> <database_id>", value="Use your own Notion database (send in a DM)", inline=False)
+    embed.add_field(name="!register_guild <server_id> <token> <database_id>", value="Use a Notion database for a whole server (admins, in a DM)", inline=False)
+    embed.add_field(name="!unregister", value="Go back to the default database (admins, for a server)", inline=False)
+    embed.add_field(name="!stats", value="Shows command latency, API call and cache statistics (owner-only)", inline=False)
     embed.add_field(name="!shutdown", value="Shuts down the bot (owner-only)", inline=False)
     await ctx.send(embed=embed)
 
 
 @bot.command()
 async def due_in(ctx, *, course):
-    tracker.fetch_assignments_from_notion()
-    assignments = [a for a in tracker.assignments if any(c['name'].lower() == course.lower() for c in a['course'])]
+    tracker = await tracker_for(ctx)
+    assignments = await run_blocking(run_query, tracker, AssignmentQuery(course=course))
     
     if assignments:
         embed = discord.Embed(title=f"Assignments in {course}", color=discord.Color.blue())
         for assignment in assignments:
-            grade_info = f"Grade: {assignment['grade']}" if assignment.get('grade') is not None else ""
-            weightage_info = f"Weightage: {assignment['weightage']}" if assignment.get('weightage') is not None else ""
-            if 'due date' in assignment:
-                due_date_str = assignment['due date']['start']
-                try:
-                    due_date = datetime.fromisoformat(due_date_str).strftime("%d %b %Y")
-                except ValueError:
-                    due_date = "Invalid date"
-            else:
-                due_date = "No due date available"
+            grade_info = f"Grade: {assignment.grade}" if assignment.grade is not None else ""
+            weightage_info = f"Weightage: {assignment.weightage}" if assignment.weightage is not None else ""
             embed.add_field(
-                name=assignment['assignment'],
-                value=f"Due on: {due_date}\n{grade_info}\n{weightage_info}",
+                name=assignment.name,
+                value=f"Due on: {format_date(assignment.due)}\n{grade_info}\n{weightage_info}",
                 inline=False
             )
         
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send(f"No assignments found for {course}.")
 
 
 @bot.command()
 async def exam_in(ctx, *, course):
-    tracker.fetch_assignments_from_notion()
-    exams = [a for a in tracker.assignments if any(c['name'].lower() == course.lower() for c in a['course']) and 'exam' in a['assignment'].lower()]
+    tracker = await tracker_for(ctx)
+    exams = await run_blocking(run_query, tracker, AssignmentQuery(course=course, title_contains='exam'))
     if exams:
         for exam in exams:
-            grade_info = f", Grade: {exam['grade']}" if exam.get('grade') is not None else ""
-            weightage_info = f", Weightage: {exam.get('weightage')}" if exam.get('weightage') is not None else ""
-            due_date = format_date(exam['due date']['start']) if 'due date' in exam else "No due date available"
-            await ctx.send(f"Exam in {course}: {exam['assignment']} on {due_date}{grade_info}{weightage_info}")
+            grade_info = f", Grade: {exam.grade}" if exam.grade is not None else ""
+            weightage_info = f", Weightage: {exam.weightage}" if exam.weightage is not None else ""
+            await ctx.send(f"Exam in {course}: {exam.name} on {format_date(exam.due)}{grade_info}{weightage_info}")
     else:
         await ctx.send(f"No exams found for {course}.")
 
 # Remaining assignments command
 @bot.command()
 async def remaining(ctx):
-    tracker.fetch_assignments_from_notion()
-    assignments = [a for a in tracker.assignments if a['complete'] != 'Completed']
+    tracker = await tracker_for(ctx)
+    assignments = await run_blocking(run_query, tracker, AssignmentQuery(incomplete=True))
     if assignments:
         embed = discord.Embed(title="Remaining Assignments", color=discord.Color.red())
         for assignment in assignments:
-            grade_info = f"Grade: {assignment.get('grade')}" if assignment.get('grade') is not None else ""
-            weightage_info = f"Weightage: {assignment.get('weightage')}" if assignment.get('weightage') is not None else ""
-            due_date = format_date(assignment['due date']['start']) if 'due date' in assignment else "No due date available"
+            grade_info = f"Grade: {assignment.grade}" if assignment.grade is not None else ""
+            weightage_info = f"Weightage: {assignment.weightage}" if assignment.weightage is not None else ""
             
             embed.add_field(
-                name=assignment['assignment'],
-                value=f"Course: {', '.join([course['name'] for course in assignment['course']])}\nDue: {due_date}\n{grade_info}\n{weightage_info}",
+                name=assignment.name,
+                value=f"Course: {format_courses(assignment)}\nDue: {format_date(assignment.due)}\n{grade_info}\n{weightage_info}",
                 inline=False
             )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send("All assignments are completed.")
 
 # Due today command
 @bot.command()
 async def due_today(ctx):
-    tracker.fetch_assignments_from_notion()
-    assignments = tracker.get_due_today()
+    tracker = await tracker_for(ctx)
+    today = datetime.now().date()
+    assignments = await run_blocking(run_query, tracker, AssignmentQuery(due_from=today, due_to=today))
     if assignments:
         embed = discord.Embed(title="Assignments Due Today", color=discord.Color.blue())
         for assignment in assignments:
-            grade_info = f"Grade: {assignment.get('grade')}" if assignment.get('grade') is not None else ""
-            weightage_info = f"Weightage: {assignment.get('weightage')}" if assignment.get('weightage') is not None else ""
-            due_date = format_date(assignment['due date']['start']) if 'due date' in assignment else "No due date available"
+            grade_info = f"Grade: {assignment.grade}" if assignment.grade is not None else ""
+            weightage_info = f"Weightage: {assignment.weightage}" if assignment.weightage is not None else ""
             
             embed.add_field(
-                name=assignment['assignment'],
-                value=f"Course: {', '.join([course['name'] for course in assignment['course']])}\nDue: {due_date}\n{grade_info}\n{weightage_info}",
+                name=assignment.name,
+                value=f"Course: {format_courses(assignment)}\nDue: {format_date(assignment.due)}\n{grade_info}\n{weightage_info}",
                 inline=False
             )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send("No assignments are due today.")
 
@@ -190,10 +377,56 @@ async def due_today(ctx):
 async def shutdown(ctx):
     if ctx.author.id == int(os.getenv("OWNER_ID")):
         await ctx.send("Shutting down the bot.")
+        loop_monitor.stop()
+        reminders.stop()
+        metrics.stop_http_server()
         await bot.close()
+        await run_blocking(close_notifications)
+        shutdown_executor(wait=False)
     else:
         await ctx.send("You do not have permission to shut down the bot.")
 
+@bot.command()
+async def stats(ctx):
+    if ctx.author.id != int(os.getenv("OWNER_ID")):
+        await ctx.send("You do not have permission to view bot statistics.")
+        return
+
+    embed = discord.Embed(title="Bot Statistics", color=discord.Color.dark_grey())
+    if metrics.ENABLED:
+        commands_ = sorted(metrics.histograms('notionize_command_seconds').items())
+        lines = [
+            f"{dict(labels)['command']}: {h.count} calls, avg {h.total / h.count * 1000:.0f} ms, p95 ≤ {h.quantile(0.95) * 1000:.0f} ms"
+            for labels, h in commands_
+        ]
+        embed.add_field(name="Commands", value="\n".join(lines) or "No commands yet", inline=False)
+
+        cache = {dict(labels)['result']: value for labels, value in metrics.counter_values('notionize_snapshot_requests_total').items()}
+        lookups = cache.get('hit', 0) + cache.get('miss', 0) + cache.get('joined', 0)
+        ratio = f"{cache.get('hit', 0) / lookups:.0%}" if lookups else "N/A"
+        embed.add_field(
+            name="Snapshot cache",
+            value=f"{lookups} lookups, hit ratio {ratio}, {cache.get('joined', 0)} joined an in-flight refresh",
+            inline=False,
+        )
+    else:
+        embed.add_field(name="Commands", value="Metrics disabled (set METRICS_ENABLED=1)", inline=False)
+
+    endpoints = get_transport().endpoint_stats()
+    lines = [
+        f"{endpoint}: {s['calls']} calls, {s['errors']} errors, avg {s['avg_seconds'] * 1000:.0f} ms, "
+        f"rate-limit wait {s['rate_limit_wait']:.1f} s, retry backoff {s['retry_wait']:.1f} s"
+        for endpoint, s in sorted(endpoints.items())
+    ]
+    embed.add_field(name="API calls", value="\n".join(lines)[:1024] or "No API calls yet", inline=False)
+    embed.add_field(
+        name="Tenants",
+        value=f"{len(tenant_registry)} registered, {len(tenants)} loaded (limit {tenants.max_tenants}), "
+              f"{tenants.evictions} evicted",
+        inline=False,
+    )
+    await ctx.send(embed=embed)
+
 @bot.command()
 async def upload_csv(ctx):
     if not ctx.message.attachments:
@@ -203,147 +436,413 @@ async def upload_csv(ctx):
     if not attachment.filename.endswith('.csv'):
         await ctx.send("Please upload a CSV file.")
         return
-    csv_content = await attachment.read()
-    csv_path = 'temp_assignments.csv'
-    with open(csv_path, 'wb') as f:
-        f.write(csv_content)
+    tracker = await tracker_for(ctx)
+    progress = await ctx.send(f"Importing {attachment.filename}...")
+    importer = CsvImporter(tracker, source=attachment.url)
     try:
-        responses = tracker.read_csv(csv_path)
-        success_count = responses.count(200)
-        await ctx.send(f"CSV uploaded successfully. {success_count} assignments added to Notion.")
+        await run_blocking(importer.start)
+        chunks = chunked(iter_csv_rows(iter_decoded_lines(stream_url_chunks(attachment.url))), CSV_CHUNK_SIZE)
+        while True:
+            chunk = await run_blocking(next, chunks, None)
+            if chunk is None:
+                break
+            await run_blocking(importer.import_chunk, chunk)
+            await progress.edit(content=f"Importing {attachment.filename}... {importer.summary['rows']} rows processed.")
+        await run_blocking(importer.finish)
+    except Exception as e:
+        await run_blocking(importer.abandon)
+        message = f"An error occurred while processing the CSV: {str(e)}"
+        if importer.planned:
+            message += " Run !resume_import to finish it."
+        await ctx.send(message)
+        return
+
+    summary = importer.summary
+    message = (
+        f"CSV uploaded successfully. {summary['uploaded']} assignments added to Notion, "
+        f"{summary['duplicate']} duplicates skipped."
+    )
+    if summary['duplicate']:
+        message += " Use !reconcile_csv to apply edits to rows that already exist."
+    if summary['series']:
+        message += (
+            f"\n{summary['series']} repeating assignments saved as recurring; "
+            f"{summary['scheduled']} later occurrences will be added as they come within "
+            f"{os.getenv('RECURRENCE_HORIZON_DAYS', '14')} days."
+        )
+    if summary['failed'] or summary['invalid']:
+        message += f"\n{summary['failed']} failed, {summary['invalid']} invalid: " + ", ".join(
+            o['error'][:80] if o['status'] == 'invalid' else f"{o['assignment']} ({o['status_code'] or o['error'][:80]})"
+            for o in importer.problems[:10]
+        )
+    await ctx.send(message)
+
+
+@bot.command()
+async def resume_import(ctx):
+    tracker = await tracker_for(ctx)
+    if not await run_blocking(tracker.journal.unfinished):
+        await ctx.send("No interrupted imports to resume.")
+        return
+    await ctx.send("Resuming the interrupted import...")
+    try:
+        outcomes = await run_blocking(tracker.resume_imports)
+    except Exception as e:
+        await ctx.send(f"An error occurred while resuming the import: {str(e)}")
+        return
+    counts = {status: sum(1 for o in outcomes if o['status'] == status) for status in ('uploaded', 'failed')}
+    await ctx.send(f"Import resumed: {counts['uploaded']} more assignments added to Notion, {counts['failed']} failed.")
+
+
+def describe_plan(plan):
+    embed = discord.Embed(title="Re-import Preview", color=discord.Color.orange())
+    embed.add_field(
+        name="Summary",
+        value=f"{len(plan.creates)} to create, {len(plan.updates)} to update, {len(plan.archives)} to archive, "
+              f"{plan.unchanged} unchanged" + (f", {len(plan.invalid)} invalid rows" if plan.invalid else ""),
+        inline=False
+    )
+    lines = (
+        [f"➕ {row['assignment']} ({row['course']}, due {row['end date']})" for row in plan.creates]
+        + [f"✏️ {record.name}: {', '.join(fields)}" for record, _, fields in plan.updates]
+        + [f"🗑️ {record.name} ({format_courses(record)})" for record in plan.archives]
+    )
+    if lines:
+        shown = "\n".join(lines[:15])
+        if len(lines) > 15:
+            shown += f"\n...and {len(lines) - 15} more"
+        embed.add_field(name="Changes", value=shown[:1024], inline=False)
+    return embed
+
+
+@bot.command()
+async def reconcile_csv(ctx, mode: str = ''):
+    archive = mode.lower() == 'archive'
+    if archive and not may_archive(ctx):
+        await ctx.send("Only the bot owner or this server's administrators can archive pages with `!reconcile_csv archive`.")
+        return
+    tracker = await tracker_for(ctx)
+    if not ctx.message.attachments or not ctx.message.attachments[0].filename.endswith('.csv'):
+        await ctx.send("Please attach a CSV file to re-import.")
+        return
+    attachment = ctx.message.attachments[0]
+    reconciler = Reconciler(tracker)
+    try:
+        # The diff needs every row (to know what is missing), so the sheet is read whole.
+        rows = await run_blocking(lambda: list(iter_csv_rows(iter_decoded_lines(stream_url_chunks(attachment.url)))))
+        plan = await run_blocking(reconciler.plan, rows, archive)
     except Exception as e:
         await ctx.send(f"An error occurred while processing the CSV: {str(e)}")
-    finally:
-        os.remove(csv_path)
+        return
+
+    preview = await ctx.send(embed=describe_plan(plan))
+    if not plan.writes:
+        await ctx.send("Notion already matches this CSV; nothing to do.")
+        return
+    await preview.add_reaction("✅")
+    await preview.add_reaction("❌")
+
+    def confirmed(reaction, user):
+        return user == ctx.author and reaction.message.id == preview.id and str(reaction.emoji) in ("✅", "❌")
+
+    try:
+        reaction, _ = await bot.wait_for('reaction_add', timeout=120, check=confirmed)
+    except asyncio.TimeoutError:
+        await ctx.send("No confirmation received; nothing was changed.")
+        return
+    if str(reaction.emoji) != "✅":
+        await ctx.send("Cancelled; nothing was changed.")
+        return
+
+    summary = await run_blocking(reconciler.apply, plan)
+    message = (
+        f"Re-import applied with {plan.writes - summary['failed']} writes: {summary['created']} created, "
+        f"{summary['updated']} updated, {summary['archived']} archived."
+    )
+    if summary['failed']:
+        message += f"\n{summary['failed']} failed: " + ", ".join(p[:80] for p in reconciler.problems[:5])
+    await ctx.send(message)
 
 
 @bot.command()
 async def due_on(ctx, date_str: str):
+    tracker = await tracker_for(ctx)
     try:
         due_date = datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
         await ctx.send("Invalid date format. Please use YYYY-MM-DD.")
         return
 
-    tracker.fetch_assignments_from_notion()
-    assignments = [a for a in tracker.assignments if parse_date(a['due date']['start']) == due_date]
+    assignments = await run_blocking(run_query, tracker, AssignmentQuery(due_from=due_date, due_to=due_date))
 
     if assignments:
         embed = discord.Embed(title=f"Assignments Due on {date_str}", color=discord.Color.blue())
         for assignment in assignments:
             embed.add_field(
-                name=assignment['assignment'],
-                value=f"Course: {', '.join([course['name'] for course in assignment['course']])}\n"
-                      f"Grade: {assignment.get('grade', 'N/A')}\n"
-                      f"Weightage: {assignment.get('weightage', 'N/A')}",
+                name=assignment.name,
+                value=f"Course: {format_courses(assignment)}\n"
+                      f"Grade: {assignment.grade if assignment.grade is not None else 'N/A'}\n"
+                      f"Weightage: {assignment.weightage if assignment.weightage is not None else 'N/A'}",
                 inline=False
             )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send(f"No assignments due on {date_str}.")
 
 @bot.command()
 async def due_this_week(ctx):
-    tracker.fetch_assignments_from_notion()
-    assignments = tracker.get_due_this_week()
+    tracker = await tracker_for(ctx)
+    start_of_week = datetime.now().date() - timedelta(days=datetime.now().weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+    assignments = await run_blocking(run_query, tracker, AssignmentQuery(due_from=start_of_week, due_to=end_of_week))
     
     if assignments:
         embed = discord.Embed(title="Assignments Due This Week", color=discord.Color.green())
         
         for assignment in assignments:
-            due_date = format_date(assignment['due date']['start']) if 'due date' in assignment else "No due date available"
             embed.add_field(
-                name=assignment['assignment'],
-                value=f"Course: {', '.join([course['name'] for course in assignment['course']])}\n"
-                      f"Due: {due_date}\n"  # Formatted due date
-                      f"Grade: {assignment.get('grade', 'N/A')}\n"
-                      f"Weightage: {assignment.get('weightage', 'N/A')}",
+                name=assignment.name,
+                value=f"Course: {format_courses(assignment)}\n"
+                      f"Due: {format_date(assignment.due)}\n"  # Formatted due date
+                      f"Grade: {assignment.grade if assignment.grade is not None else 'N/A'}\n"
+                      f"Weightage: {assignment.weightage if assignment.weightage is not None else 'N/A'}",
                 inline=False
             )
         
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send("No assignments are due this week.")
 
 
 @bot.command()
 async def weekly_todo(ctx):
-    tracker.fetch_assignments_from_notion()
+    tracker = await tracker_for(ctx)
     today = datetime.now().date()
     end_of_week = today + timedelta(days=6)
 
-    print("End of week:", end_of_week)
-    print("First due date:", tracker.assignments[0]['due date']['start'])
-    assignments = [a for a in tracker.assignments if today <= parse_date(a['due date']['start']) <= end_of_week]
-    assignments.sort(key=lambda a: (
-            parse_date(a['due date']['start']), 
-            -float(a.get('weightage', 0)) 
-        ))
+    # Results already come in due order; only the weightage tiebreak within a day needs sorting.
+    assignments = await run_blocking(run_query, tracker, AssignmentQuery(due_from=today, due_to=end_of_week))
+    assignments.sort(key=lambda a: (a.due_day, -(a.weightage or 0)))
     if assignments:
         embed = discord.Embed(title="Weekly To-Do List", color=discord.Color.gold())
         for assignment in assignments:
             embed.add_field(
-                name=assignment['assignment'],
-                value=f"Course: {', '.join([course['name'] for course in assignment['course']])}\n"
-                      f"Due: {format_date(assignment['due date']['start'])}\n" 
-                      f"Status: {assignment['complete']}\n"
-                      f"Grade: {assignment.get('grade', 'N/A')}\n"
-                      f"Weightage: {assignment.get('weightage', 'N/A')}",
+                name=assignment.name,
+                value=f"Course: {format_courses(assignment)}\n"
+                      f"Due: {format_date(assignment.due)}\n" 
+                      f"Status: {assignment.complete}\n"
+                      f"Grade: {assignment.grade if assignment.grade is not None else 'N/A'}\n"
+                      f"Weightage: {assignment.weightage if assignment.weightage is not None else 'N/A'}",
                 inline=False
             )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send("No assignments in the to-do list for this week.")
 
 
 @bot.command()
 async def course_grade(ctx, *, course):
-    tracker.fetch_assignments_from_notion()
-    course_assignments = [a for a in tracker.assignments if any(c['name'].lower() == course.lower() for c in a['course'])]
+    tracker = await tracker_for(ctx)
+    store = await run_blocking(tracker.fetch_assignments_from_notion)
+    course_assignments = store.for_course(course)
     
     if course_assignments:
         embed = discord.Embed(title=f"Grade for {course}", color=discord.Color.green())
-        total_score = 0
-        total_weightage = 0
         
         for assignment in course_assignments:
-            name = assignment['assignment']
-            grade = assignment.get('grade')
-            weightage = assignment.get('weightage')
-            
+            grade = assignment.grade
+            weightage = assignment.weightage
             if grade is not None and weightage is not None:
-                reflected_score = grade * weightage
-                total_score += reflected_score
-                total_weightage += weightage
-                
                 embed.add_field(
-                    name=name,
-                    value=f"Grade: {grade}%\nWeightage: {weightage}%\nReflected Score: {reflected_score:.2f}",
+                    name=assignment.name,
+                    value=f"Grade: {grade}%\nWeightage: {weightage}%\nReflected Score: {grade * weightage:.2f}",
                     inline=False
                 )
 
-        if total_weightage > 0:
-            final_score = total_score
-            embed.add_field(name="Final Score (out of overall course grade)", value=f"{final_score:.2f}%", inline=False)
+        # Recurring occurrences without a page yet still carry weight toward the projection.
+        upcoming = await run_blocking(tracker.recurrences.virtual_records, None, date.max)
+        report = store.grade_report(course, upcoming)
+        if report['graded_weight'][0] > 0:
+            embed.add_field(name="Final Score (out of overall course grade)", value=f"{report['weighted'][0]:.2f}%", inline=False)
         else:
             embed.add_field(name="Final Score", value="N/A (No graded assignments)", inline=False)
+        embed.add_field(
+            name="Projected Range",
+            value=f"{report['projected_min'][0]:.2f}% – {report['projected_max'][0]:.2f}%",
+            inline=False
+        )
 
-        
-        await ctx.send(embed=embed)
+        await ctx.send(embed=mark_stale(embed, tracker))
     else:
         await ctx.send(f"No assignments found for {course}.")
 
+
+@bot.command()
+async def grades(ctx):
+    tracker = await tracker_for(ctx)
+    store = await run_blocking(tracker.fetch_assignments_from_notion)
+    upcoming = await run_blocking(tracker.recurrences.virtual_records, None, date.max)
+    report = store.grade_report(extra=upcoming)
+    if not report['course']:
+        await ctx.send("No assignments found.")
+        return
+
+    embed = discord.Embed(title="Term Grades", color=discord.Color.green())
+    averages = ["N/A" if a is None else f"{a:.1f}%" for a in report['average']]
+    for course, weighted, graded_weight, remaining_weight, average, low, high in zip(
+        report['course'], report['weighted'], report['graded_weight'], report['remaining_weight'],
+        averages, report['projected_min'], report['projected_max'],
+    ):
+        embed.add_field(
+            name=course,
+            value=f"Score so far: {weighted:.2f}% ({graded_weight * 100:.0f}% of the course graded, average {average})\n"
+                  f"Remaining weight: {remaining_weight * 100:.0f}%\n"
+                  f"Projected: {low:.2f}% – {high:.2f}%",
+            inline=False
+        )
+    await ctx.send(embed=mark_stale(embed, tracker))
+
+@bot.command()
+async def recurring(ctx):
+    tracker = await tracker_for(ctx)
+    rules = await run_blocking(list, tracker.recurrences)
+    if not rules:
+        await ctx.send("No recurring assignments.")
+        return
+
+    today = datetime.now().date()
+    embed = discord.Embed(title="Recurring Assignments", color=discord.Color.blue())
+    for rule in rules[:25]:
+        upcoming = rule.indices_between(today, date.max)
+        next_due = f"next due {rule.due_day(upcoming[0]).strftime('%d %b %Y')}" if upcoming else "finished"
+        embed.add_field(
+            name=f"{rule.name} ({rule.course})",
+            value=f"Every {rule.interval_weeks} week(s), {rule.count} occurrences, {next_due}",
+            inline=False
+        )
+    await ctx.send(embed=embed)
+
+
+@bot.command()
+async def skip_week(ctx, date_str: str, course: str, *, name):
+    # Skipping a week archives its page if it already has one.
+    if not may_archive(ctx):
+        await ctx.send("Only the bot owner or this server's administrators can skip a week.")
+        return
+    tracker = await tracker_for(ctx)
+    try:
+        day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        await ctx.send("Invalid date format. Please use YYYY-MM-DD.")
+        return
+    try:
+        found = await run_blocking(tracker.skip_occurrence, rule_key(name, course), day)
+    except NotionAPIError as e:
+        await ctx.send(f"Could not archive that week's page in Notion ({e.status_code}).")
+        return
+    if found:
+        await ctx.send(f"{name} ({course}) will be skipped on {date_str}.")
+    else:
+        await ctx.send(f"No recurring assignment named {name} in {course}.")
+
+
 @bot.command()
 async def sync_calendar(ctx):
+    # The calendar and its event mapping belong to the bot's own Google account.
+    tracker = await tracker_for(ctx)
+    if tracker is not default_tracker:
+        await ctx.send("Calendar sync is only available for the bot's own Notion database.")
+        return
     await ctx.send("Syncing Notion assignments with Google Calendar...")
     
-    tracker.fetch_assignments_from_notion()
-    for assignment in tracker.assignments:
-        print("adding: ", assignment)
-        add_to_google_calendar(assignment)
+    store = await run_blocking(tracker.fetch_assignments_from_notion)
+    result = await run_blocking(get_calendar_sync().sync, list(store))
     
-    await ctx.send("Sync complete! Check your Google Calendar for new events.")
+    await ctx.send(
+        f"Sync complete! {result['inserted']} added, {result['patched']} updated, "
+        f"{result['deleted']} removed, {result['unchanged']} unchanged"
+        + (f", {result['failed']} failed." if result['failed'] else ".")
+    )
+    repaired = result['repaired']
+    if any(repaired.values()):
+        await ctx.send(
+            f"Repaired changes made in Calendar: {repaired['deleted']} deleted and {repaired['edited']} edited "
+            f"events restored, {repaired['duplicate']} duplicates removed."
+        )
+
+
+async def verify_notion_access(token, database_id):
+    try:
+        await run_blocking(NotionClient(auth=token, database_id=database_id).query_database, page_size=1)
+    except NotionAPIError as e:
+        return f"Notion rejected that token or database ({e.status_code})."
+    except Exception as e:
+        return f"Could not reach Notion: {str(e)}"
+    return None
+
+
+@bot.command()
+async def register(ctx, token: str, database_id: str):
+    if ctx.guild is not None:
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+        await ctx.send("Please send `!register` to me in a direct message so your Notion token stays private.")
+        return
+    error = await verify_notion_access(token, database_id)
+    if error:
+        await ctx.send(error)
+        return
+    key = user_key(ctx.author.id)
+    await run_blocking(tenant_registry.register, key, token, database_id)
+    tenants.discard(key)
+    await ctx.send("Registered. Your commands will now use your own Notion database.")
+
+
+@bot.command()
+async def register_guild(ctx, guild_id: int, token: str, database_id: str):
+    if ctx.guild is not None:
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+        await ctx.send("Please send `!register_guild` to me in a direct message so the Notion token stays private.")
+        return
+    guild = bot.get_guild(guild_id)
+    try:
+        member = await guild.fetch_member(ctx.author.id) if guild is not None else None
+    except discord.HTTPException:
+        member = None
+    if member is None or not member.guild_permissions.administrator:
+        await ctx.send("You need to be an administrator of that server to register its database.")
+        return
+    error = await verify_notion_access(token, database_id)
+    if error:
+        await ctx.send(error)
+        return
+    key = guild_key(guild_id)
+    await run_blocking(tenant_registry.register, key, token, database_id)
+    tenants.discard(key)
+    await ctx.send(f"Registered. Commands in {guild.name} will now use this Notion database.")
+
+
+@bot.command()
+async def unregister(ctx):
+    if ctx.guild is None:
+        key = user_key(ctx.author.id)
+    elif ctx.author.guild_permissions.administrator:
+        key = guild_key(ctx.guild.id)
+    else:
+        await ctx.send("Only server administrators can unregister this server's database.")
+        return
+    removed = await run_blocking(tenant_registry.unregister, key)
+    tenants.discard(key)
+    await ctx.send("Unregistered." if removed else "Nothing was registered.")
 
 
-def run_bot(token):
+def run_bot(token, startup_csv_path=None):
+    """Log in and serve commands; a CSV given here is imported in the background once logged in."""
+    global startup_csv
+    startup_csv = startup_csv_path
     bot.run(token)
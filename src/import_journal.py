@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+# Notion statuses worth retrying on resume; anything else (a 400 for a bad row) would fail again.
+RETRYABLE_STATUSES = (409, 429, 500, 502, 503, 504)
+
+
+def idempotency_key(dedupe_key):
+    """A stable id for one page write, derived from the row's dedupe key so a re-read row gets the same one."""
+    return hashlib.sha256(json.dumps(dedupe_key).encode()).hexdigest()[:32]
+
+
+@dataclass(slots=True)
+class UnfinishedImport:
+    """What the journal knows about an import that never reached its end entry."""
+    import_id: str
+    source: str | None
+    began_at: str | None
+    planned: dict = field(default_factory=dict)
+    committed: dict = field(default_factory=dict)
+    failed: dict = field(default_factory=dict)
+
+    def uncommitted(self):
+        """Planned rows not yet known to be in Notion, except those that failed for good."""
+        return {
+            key: row for key, row in self.planned.items()
+            if key not in self.committed and self.failed.get(key) in (None, *RETRYABLE_STATUSES)
+        }
+
+
+class ImportJournal:
+    """
+    Append-only JSON-lines log of the page writes an import intends and completes.
+
+    Each chunk's writes are logged ('plan') and synced to disk before any is sent, and each
+    is marked ('commit') with its page id once Notion returns one. An import that crashes
+    leaves its plan without an 'end' entry, which is what resume() picks up. The file is
+    emptied once no import is left unfinished.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._active = set()
+
+    def begin(self, source=None):
+        import_id = uuid.uuid4().hex
+        # Minute precision, like Notion's last_edited_time, so a filter on it includes this minute.
+        began_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z')
+        self._append([{'op': 'begin', 'import': import_id, 'source': source, 'at': began_at}])
+        self._active.add(import_id)
+        return import_id
+
+    def plan(self, import_id, writes):
+        """Log (idempotency key, row) pairs about to be written, durably, in one append."""
+        self._append([{'op': 'plan', 'import': import_id, 'key': key, 'row': row} for key, row in writes])
+
+    def commit(self, import_id, key, page_id):
+        self._append([{'op': 'commit', 'import': import_id, 'key': key, 'page_id': page_id}], sync=False)
+
+    def fail(self, import_id, key, status_code=None):
+        self._append([{'op': 'fail', 'import': import_id, 'key': key, 'status': status_code}], sync=False)
+
+    def claim(self, import_id):
+        """Mark an unfinished import as being resumed by this process."""
+        with self._lock:
+            if import_id in self._active:
+                return False
+            self._active.add(import_id)
+            return True
+
+    def release(self, import_id):
+        """Leave an import unfinished (it failed part way) so that resume can pick it up."""
+        with self._lock:
+            self._active.discard(import_id)
+
+    def end(self, import_id):
+        with self._lock:
+            self._active.discard(import_id)
+            self._append_locked([{'op': 'end', 'import': import_id}], sync=False)
+            if not self._unfinished_locked():
+                open(self.path, 'w').close()
+
+    def unfinished(self):
+        """Imports with a begin entry and no end entry, oldest first, except those running in this process."""
+        with self._lock:
+            return [state for state in self._unfinished_locked() if state.import_id not in self._active]
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _unfinished_locked(self):
+        imports = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line torn by a crash mid-append
+                op, import_id = entry['op'], entry['import']
+                if op == 'begin':
+                    imports[import_id] = UnfinishedImport(import_id, entry.get('source'), entry.get('at'))
+                elif op == 'end':
+                    imports.pop(import_id, None)
+                elif import_id in imports:
+                    state = imports[import_id]
+                    if op == 'plan':
+                        state.planned[entry['key']] = entry['row']
+                    elif op == 'commit':
+                        state.committed[entry['key']] = entry['page_id']
+                        state.failed.pop(entry['key'], None)
+                    elif op == 'fail':
+                        state.failed[entry['key']] = entry['status']
+        return list(imports.values())
+
+    def _append(self, entries, sync=True):
+        with self._lock:
+            self._append_locked(entries, sync)
+
+    def _append_locked(self, entries, sync=True):
+        with open(self.path, 'ab') as f:
+            if f.tell() and not self._ends_with_newline():
+                f.write(b'\n')  # start clear of a torn line
+            f.write(''.join(json.dumps(entry) + '\n' for entry in entries).encode())
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
@@ -0,0 +1,177 @@
+"""
+Process metrics: counters and latency histograms, exported in Prometheus text format.
+
+Collection is off unless METRICS_ENABLED is set; every recording call then returns
+before touching a lock, so instrumented hot paths cost one global lookup. The flag is
+read at import and again by enable(), since a .env file may only be loaded later.
+"""
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _enabled_in_env():
+    return os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+ENABLED = _enabled_in_env()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'notionize_command_seconds': 'Latency of Discord bot commands.',
+    'notionize_api_request_seconds': 'Latency of outbound API requests by endpoint.',
+    'notionize_api_errors_total': 'Outbound API requests that failed or returned an error status.',
+    'notionize_rate_limit_wait_seconds': 'Time spent waiting on rate limits (token bucket or Retry-After).',
+    'notionize_retry_backoff_seconds': 'Backoff before resending a request after a 5xx or connection failure.',
+    'notionize_query_plans_total': 'Assignment queries, by plan (local, pushdown or refresh).',
+    'notionize_push_events_total': 'Pushed change notifications, by source and result (accepted, ignored or rejected).',
+    'notionize_snapshot_requests_total': 'Assignment snapshot requests, by result (hit, miss, or joined an in-flight refresh).',
+}
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def enable(flag=None):
+    """Turn collection on or off: `flag` if given, else METRICS_ENABLED as the environment has it now."""
+    global ENABLED
+    ENABLED = _enabled_in_env() if flag is None else flag
+    return ENABLED
+
+
+def inc(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def counter_values(name):
+    with _lock:
+        return {labels: value for (n, labels), value in _counters.items() if n == name}
+
+
+def histograms(name):
+    with _lock:
+        return {labels: h for (n, labels), h in _histograms.items() if n == name}
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{str(v)}"' for k, v in pairs) + '}'
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms_ = sorted(_histograms.items(), key=lambda item: item[0])
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in histograms_:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_http_server(port=None, host='127.0.0.1'):
+    """Serve /metrics on a local port from a daemon thread (no-op when metrics are disabled)."""
+    global _server
+    # .env has been loaded by the time the server starts, so a flag set only there counts too.
+    if not (ENABLED or enable()) or _server is not None:
+        return _server
+    port = int(port or os.getenv("METRICS_PORT", "9108"))
+    _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return _server
+
+
+def stop_http_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
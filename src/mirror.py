@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from src.assignment_store import AssignmentRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    page_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    courses TEXT NOT NULL,
+    start TEXT,
+    due TEXT,
+    due_day TEXT,
+    complete TEXT,
+    grade REAL,
+    weightage REAL,
+    last_edited TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = "page_id, name, courses, start, due, due_day, complete, grade, weightage, last_edited"
+
+
+def _to_row(record):
+    return (
+        record.page_id,
+        record.name,
+        json.dumps(record.courses),
+        record.start.isoformat() if record.start else None,
+        record.due.isoformat() if record.due else None,
+        record.due_day.isoformat() if record.due_day else None,
+        record.complete,
+        record.grade,
+        record.weightage,
+        record.last_edited,
+    )
+
+
+def _from_row(row):
+    page_id, name, courses, start, due, due_day, complete, grade, weightage, last_edited = row
+    return AssignmentRecord(
+        page_id=page_id,
+        name=name,
+        courses=tuple(json.loads(courses)),
+        start=datetime.fromisoformat(start) if start else None,
+        due=datetime.fromisoformat(due) if due else None,
+        due_day=date.fromisoformat(due_day) if due_day else None,
+        complete=complete,
+        grade=grade,
+        weightage=weightage,
+        last_edited=last_edited,
+    )
+
+
+class AssignmentMirror:
+    """
+    SQLite copy of the assignments database, keyed by Notion page id.
+
+    It lets the tracker start with a populated snapshot and keep answering from the last
+    synced state when Notion is slow or unreachable.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {COLUMNS} FROM assignments").fetchall()
+        return [_from_row(row) for row in rows]
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def replace_all(self, records, state):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM assignments")
+            self._write(records)
+            self._set_state(state)
+
+    def apply(self, upserts, removed_ids, state=None):
+        with self._lock, self._conn:
+            if removed_ids:
+                self._conn.executemany("DELETE FROM assignments WHERE page_id = ?", [(i,) for i in removed_ids])
+            self._write(upserts)
+            if state:
+                self._set_state(state)
+
+    def _write(self, records):
+        records = list(records)
+        if not records:
+            return
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO assignments ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_to_row(record) for record in records],
+        )
+
+    def _set_state(self, state):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            [(key, None if value is None else str(value)) for key, value in state.items()],
+        )
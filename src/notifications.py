@@ -0,0 +1,122 @@
+import atexit
+import queue
+import threading
+import time
+
+from src.transport import get_transport
+
+# Discord rejects message content longer than 2000 characters.
+MAX_CONTENT_LENGTH = 2000
+_STOP = object()
+
+
+class NotificationDispatcher:
+    """
+    Sends webhook messages from a background thread.
+
+    Messages queued within `window` seconds of each other are joined into as few
+    webhook posts as the content limit allows. 429s are retried after the
+    Retry-After the webhook returns and failures to connect with jittered backoff.
+    A 5xx or read timeout is logged and the post dropped: the webhook takes no
+    idempotency key, so resending could post the message twice. close() drains
+    whatever is still queued.
+    """
+
+    def __init__(self, webhook_url, window=1.0):
+        self.webhook_url = webhook_url
+        self.window = window
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="discord-notifications", daemon=True)
+                self._thread.start()
+        self._queue.put(message)
+
+    def close(self, timeout=10):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            message = self._queue.get()
+            if message is _STOP:
+                return
+            batch = [message]
+            deadline = time.monotonic() + self.window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if message is _STOP:
+                    stopping = True
+                    break
+                batch.append(message)
+            for content in coalesce(batch):
+                self._post({"content": content})
+
+    def _post(self, payload):
+        # A webhook POST isn't idempotent, so the transport resends it only after a 429 (once
+        # Retry-After passes) or a failure to connect (with jittered backoff). A 5xx or read timeout
+        # comes back as is and the post is dropped below; Discord may already have posted it.
+        try:
+            response = get_transport().request(
+                'POST', self.webhook_url, service='discord', endpoint='discord.webhook', json=payload
+            )
+        except Exception as e:
+            print(f"Error sending Discord notification: {str(e)}")
+            return False
+        if response.status_code in (200, 204):
+            return True
+        print(f"Error sending Discord notification: {response.status_code}")
+        return False
+
+
+def coalesce(messages):
+    """Join messages line by line into as few bodies as fit under Discord's content limit."""
+    bodies = []
+    current = ''
+    for message in messages:
+        message = message[:MAX_CONTENT_LENGTH]
+        if current and len(current) + 1 + len(message) > MAX_CONTENT_LENGTH:
+            bodies.append(current)
+            current = ''
+        current = f"{current}\n{message}" if current else message
+    if current:
+        bodies.append(current)
+    return bodies
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(webhook_url):
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(webhook_url)
+        if dispatcher is None:
+            dispatcher = _dispatchers[webhook_url] = NotificationDispatcher(webhook_url)
+        return dispatcher
+
+
+def close_all(timeout=10):
+    with _dispatchers_lock:
+        dispatchers = list(_dispatchers.values())
+    for dispatcher in dispatchers:
+        dispatcher.close(timeout)
+
+
+atexit.register(close_all)
@@ -0,0 +1,164 @@
+"""
+Receiver for Notion webhook events and Google Calendar push notifications.
+
+With it running, the tracker learns about edits as they happen instead of polling Notion:
+each event names one page, and only that page is fetched and applied. Events are verified
+before anything is done with them (Notion's HMAC signature, Google's channel token).
+"""
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import metrics
+
+# Event types that change a page's properties or existence; page.content_updated (the page
+# body) doesn't touch anything the tracker reads.
+PAGE_CHANGED = ('page.created', 'page.properties_updated', 'page.undeleted', 'page.moved')
+PAGE_REMOVED = ('page.deleted',)
+DATABASE_CHANGED = ('database.schema_updated', 'data_source.schema_updated')
+
+
+def normalize_id(notion_id):
+    return notion_id.replace('-', '').lower() if notion_id else None
+
+
+def notion_signature(secret, body):
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class PushReceiver:
+    """
+    Verifies pushed events and applies them to the trackers they concern.
+
+    `resolve(database_id)` returns the loaded trackers for a Notion database. Notion sends
+    bursts of events for one edit, so changed pages are collected for `coalesce_seconds`
+    and each is fetched once. `on_calendar_change` is called (from the server thread) when
+    Google reports a change to the watched calendar.
+    """
+
+    def __init__(self, resolve, notion_secret=None, calendar_token=None, on_calendar_change=None,
+                 coalesce_seconds=None):
+        self.resolve = resolve
+        self.notion_secret = notion_secret if notion_secret is not None else os.getenv("NOTION_WEBHOOK_SECRET")
+        self.calendar_token = calendar_token if calendar_token is not None else os.getenv("CALENDAR_CHANNEL_TOKEN")
+        self.on_calendar_change = on_calendar_change
+        self.coalesce_seconds = coalesce_seconds if coalesce_seconds is not None else float(
+            os.getenv("PUSH_COALESCE_SECONDS", "1"))
+        self.calendar_channels = set()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, port=None, host=None):
+        """Serve /notion and /google/calendar from daemon threads."""
+        if self._server is not None:
+            return self
+        port = int(port if port is not None else os.getenv("PUSH_RECEIVER_PORT", "8091"))
+        host = host or os.getenv("PUSH_RECEIVER_HOST", "127.0.0.1")
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="push-http", daemon=True).start()
+        threading.Thread(target=self._apply_pending, name="push-apply", daemon=True).start()
+        print(f"Receiving change notifications on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle_notion(self, body, signature):
+        """Return the HTTP status to answer a Notion webhook delivery with."""
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return 400
+        if 'verification_token' in event:
+            # Sent once when the subscription is created; it is also the signing secret.
+            print(f"Notion webhook verification token: {event['verification_token']} "
+                  f"(set NOTION_WEBHOOK_SECRET to it and confirm the subscription in Notion)")
+            return 200
+        if not self.notion_secret or not signature or not hmac.compare_digest(
+                notion_signature(self.notion_secret, body), signature):
+            metrics.inc('notionize_push_events_total', source='notion', result='rejected')
+            return 401
+
+        event_type = event.get('type', '')
+        database_id = normalize_id(((event.get('data') or {}).get('parent') or {}).get('id'))
+        entity = event.get('entity') or {}
+        if event_type in DATABASE_CHANGED:
+            for tracker in self.resolve(normalize_id(entity.get('id'))):
+                tracker.invalidate_snapshot()
+        elif event_type in PAGE_CHANGED + PAGE_REMOVED and entity.get('id') and database_id:
+            with self._pending_lock:
+                # A later event for the same page supersedes an earlier one.
+                self._pending[entity['id']] = (database_id, event_type in PAGE_REMOVED)
+            self._wakeup.set()
+        else:
+            metrics.inc('notionize_push_events_total', source='notion', result='ignored')
+            return 200
+        metrics.inc('notionize_push_events_total', source='notion', result='accepted')
+        return 200
+
+    def handle_calendar(self, headers):
+        """Return the HTTP status to answer a Google Calendar push notification with."""
+        channel_id = headers.get('X-Goog-Channel-ID')
+        token = headers.get('X-Goog-Channel-Token')
+        if (not self.calendar_token or not token or not hmac.compare_digest(token, self.calendar_token)
+                or channel_id not in self.calendar_channels):
+            metrics.inc('notionize_push_events_total', source='google', result='rejected')
+            return 401
+        if headers.get('X-Goog-Resource-State') == 'sync':
+            return 200  # the handshake sent when the channel opens
+        metrics.inc('notionize_push_events_total', source='google', result='accepted')
+        if self.on_calendar_change is not None:
+            self.on_calendar_change()
+        return 200
+
+    def _apply_pending(self):
+        while self._server is not None:
+            self._wakeup.wait()
+            time.sleep(self.coalesce_seconds)
+            self._wakeup.clear()
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for page_id, (database_id, removed) in pending.items():
+                for tracker in self.resolve(database_id):
+                    try:
+                        tracker.apply_page_change(page_id, removed)
+                    except Exception as e:
+                        # The next delta sync picks the change up instead.
+                        print(f"Could not apply change to {page_id}: {str(e)}")
+                        tracker.invalidate_snapshot()
+
+
+def _make_handler(receiver):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            if self.path == '/notion':
+                status = receiver.handle_notion(body, self.headers.get('X-Notion-Signature'))
+            elif self.path == '/google/calendar':
+                status = receiver.handle_calendar(self.headers)
+            else:
+                status = 404
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
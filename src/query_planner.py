@@ -0,0 +1,137 @@
+import os
+from dataclasses import dataclass
+from datetime import date
+
+from src import metrics
+from src.assignment_store import COMPLETE_STATUS, record_from_page
+
+# Above this many expected rows a cold query refreshes the whole snapshot instead of pushing
+# the filter down: the result would cost several query pages anyway, and the refresh warms the cache.
+PUSHDOWN_MAX_ROWS = int(os.getenv("PUSHDOWN_MAX_ROWS", "100"))
+
+
+@dataclass(frozen=True, slots=True)
+class AssignmentQuery:
+    """What a command asks for. Unset fields don't constrain the result."""
+    due_from: date | None = None
+    due_to: date | None = None
+    course: str | None = None
+    title_contains: str | None = None
+    incomplete: bool = False
+
+    def matches(self, record):
+        if self.due_from is not None or self.due_to is not None:
+            if record.due_day is None:
+                return False
+            if self.due_from is not None and record.due_day < self.due_from:
+                return False
+            if self.due_to is not None and record.due_day > self.due_to:
+                return False
+        if self.course is not None and not record.in_course(self.course):
+            return False
+        if self.title_contains is not None and self.title_contains.lower() not in record.name.lower():
+            return False
+        if self.incomplete and record.is_complete:
+            return False
+        return True
+
+    def to_notion(self, course_name=None):
+        """The query body: a Notion filter (AND of every constraint) sorted by due date."""
+        conditions = []
+        if self.due_from is not None:
+            conditions.append({'property': 'End Date', 'date': {'on_or_after': self.due_from.isoformat()}})
+        if self.due_to is not None:
+            conditions.append({'property': 'End Date', 'date': {'on_or_before': self.due_to.isoformat()}})
+        if self.course is not None:
+            # multi_select matching is exact, so prefer the option's real spelling when it is known.
+            conditions.append({'property': 'Course', 'multi_select': {'contains': course_name or self.course}})
+        if self.title_contains is not None:
+            conditions.append({'property': 'Name', 'title': {'contains': self.title_contains}})
+        if self.incomplete:
+            conditions.append({'property': 'Complete', 'status': {'does_not_equal': COMPLETE_STATUS}})
+        body = {'sorts': [{'property': 'End Date', 'direction': 'ascending'}]}
+        if len(conditions) == 1:
+            body['filter'] = conditions[0]
+        elif conditions:
+            body['filter'] = {'and': conditions}
+        return body
+
+
+def run_local(store, query):
+    """Answer from a snapshot, starting from the narrowest index the query can use."""
+    if query.due_from is not None and query.due_to is not None:
+        candidates = store.due_between(query.due_from, query.due_to)
+    elif query.course is not None:
+        candidates = store.for_course(query.course)
+    elif query.incomplete:
+        candidates = store.incomplete()
+    else:
+        candidates = store
+    return [record for record in candidates if query.matches(record)]
+
+
+def plan_query(tracker, query):
+    """
+    'local' when the snapshot can answer (fresh, refreshable by a cheap delta, or already being
+    refreshed), otherwise 'pushdown' if the result is expected to be small, else 'refresh'.
+    """
+    if tracker.snapshot_is_fresh() or tracker.refresh_in_flight() or tracker.can_delta_sync():
+        return 'local'
+    if not len(tracker.store):
+        # Nothing to estimate from; a filtered query never reads more than a full fetch would.
+        return 'pushdown'
+    expected = len(run_local(tracker.store, query))
+    return 'pushdown' if expected <= PUSHDOWN_MAX_ROWS else 'refresh'
+
+
+def run_query(tracker, query):
+    """
+    Return the records matching `query` in due order, from the cache or from Notion directly.
+
+    Recurring occurrences that don't have a Notion page yet are included too, as if they had one.
+    """
+    records = _run_planned(tracker, query)
+    upcoming = [
+        r for r in tracker.recurrences.virtual_records(query.due_from or date.min, query.due_to or date.max)
+        if query.matches(r)
+    ]
+    if not upcoming:
+        return records
+    # Undated records last, as the store orders them.
+    return sorted(records + upcoming, key=lambda r: (
+        r.due_day is None, r.due_day or date.max, r.due.timestamp() if r.due else 0
+    ))
+
+
+def _run_planned(tracker, query):
+    plan = plan_query(tracker, query)
+    metrics.inc('notionize_query_plans_total', plan=plan)
+    if plan == 'pushdown':
+        try:
+            return _run_pushdown(tracker, query)
+        except Exception as e:
+            if not len(tracker.store):
+                raise
+            print(f"Filtered Notion query failed, answering from cached assignments: {str(e)}")
+            tracker.stale = True
+            return run_local(tracker.store, query)
+        finally:
+            # Warm the snapshot so the commands after this one are answered locally.
+            tracker.queue_full_sync()
+    return run_local(tracker.fetch_assignments_from_notion(), query)
+
+
+def _run_pushdown(tracker, query):
+    course_name = None
+    if query.course is not None:
+        course_name = next(
+            (c for r in tracker.store.for_course(query.course) for c in r.courses if c.lower() == query.course.lower()),
+            None,
+        )
+    pages = tracker.query_database_pages(**query.to_notion(course_name))
+    records = [
+        record_from_page(page) for page in pages
+        if not page.get('archived') and not page.get('in_trash')
+    ]
+    # Notion's date and text filters differ slightly from ours (time zones, case), so re-check.
+    return [record for record in records if query.matches(record)]
@@ -0,0 +1,220 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import time
+
+from notion.notion_client import NotionAPIError
+from src.assignment_store import CSV_STATUSES
+from src.csv_import import CsvRowError, dedupe_key, normalize_date, record_keys
+from src.recurrence import horizon_end, rule_from_row
+
+
+@dataclass(slots=True)
+class ReconcilePlan:
+    """
+    The writes that bring the Notion database in line with a CSV or a connector's rows.
+
+    `updates` holds (record, row, changed property names) for pages whose status, grade,
+    weightage or start date differ (or, for a row matched by its source id, name, course or
+    due date); `archives` the pages no row matched, only when the plan was made with
+    archive_missing. `sources` pairs source ids with the pages they were matched to.
+    """
+    creates: list = field(default_factory=list)
+    updates: list = field(default_factory=list)
+    archives: list = field(default_factory=list)
+    unchanged: int = 0
+    invalid: list = field(default_factory=list)
+    rules: list = field(default_factory=list)
+    occurrences: list = field(default_factory=list)
+    sources: list = field(default_factory=list)
+
+    @property
+    def writes(self):
+        return len(self.creates) + len(self.updates) + len(self.archives)
+
+
+def _number(value):
+    return float(value) if value and value != 'Not Started' else None
+
+
+def _same_date(value, when):
+    if when is None:
+        return not value
+    if not value:
+        return False
+    value = normalize_date(value)
+    if value == normalize_date(when.isoformat()):
+        return True
+    return when.time() == time() and value == when.date().isoformat()
+
+
+def changed_fields(record, row, by_source=False):
+    """
+    The Notion properties a row would change on the page it matched.
+
+    A blank Complete, Grade or Weightage cell leaves Notion's value alone, so grades entered in
+    Notion survive a re-import of the sheet they came from. A row matched `by_source` id can also
+    rename its page, move it to another course or move its due date.
+    """
+    changed = []
+    if by_source:
+        if row['assignment'] != record.name:
+            changed.append('Name')
+        if not record.in_course(row['course']):
+            changed.append('Course')
+        if not _same_date(row['end date'], record.due):
+            changed.append('End Date')
+    if row['complete'] and CSV_STATUSES.get(row['complete'], 'Not started') != record.complete:
+        changed.append('Complete')
+    grade = _number(row['grade'])
+    if grade is not None and grade != record.grade:
+        changed.append('Grade')
+    weightage = _number(row['weightage'])
+    if weightage is not None and weightage != record.weightage:
+        changed.append('Weightage')
+    if row['start date'] and not _same_date(row['start date'], record.start):
+        changed.append('Start Date')
+    return changed
+
+
+def plan_reconcile(store, rows, archive_missing=False, sources=None):
+    """
+    Diff CSV or connector rows against a store snapshot. Nothing is written.
+
+    A row with a 'source id' is matched to the page `sources` maps it to; other rows, and
+    connector rows seen for the first time, are matched on (name, course, due date), as the
+    importer dedupes. A repeating row expands to the occurrences due within the recurrence
+    horizon plus any that already have a page, the same set an import of it would have
+    produced by now.
+    """
+    plan = ReconcilePlan()
+    sources = sources or {}
+    index = {}
+    for record in store:
+        for key in record_keys(record):
+            index.setdefault(key, record)
+
+    matched = set()
+    last_day = horizon_end()
+    for row in _desired_rows(rows, plan, index, last_day):
+        source_id = row.get('source id')
+        record = store.get(sources[source_id]) if source_id in sources else None
+        by_source = record is not None
+        if record is None:
+            record = index.get(dedupe_key(row['assignment'], row['course'], row['end date']))
+        if record is None:
+            plan.creates.append(row)
+            continue
+        if source_id is not None and not by_source:
+            plan.sources.append((source_id, record.page_id))
+        if 'occurrence' in row:
+            plan.occurrences.append((*row['occurrence'], record.page_id))
+        if record.page_id in matched:
+            continue  # the same row listed twice
+        matched.add(record.page_id)
+        fields = changed_fields(record, row, by_source)
+        if fields:
+            plan.updates.append((record, row, fields))
+        else:
+            plan.unchanged += 1
+
+    if archive_missing:
+        plan.archives = [record for record in store if record.page_id not in matched]
+    return plan
+
+
+def _desired_rows(rows, plan, index, last_day):
+    for row in rows:
+        if isinstance(row, CsvRowError):
+            plan.invalid.append(str(row))
+            continue
+        if row.get('repeat weeks', 1) <= 1:
+            yield row
+            continue
+        rule = rule_from_row(row)
+        plan.rules.append(rule)
+        for i in rule.indices_between(None, rule.due_day(rule.count - 1)):
+            occurrence = rule.occurrence(i)
+            key = dedupe_key(occurrence['assignment'], occurrence['course'], occurrence['end date'])
+            if rule.due_day(i) <= last_day or key in index:
+                yield occurrence
+
+
+class Reconciler:
+    """Applies a ReconcilePlan through the same bounded worker pool and token bucket as CsvImporter."""
+
+    def __init__(self, tracker, max_workers=3):
+        self.tracker = tracker
+        self.max_workers = max_workers
+        self.summary = {'created': 0, 'updated': 0, 'archived': 0, 'failed': 0}
+        self.problems = []
+
+    def plan(self, rows, archive_missing=False):
+        store = self.tracker.fetch_assignments_from_notion(force=True)
+        return plan_reconcile(store, rows, archive_missing, self.tracker.source_pages.mapping())
+
+    def apply(self, plan):
+        for rule in plan.rules:
+            self.tracker.recurrences.put(rule)
+        for key, index, page_id in plan.occurrences:
+            self.tracker.recurrences.mark_materialized(key, index, page_id)
+        for source_id, page_id in plan.sources:
+            self.tracker.source_pages.set(source_id, page_id)
+
+        writes = (
+            [(self._create, row) for row in plan.creates]
+            + [(self._update, update) for update in plan.updates]
+            + [(self._archive, record) for record in plan.archives]
+        )
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(lambda write: self._write(*write), writes))
+
+        self.tracker.recurrences.save()
+        self.tracker.source_pages.save()
+        if plan.writes:
+            self.tracker.invalidate_snapshot()
+            self.tracker.send_discord_notification(
+                f"Assignments reconciled: {self.summary['created']} created, {self.summary['updated']} updated, "
+                f"{self.summary['archived']} archived."
+            )
+        return self.summary
+
+    def _write(self, action, item):
+        try:
+            page, outcome = action(item)
+        except NotionAPIError as e:
+            self._failed(item, f"{e.status_code} {e.body}")
+            return
+        except Exception as e:
+            self._failed(item, str(e))
+            return
+        self.tracker.record_written_page(page)
+        self.summary[outcome] += 1
+
+    def _failed(self, item, error):
+        print(f"Reconcile write failed: {error}")
+        self.summary['failed'] += 1
+        if len(self.problems) < 20:
+            self.problems.append(error)
+
+    def _payload(self, row):
+        return self.tracker.generate_payload(
+            row['assignment'], row['course'], row['start date'], row['end date'],
+            row['complete'], row['grade'], row['weightage']
+        )
+
+    def _create(self, row):
+        page = self.tracker.notion.create_page(self._payload(row))
+        if 'occurrence' in row:
+            self.tracker.recurrences.mark_materialized(*row['occurrence'], page['id'])
+        if row.get('source id') is not None:
+            self.tracker.source_pages.set(row['source id'], page['id'])
+        return page, 'created'
+
+    def _update(self, update):
+        record, row, fields = update
+        properties = self._payload(row)['properties']
+        page = self.tracker.notion.update_page(record.page_id, properties={name: properties[name] for name in fields})
+        return page, 'updated'
+
+    def _archive(self, record):
+        return self.tracker.notion.update_page(record.page_id, archived=True), 'archived'
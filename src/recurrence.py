@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from src.assignment_store import CSV_STATUSES, AssignmentRecord, parse_notion_datetime, parse_notion_day
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def horizon_end():
+    """Last day whose occurrences get their own Notion page now (RECURRENCE_HORIZON_DAYS ahead, default 14)."""
+    return date.today() + timedelta(days=int(os.getenv("RECURRENCE_HORIZON_DAYS", "14")))
+
+
+def rule_key(name, course):
+    return f"{name.strip().lower()}|{course.strip().lower()}"
+
+
+def shift_weeks(value, weeks):
+    if value is None:
+        return None
+    fmt = DATETIME_FORMAT if ' ' in value else DATE_FORMAT
+    return (datetime.strptime(value, fmt) + timedelta(weeks=weeks)).strftime(fmt)
+
+
+def _number(value):
+    return float(value) if value and value != 'Not Started' else None
+
+
+@dataclass(slots=True)
+class RecurrenceRule:
+    """
+    A weekly series stored once: its first occurrence and how it repeats.
+
+    Occurrence i is due `i * interval_weeks` weeks after the first, named with its 1-based
+    number as repeat rows always were. The series ends after `count` occurrences or on
+    `until` (a YYYY-MM-DD day), whichever comes first; due days in `exceptions` are skipped.
+    `materialized` maps occurrence numbers that have a Notion page to that page's id.
+    """
+    name: str
+    course: str
+    start: str | None
+    end: str
+    complete: str = 'Not Started'
+    grade: str | None = None
+    weightage: str | None = None
+    interval_weeks: int = 1
+    count: int | None = None
+    until: str | None = None
+    exceptions: list = field(default_factory=list)
+    materialized: dict = field(default_factory=dict)
+
+    @property
+    def key(self):
+        return rule_key(self.name, self.course)
+
+    def due_day(self, index):
+        return datetime.strptime(self.end[:10], DATE_FORMAT).date() + timedelta(weeks=self.interval_weeks * index)
+
+    def indices_between(self, first_day, last_day):
+        """Occurrence numbers due from first_day (None: the start) to last_day inclusive, computed, not scanned."""
+        base = self.due_day(0)
+        step = 7 * self.interval_weeks
+        lo = 0 if first_day is None else max(0, -((base - first_day).days // step))
+        hi = (last_day - base).days // step
+        if self.count is not None:
+            hi = min(hi, self.count - 1)
+        if self.until is not None:
+            hi = min(hi, (date.fromisoformat(self.until) - base).days // step)
+        skipped = set(self.exceptions)
+        return [i for i in range(lo, hi + 1) if (base + timedelta(days=step * i)).isoformat() not in skipped]
+
+    def occurrence(self, index):
+        """Occurrence `index` as an import row, tagged so the importer can record its page."""
+        return {
+            'assignment': f"{self.name}{index + 1}",
+            'course': self.course,
+            'start date': shift_weeks(self.start, self.interval_weeks * index),
+            'end date': shift_weeks(self.end, self.interval_weeks * index),
+            'complete': self.complete,
+            'grade': self.grade,
+            'weightage': self.weightage,
+            'repeat weeks': 1,
+            'occurrence': (self.key, index),
+        }
+
+    def record(self, index):
+        """Occurrence `index` as a record, for answering queries before it has a Notion page."""
+        row = self.occurrence(index)
+        return AssignmentRecord(
+            page_id=f"recurrence:{self.key}:{index}",
+            name=row['assignment'],
+            courses=(self.course,),
+            start=parse_notion_datetime(row['start date']),
+            due=parse_notion_datetime(row['end date']),
+            due_day=parse_notion_day(row['end date']),
+            complete=CSV_STATUSES.get(self.complete, 'Not started'),
+            grade=_number(self.grade),
+            weightage=_number(self.weightage),
+        )
+
+    def to_json(self):
+        data = {name: getattr(self, name) for name in self.__dataclass_fields__}
+        data['materialized'] = {str(index): page_id for index, page_id in self.materialized.items()}
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        rule = cls(**data)
+        rule.materialized = {int(index): page_id for index, page_id in data.get('materialized', {}).items()}
+        return rule
+
+
+def rule_from_row(row):
+    """The series a CSV row with 'Repeat Assignment' set describes."""
+    return RecurrenceRule(
+        name=row['assignment'],
+        course=row['course'],
+        start=row['start date'],
+        end=row['end date'],
+        complete=row['complete'],
+        grade=row['grade'],
+        weightage=row['weightage'],
+        count=row['repeat weeks'],
+    )
+
+
+class RecurrenceStore:
+    """The recurrence rules of one database, in a JSON file next to its mirror, loaded on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self._rules = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(list(self.rules.values()))
+
+    @property
+    def rules(self):
+        with self._lock:
+            if self._rules is None:
+                self._rules = self._load()
+            return self._rules
+
+    def get(self, key):
+        return self.rules.get(key)
+
+    def put(self, rule):
+        """Add or replace a series; skipped weeks stay skipped and occurrences that have pages keep them."""
+        with self._lock:
+            existing = self.rules.get(rule.key)
+            if existing is not None:
+                rule.exceptions = sorted(set(existing.exceptions) | set(rule.exceptions))
+                rule.materialized = {**existing.materialized, **rule.materialized}
+            self.rules[rule.key] = rule
+
+    def remove(self, key):
+        with self._lock:
+            return self.rules.pop(key, None)
+
+    def mark_materialized(self, key, index, page_id):
+        with self._lock:
+            rule = self.rules.get(key)
+            if rule is not None:
+                rule.materialized[index] = page_id
+
+    def add_exception(self, key, day):
+        """Skip the occurrence due on `day`; returns the page id it had, if any."""
+        with self._lock:
+            rule = self.rules.get(key)
+            if rule is None:
+                return None
+            if day.isoformat() not in rule.exceptions:
+                rule.exceptions.append(day.isoformat())
+            index = next((i for i in rule.materialized if rule.due_day(i) == day), None)
+            return rule.materialized.pop(index, None) if index is not None else None
+
+    def pending_rows(self, last_day):
+        """Import rows for occurrences due by `last_day` that don't have a Notion page yet."""
+        return [
+            rule.occurrence(index)
+            for rule in self
+            for index in rule.indices_between(None, last_day)
+            if index not in rule.materialized
+        ]
+
+    def virtual_records(self, first_day, last_day):
+        """Records for occurrences due in the range that exist only as part of a rule so far."""
+        return [
+            rule.record(index)
+            for rule in self
+            for index in rule.indices_between(first_day, last_day)
+            if index not in rule.materialized
+        ]
+
+    def save(self):
+        with self._lock:
+            if self._rules is None:
+                return
+            data = [rule.to_json() for rule in self._rules.values()]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return {rule.key: rule for rule in map(RecurrenceRule.from_json, json.load(f))}
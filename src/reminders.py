@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from datetime import timedelta
+
+
+def reminder_offsets():
+    """Lead times from REMINDER_OFFSETS, a comma-separated list of hours before the deadline (default 24,1)."""
+    hours = os.getenv("REMINDER_OFFSETS", "24,1")
+    return tuple(sorted((timedelta(hours=float(h)) for h in hours.split(',') if h.strip()), reverse=True))
+
+
+class ReminderScheduler:
+    """
+    Fires a reminder a fixed lead time before each incomplete assignment's deadline.
+
+    Pending reminders sit in a min-heap keyed by fire time and one task sleeps until the
+    earliest is due, so idle deadlines cost nothing. Assignment changes arrive from the
+    tracker's listener hook and only touch the records that changed: a moved or completed
+    deadline leaves its old heap entries behind, and they are discarded when popped.
+    """
+
+    def __init__(self, send, offsets=None):
+        self.send = send
+        self.offsets = offsets if offsets is not None else reminder_offsets()
+        self._heap = []
+        self._records = {}
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._loop = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def __len__(self):
+        return len(self._records)
+
+    def start(self, tracker=None):
+        """Start the timer task on the running loop, following `tracker` changes if one is given."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if tracker is not None:
+            tracker.add_listener(self.notify_threadsafe)
+            self.update(list(tracker.store), ())
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def notify_threadsafe(self, upserts, removed):
+        """Tracker listener: syncs run on the I/O pool, so hop onto the loop before touching the heap."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.update, list(upserts), list(removed))
+
+    def update(self, upserts, removed):
+        now = time.time()
+        changed = False
+        for page_id in removed:
+            changed |= self._records.pop(page_id, None) is not None
+        for record in upserts:
+            previous = self._records.pop(record.page_id, None)
+            if record.due is None or record.is_complete or record.due.timestamp() <= now:
+                changed |= previous is not None
+                continue
+            due = record.due.timestamp()
+            if previous is not None and previous.due.timestamp() == due:
+                self._records[record.page_id] = record
+                continue
+            pending = [offset for offset in self.offsets if due - offset.total_seconds() > now]
+            if not pending:
+                # Every lead time has passed; without a heap entry nothing would ever drop the record.
+                changed |= previous is not None
+                continue
+            self._records[record.page_id] = record
+            for offset in pending:
+                heapq.heappush(self._heap, (due - offset.total_seconds(), next(self._seq), record.page_id, due, offset))
+            changed = True
+        if len(self._heap) > 2 * len(self.offsets) * len(self._records) + 64:
+            self._compact()
+        if changed and self._wakeup is not None:
+            self._wakeup.set()
+
+    def next_fire_time(self):
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _is_live(self, entry):
+        _, _, page_id, due, _ = entry
+        record = self._records.get(page_id)
+        return record is not None and record.due.timestamp() == due
+
+    def _discard_stale(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            fire_at = self.next_fire_time()
+            timeout = None if fire_at is None else max(0.0, fire_at - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._is_live(entry):
+                    continue
+                record = self._records[entry[2]]
+                if entry[4] == min(self.offsets):
+                    # The last reminder for this deadline has gone out.
+                    del self._records[record.page_id]
+                try:
+                    await self.send(record, entry[4])
+                except Exception as e:
+                    print(f"Failed to send reminder for {record.name}: {str(e)}")
+
+
+def format_lead_time(offset):
+    hours = offset.total_seconds() / 3600
+    if hours >= 24 and hours % 24 == 0:
+        days = int(hours // 24)
+        return f"{days} day{'s' if days != 1 else ''}"
+    if hours >= 1:
+        return f"{hours:g} hour{'s' if hours != 1 else ''}"
+    return f"{offset.total_seconds() / 60:g} minutes"
+
+
+def reminder_message(record, offset):
+    courses = ', '.join(record.courses) or 'No course'
+    return (
+        f"⏰ Reminder: **{record.name}** ({courses}) is due in {format_lead_time(offset)}, "
+        f"at {record.due.astimezone().strftime('%d %b %Y %H:%M')}."
+    )
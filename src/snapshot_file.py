@@ -0,0 +1,204 @@
+"""
+Columnar binary snapshot of the assignment store, for cold starts that skip parsing.
+
+Layout (little-endian): a header with magic, schema version, record count, last full sync
+time and the high-water mark, then one length-prefixed section per column, each padded to
+8 bytes. Numeric columns are read straight out of the memory-mapped file; strings are
+stored as an offsets column plus one UTF-8 blob, and low-cardinality strings (status,
+course) as codes into a small dictionary.
+"""
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+from src.assignment_store import AssignmentRecord
+
+MAGIC = b'NTZS'
+SCHEMA_VERSION = 1
+HEADER = struct.Struct('<4sHHId')
+SECTION = struct.Struct('<I')
+
+# Section order and typecodes for SCHEMA_VERSION 1.
+COLUMNS = (
+    ('page_id_offsets', 'I'), ('page_id', 'B'),
+    ('name_offsets', 'I'), ('name', 'B'),
+    ('edited_offsets', 'I'), ('edited', 'B'),
+    ('status_dict_offsets', 'I'), ('status_dict', 'B'), ('status', 'H'),
+    ('course_dict_offsets', 'I'), ('course_dict', 'B'), ('course_offsets', 'I'), ('course', 'H'),
+    ('due', 'd'), ('due_utcoffset', 'i'), ('start', 'd'), ('start_utcoffset', 'i'),
+    ('due_day', 'i'), ('grade', 'd'), ('weightage', 'd'),
+)
+
+
+def _pack_strings(values):
+    # Offsets count characters, so a reader decodes the blob once and slices the text.
+    offsets = array('I', [0])
+    parts = []
+    length = 0
+    for value in values:
+        parts.append(value)
+        length += len(value)
+        offsets.append(length)
+    return offsets, ''.join(parts).encode()
+
+
+def _unpack_strings(offsets, blob):
+    text = bytes(blob).decode()
+    offsets = offsets.tolist()
+    return [text[a:b] for a, b in zip(offsets, offsets[1:])]
+
+
+def _timestamp(value):
+    return (value.timestamp(), int(value.utcoffset().total_seconds())) if value is not None else (math.nan, 0)
+
+
+def write_snapshot(path, records, high_water_mark, last_full_sync):
+    records = list(records)
+    statuses, courses = {}, {}
+    status_codes = array('H', (statuses.setdefault(r.complete, len(statuses)) for r in records))
+    course_offsets, course_codes = array('I', [0]), array('H')
+    for record in records:
+        course_codes.extend(courses.setdefault(c, len(courses)) for c in record.courses)
+        course_offsets.append(len(course_codes))
+    due = [_timestamp(r.due) for r in records]
+    start = [_timestamp(r.start) for r in records]
+
+    columns = {
+        'status': status_codes,
+        'course_offsets': course_offsets,
+        'course': course_codes,
+        'due': array('d', (ts for ts, _ in due)),
+        'due_utcoffset': array('i', (offset for _, offset in due)),
+        'start': array('d', (ts for ts, _ in start)),
+        'start_utcoffset': array('i', (offset for _, offset in start)),
+        'due_day': array('i', (r.due_day.toordinal() if r.due_day else 0 for r in records)),
+        'grade': array('d', (math.nan if r.grade is None else r.grade for r in records)),
+        'weightage': array('d', (math.nan if r.weightage is None else r.weightage for r in records)),
+    }
+    for name, values in (
+        ('page_id', (r.page_id for r in records)),
+        ('name', (r.name for r in records)),
+        ('edited', (r.last_edited or '' for r in records)),
+        ('status_dict', statuses),
+        ('course_dict', courses),
+    ):
+        columns[f'{name}_offsets'], columns[name] = _pack_strings(values)
+
+    hwm = (high_water_mark or '').encode()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SCHEMA_VERSION, len(hwm), len(records),
+                            math.nan if last_full_sync is None else last_full_sync))
+        f.write(hwm)
+        f.write(b'\0' * (-f.tell() % 8))
+        for name, typecode in COLUMNS:
+            data = columns[name]
+            if isinstance(data, array):
+                if sys.byteorder == 'big':
+                    data = array(typecode, data)
+                    data.byteswap()
+                data = data.tobytes()
+            f.write(SECTION.pack(len(data)))
+            f.write(b'\0' * (-f.tell() % 8))
+            f.write(data)
+            f.write(b'\0' * (-f.tell() % 8))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """
+    Return (records, high_water_mark, last_full_sync), or None if the file is missing,
+    truncated or written by a different schema version.
+    """
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                views = [memoryview(mapped)]
+                try:
+                    return _decode(views[0], views)
+                finally:
+                    # The map can't close while any view into it is still alive.
+                    for view in reversed(views):
+                        view.release()
+    except (OSError, ValueError, struct.error, UnicodeDecodeError, IndexError):
+        return None
+
+
+def _decode(view, views):
+    magic, version, hwm_length, count, last_full_sync = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != SCHEMA_VERSION:
+        return None
+    position = HEADER.size
+    high_water_mark = bytes(view[position:position + hwm_length]).decode() or None
+    position += hwm_length
+    position += -position % 8
+
+    columns = {}
+    for name, typecode in COLUMNS:
+        (length,) = SECTION.unpack_from(view, position)
+        position += SECTION.size
+        position += -position % 8
+        if position + length > len(view):
+            raise ValueError("truncated snapshot")
+        data = view[position:position + length]
+        views.append(data)
+        if typecode == 'B':
+            columns[name] = data
+        elif sys.byteorder == 'big':
+            columns[name] = array(typecode, bytes(data))
+            columns[name].byteswap()
+        else:
+            columns[name] = data.cast(typecode)
+            views.append(columns[name])
+        position += length
+        position += -position % 8
+
+    page_ids = _unpack_strings(columns['page_id_offsets'], columns['page_id'])
+    names = _unpack_strings(columns['name_offsets'], columns['name'])
+    edited = _unpack_strings(columns['edited_offsets'], columns['edited'])
+    statuses = _unpack_strings(columns['status_dict_offsets'], columns['status_dict'])
+    courses = _unpack_strings(columns['course_dict_offsets'], columns['course_dict'])
+    if len(page_ids) != count:
+        raise ValueError("snapshot record count mismatch")
+
+    zones = {}
+
+    def to_datetime(ts, offset):
+        if ts != ts:  # NaN marks a missing date
+            return None
+        zone = zones.get(offset)
+        if zone is None:
+            zone = zones[offset] = timezone(timedelta(seconds=offset))
+        return datetime.fromtimestamp(ts, zone)
+
+    course_codes = columns['course'].tolist()
+    course_offsets = columns['course_offsets'].tolist()
+    course_tuples = {}
+    record_courses = []
+    for a, b in zip(course_offsets, course_offsets[1:]):
+        codes = tuple(course_codes[a:b])
+        names_ = course_tuples.get(codes)
+        if names_ is None:
+            names_ = course_tuples[codes] = tuple(courses[c] for c in codes)
+        record_courses.append(names_)
+
+    records = [
+        AssignmentRecord(
+            page_id, name, record_courses_, to_datetime(start, start_offset), to_datetime(due, due_offset),
+            date.fromordinal(day) if day else None, statuses[status],
+            None if grade != grade else grade, None if weightage != weightage else weightage, last_edited or None,
+        )
+        for page_id, name, record_courses_, start, start_offset, due, due_offset, day, status, grade, weightage, last_edited
+        in zip(
+            page_ids, names, record_courses,
+            columns['start'].tolist(), columns['start_utcoffset'].tolist(),
+            columns['due'].tolist(), columns['due_utcoffset'].tolist(),
+            columns['due_day'].tolist(), columns['status'].tolist(),
+            columns['grade'].tolist(), columns['weightage'].tolist(), edited,
+        )
+    ]
+    return records, high_water_mark, None if math.isnan(last_full_sync) else last_full_sync
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from src.assignment_tracker import AssignmentTracker
+from src.recurrence import RecurrenceStore
+
+
+def guild_key(guild_id):
+    return f"guild-{guild_id}"
+
+
+def user_key(user_id):
+    return f"user-{user_id}"
+
+
+class TenantRegistry:
+    """
+    Which Notion integration token and database each guild or user has registered, kept in a JSON file.
+
+    The file holds tokens, so it is written owner-readable only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("TENANTS_PATH", "tenants.json")
+        self._lock = threading.Lock()
+        self._tenants = self._load()
+
+    def __contains__(self, key):
+        return key in self._tenants
+
+    def __len__(self):
+        return len(self._tenants)
+
+    def get(self, key):
+        return self._tenants.get(key)
+
+    def keys(self):
+        with self._lock:
+            return list(self._tenants)
+
+    def register(self, key, token, database_id, webhook_url=''):
+        with self._lock:
+            self._tenants[key] = {'token': token, 'database_id': database_id, 'webhook_url': webhook_url}
+            self._save()
+
+    def unregister(self, key):
+        with self._lock:
+            removed = self._tenants.pop(key, None)
+            if removed is not None:
+                self._save()
+            return removed is not None
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._tenants, f)
+        os.replace(tmp_path, self.path)
+
+
+class TenantPool:
+    """
+    One AssignmentTracker per registered tenant, built on first use and held in an LRU cache.
+
+    At most `max_tenants` trackers (and their snapshots) stay in memory, and any left unused
+    for `idle_seconds` are dropped. A dropped tenant's state survives in its SQLite mirror
+    under `state_dir`, so coming back is a warm start plus a delta sync.
+    """
+
+    def __init__(self, registry, max_tenants=None, idle_seconds=None, state_dir=None):
+        self.registry = registry
+        self.max_tenants = max_tenants or int(os.getenv("TENANT_CACHE_SIZE", "64"))
+        self.idle_seconds = idle_seconds or float(os.getenv("TENANT_IDLE_SECONDS", "1800"))
+        self.state_dir = state_dir or os.getenv("TENANT_STATE_DIR", "tenants")
+        self.evictions = 0
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._trackers)
+
+    def get(self, key):
+        """The tracker for a registered tenant, or None if `key` is not registered."""
+        entry = self.registry.get(key)
+        if entry is None:
+            return None
+        tracker = self._touch(key, entry)
+        if tracker is None:
+            # Built outside the lock: loading a mirror is disk I/O and shouldn't hold up other tenants.
+            built = self._build(key, entry)
+            tracker = self._touch(key, entry) or self._insert(key, entry, built)
+        return tracker
+
+    def loaded(self):
+        """The trackers currently in memory."""
+        with self._lock:
+            return [tracker for tracker, _, _ in self._trackers.values()]
+
+    def with_due_recurrences(self, last_day):
+        """
+        Trackers of the tenants with recurring occurrences due by `last_day` that have no page yet.
+
+        A tenant that isn't loaded is checked from its rules file and only loaded if it has some.
+        """
+        with self._lock:
+            loaded = {key: tracker for key, (tracker, _, _) in self._trackers.items()}
+        trackers = []
+        for key in self.registry.keys():
+            tracker = loaded.get(key)
+            if tracker is not None:
+                due = tracker.recurrences.pending_rows(last_day)
+            else:
+                path = os.path.splitext(self._mirror_path(key))[0] + '.recurrences.json'
+                due = os.path.exists(path) and RecurrenceStore(path).pending_rows(last_day)
+                tracker = self.get(key) if due else None
+            if due and tracker is not None:
+                trackers.append(tracker)
+        return trackers
+
+    def discard(self, key):
+        with self._lock:
+            self._trackers.pop(key, None)
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict(time.monotonic())
+
+    def _touch(self, key, entry):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._trackers.pop(key, None)
+            if cached is None or cached[1] != entry:
+                return None  # Not loaded, or re-registered with a different token or database.
+            self._trackers[key] = (cached[0], entry, now)
+            self._evict(now)
+            return cached[0]
+
+    def _insert(self, key, entry, tracker):
+        now = time.monotonic()
+        with self._lock:
+            self._trackers[key] = (tracker, entry, now)
+            self._evict(now)
+        return tracker
+
+    def _mirror_path(self, key):
+        return os.path.join(self.state_dir, f"{re.sub(r'[^A-Za-z0-9_-]', '_', key)}.db")
+
+    def _build(self, key, entry):
+        os.makedirs(self.state_dir, exist_ok=True)
+        return AssignmentTracker(
+            auth=entry['token'],
+            database_id=entry['database_id'],
+            mirror_path=self._mirror_path(key),
+            webhook_url=entry.get('webhook_url') or '',
+        )
+
+    def _evict(self, now):
+        # Trackers are dropped rather than closed: a command still holding one finishes with it,
+        # and its mirror connection is released when the last reference goes.
+        while self._trackers:
+            key, (_, _, last_used) = next(iter(self._trackers.items()))
+            if len(self._trackers) <= self.max_tenants and now - last_used < self.idle_seconds:
+                break
+            del self._trackers[key]
+            self.evictions += 1
@@ -0,0 +1,221 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A POST that timed out or got a 5xx may still have been applied, so it is only resent after these.
+NON_IDEMPOTENT_RETRY_STATUSES = {429}
+
+# Requests per second and burst size for each upstream service.
+DEFAULT_RATE_LIMITS = {
+    'notion': (3.0, 3),
+    'discord': (1.0, 5),
+    'google': (10.0, 10),
+    'prairielearn': (5.0, 5),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class EndpointStats:
+    __slots__ = ('calls', 'errors', 'retries', 'total_seconds', 'max_seconds', 'rate_limit_wait', 'retry_wait')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rate_limit_wait = 0.0
+        # Backoff before resending after a 5xx or connection failure; a 429's wait is rate limiting.
+        self.retry_wait = 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'total_seconds': self.total_seconds,
+            'avg_seconds': self.total_seconds / self.calls if self.calls else 0.0,
+            'max_seconds': self.max_seconds,
+            'rate_limit_wait': self.rate_limit_wait,
+            'retry_wait': self.retry_wait,
+        }
+
+
+def retry_after(response):
+    """Seconds to wait from a 429, read from the Retry-After header or a JSON retry_after field."""
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json().get('retry_after'))
+    except Exception:
+        return None
+
+
+class Transport:
+    """
+    The one path outbound API calls take.
+
+    Owns a keep-alive connection pool, throttles each service with a token bucket,
+    retries 429/5xx and connection errors with jittered exponential backoff (honoring
+    Retry-After), and records call counts and latency per endpoint label. Requests that
+    aren't idempotent are only retried when they can't have reached the server.
+    """
+
+    def __init__(self, pool_size=10, max_retries=5, backoff=0.5, timeout=30, rate_limits=None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._buckets = {
+            service: TokenBucket(rate, capacity)
+            for service, (rate, capacity) in (rate_limits or DEFAULT_RATE_LIMITS).items()
+        }
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def set_rate_limit(self, service, rate, capacity=1):
+        self._buckets[service] = TokenBucket(rate, capacity)
+
+    def request(self, method, url, service, endpoint, idempotent=None, **kwargs):
+        """
+        Send an HTTP request, returning the final response (which may still be an error status).
+
+        A request that isn't idempotent (by default a POST) is resent only after a 429 or a failure
+        to connect; after a read timeout or a 5xx it may already have been applied, so the error goes
+        back to the caller (the import journal decides what to redo).
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if idempotent is None:
+            idempotent = method.upper() != 'POST'
+        retry_statuses = RETRY_STATUSES if idempotent else NON_IDEMPOTENT_RETRY_STATUSES
+        # ConnectTimeout is a ConnectionError too; ReadTimeout is not.
+        retry_errors = (requests.ConnectionError, requests.Timeout) if idempotent else requests.ConnectionError
+        stats = self._endpoint(endpoint)
+        for attempt in range(self.max_retries + 1):
+            self._throttle(service, stats)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(stats, service, endpoint, time.perf_counter() - started, error=True)
+                if attempt == self.max_retries or not isinstance(e, retry_errors):
+                    raise
+                delay = self._backoff_delay(attempt)
+                rate_limited = False
+            else:
+                failed = response.status_code >= 400
+                self._record(stats, service, endpoint, time.perf_counter() - started, error=failed)
+                if response.status_code not in retry_statuses or attempt == self.max_retries:
+                    return response
+                rate_limited = response.status_code == 429
+                delay = (retry_after(response) if rate_limited else None) or self._backoff_delay(attempt)
+            with self._stats_lock:
+                stats.retries += 1
+                if rate_limited:
+                    stats.rate_limit_wait += delay
+                else:
+                    stats.retry_wait += delay
+            if rate_limited:
+                metrics.observe('notionize_rate_limit_wait_seconds', delay, service=service or 'other', source='retry_after')
+            else:
+                metrics.observe('notionize_retry_backoff_seconds', delay, service=service or 'other')
+            time.sleep(delay)
+
+    def call(self, service, endpoint, func, *args, **kwargs):
+        """Throttle and time a call made by a client library with its own HTTP stack (Google's)."""
+        stats = self._endpoint(endpoint)
+        self._throttle(service, stats)
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record(stats, service, endpoint, time.perf_counter() - started, error=True)
+            raise
+        self._record(stats, service, endpoint, time.perf_counter() - started)
+        return result
+
+    def endpoint_stats(self):
+        with self._stats_lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in self._stats.items()}
+
+    def close(self):
+        self.session.close()
+
+    def _endpoint(self, endpoint):
+        with self._stats_lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            return stats
+
+    def _throttle(self, service, stats):
+        bucket = self._buckets.get(service)
+        if bucket is None:
+            return
+        waited = bucket.acquire()
+        if waited:
+            with self._stats_lock:
+                stats.rate_limit_wait += waited
+            metrics.observe('notionize_rate_limit_wait_seconds', waited, service=service, source='token_bucket')
+
+    def _record(self, stats, service, endpoint, elapsed, error=False):
+        with self._stats_lock:
+            stats.calls += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            if error:
+                stats.errors += 1
+        metrics.observe('notionize_api_request_seconds', elapsed, service=service or 'other', endpoint=endpoint)
+        if error:
+            metrics.inc('notionize_api_errors_total', service=service or 'other', endpoint=endpoint)
+
+    def _backoff_delay(self, attempt):
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture
+def notion(monkeypatch):
+    """A running FakeNotion that trackers built in the test talk to, with client-side throttling lifted."""
+    pytest.importorskip('requests')
+    from benchmarks.fake_servers import FakeNotion
+    from src.transport import get_transport
+
+    with FakeNotion() as server:
+        monkeypatch.setenv('NOTION_API_URL', server.api_url)
+        monkeypatch.setenv('API_KEY', 'test-token')
+        monkeypatch.setenv('DATABASE_ID', 'db')
+        monkeypatch.setenv('DISCORD_WEBHOOK_URL', '')
+        for service in ('notion', 'discord', 'google', 'prairielearn'):
+            get_transport().set_rate_limit(service, 1e9, 1e9)
+        yield server
+
+
+@pytest.fixture
+def make_tracker(notion, tmp_path):
+    from src.assignment_tracker import AssignmentTracker
+
+    def make(name='tracker', **kwargs):
+        return AssignmentTracker(mirror_path=str(tmp_path / f'{name}.db'), **kwargs)
+    return make
@@ -0,0 +1,107 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.assignment_store import AssignmentRecord, AssignmentStore, CourseGrades
+
+
+def record(page_id, courses=('CS400',), due=None, complete='Not started', grade=None, weightage=None):
+    return AssignmentRecord(
+        page_id=page_id, name=page_id, courses=courses, start=None, due=due,
+        due_day=due.date() if due else None, complete=complete, grade=grade, weightage=weightage,
+    )
+
+
+DUE = datetime(2025, 1, 6, 23, 59, tzinfo=timezone.utc)
+
+
+def test_due_between_is_inclusive_and_in_due_order():
+    store = AssignmentStore([
+        record('late', due=DUE + timedelta(days=2)),
+        record('evening', due=DUE),
+        record('morning', due=DUE - timedelta(hours=12)),
+        record('undated'),
+    ])
+    assert [r.page_id for r in store.due_between(date(2025, 1, 6), date(2025, 1, 8))] == ['morning', 'evening', 'late']
+    assert [r.page_id for r in store.due_on(date(2025, 1, 7))] == []
+    # Undated records come last when iterating.
+    assert [r.page_id for r in store] == ['morning', 'evening', 'late', 'undated']
+
+
+def test_indexes_follow_upserts_and_removals():
+    store = AssignmentStore([record('a', courses=('CS400', 'Math200'), due=DUE), record('b', due=DUE)])
+    store.upsert(record('a', courses=('Math200',), due=DUE + timedelta(days=7), complete='Complete'))
+    assert [r.page_id for r in store.for_course('cs400')] == ['b']
+    assert [r.page_id for r in store.for_course('MATH200')] == ['a']
+    assert [r.page_id for r in store.due_on(date(2025, 1, 6))] == ['b']
+    assert [r.page_id for r in store.incomplete()] == ['b']
+    assert [r.page_id for r in store.with_status('Complete')] == ['a']
+
+    store.remove('b')
+    assert store.courses() == ['math200']
+    assert 'b' not in store and len(store) == 1
+    assert store.due_on(date(2025, 1, 6)) == []
+
+
+def test_course_grades_split_graded_and_remaining_weight():
+    grades = CourseGrades()
+    grades.add(record('a', complete='Complete', grade=90.0, weightage=0.2))
+    grades.add(record('b', complete='Complete', grade=70.0, weightage=0.2))
+    grades.add(record('c', weightage=0.1))
+    # A grade counts whatever the status, as !course_grade always counted it.
+    grades.add(record('d', complete='In progress', grade=50.0, weightage=0.1))
+    # Without a weightage a grade carries no weight either way.
+    grades.add(record('e', complete='Complete', grade=100.0))
+    report = grades.report()
+    assert report['course'] == ['CS400']
+    assert report['assignments'] == [5]
+    assert report['weighted'] == [pytest.approx(37.0)]
+    assert report['graded_weight'] == [pytest.approx(0.5)]
+    assert report['remaining_weight'] == [pytest.approx(0.1)]
+    assert report['average'] == [pytest.approx(74.0)]
+    assert report['projected_max'] == [pytest.approx(47.0)]
+
+
+def test_course_grades_count_every_course_and_sort_case_insensitively():
+    grades = CourseGrades()
+    grades.add(record('a', courses=('math200', 'CS400'), complete='Complete', grade=100.0, weightage=0.5))
+    grades.add(record('b', courses=('cs400',), weightage=0.5))
+    report = grades.report()
+    assert report['course'] == ['CS400', 'math200']
+    assert report['assignments'] == [2, 1]
+    assert grades.report('Math200')['average'] == [pytest.approx(100.0)]
+    assert grades.report('none')['course'] == []
+
+
+def test_course_grades_removal_resets_empty_courses():
+    grades = CourseGrades()
+    graded = record('a', complete='Complete', grade=33.3, weightage=0.3)
+    grades.add(graded)
+    grades.add(graded, -1)
+    assert grades.report()['course'] == []
+    grades.add(record('b', weightage=0.1))
+    report = grades.report()
+    assert report['weighted'] == [0.0] and report['remaining_weight'] == [pytest.approx(0.1)]
+
+
+def test_course_grades_copy_is_independent():
+    grades = CourseGrades()
+    grades.add(record('a', weightage=0.1))
+    clone = grades.copy()
+    clone.add(record('b', courses=('CS500',), weightage=0.1))
+    assert grades.report()['course'] == ['CS400']
+    assert clone.report()['course'] == ['CS400', 'CS500']
+
+
+def test_store_keeps_grades_in_step_with_upserts_and_removals():
+    store = AssignmentStore([record('a', due=DUE, weightage=0.5), record('b', due=DUE + timedelta(days=1))])
+    store.upsert(record('a', due=DUE, complete='Complete', grade=80.0, weightage=0.5))
+    store.remove('b')
+    assert store.grade_report()['weighted'] == [pytest.approx(40.0)]
+
+
+def test_grade_report_counts_extra_records_without_keeping_them():
+    store = AssignmentStore([record('a', weightage=0.5)])
+    extra = record('recurrence:quiz|cs400:3', weightage=0.5)
+    assert store.grade_report(extra=[extra])['remaining_weight'] == [pytest.approx(1.0)]
+    assert store.grade_report()['remaining_weight'] == [pytest.approx(0.5)]
@@ -0,0 +1,99 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('googleapiclient')
+
+from benchmarks.fake_servers import FakeCalendar
+from src.assignment_store import AssignmentRecord
+from src.calendar_sync import PAGE_ID_PROPERTY, CalendarSync, build_event
+from src.transport import get_transport
+
+TZ = 'America/Chicago'
+
+
+def assignments(count):
+    first = datetime(2025, 1, 6, 23, 59, tzinfo=timezone.utc)
+    return [
+        AssignmentRecord(f'page-{i}', f'Homework {i}', ('CS400',), None, first + timedelta(days=i),
+                         date(2025, 1, 6) + timedelta(days=i), 'Not started', None, 0.05)
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def calendar():
+    get_transport().set_rate_limit('google', 1e9, 1e9)
+    with FakeCalendar() as server:
+        yield server
+
+
+def make_sync(calendar, tmp_path, name='calendar'):
+    return CalendarSync(map_path=str(tmp_path / f'{name}.json'), api_root=calendar.url, tz_name=TZ)
+
+
+def test_repeat_sync_is_one_list_request(calendar, tmp_path):
+    records = assignments(60)
+    sync = make_sync(calendar, tmp_path)
+    first = sync.sync(records)
+    assert first['inserted'] == 60 and first['failed'] == 0
+    assert len(calendar.events) == 60
+
+    before = calendar.request_count
+    # A new instance starts from the saved mapping and sync token.
+    repeat = make_sync(calendar, tmp_path).sync(records)
+    assert calendar.request_count - before == 1
+    assert repeat['unchanged'] == 60
+    assert repeat['inserted'] == repeat['patched'] == repeat['deleted'] == 0
+
+
+def test_events_changed_in_calendar_are_repaired(calendar, tmp_path):
+    records = assignments(10)
+    sync = make_sync(calendar, tmp_path)
+    sync.sync(records)
+    edited, deleted = sorted(calendar.events)[:2]
+    calendar.edit(edited, summary='Moved by hand')
+    calendar.remove(deleted)
+
+    result = sync.sync(records)
+    assert result['repaired'] == {'deleted': 1, 'edited': 1, 'duplicate': 0}
+    assert result['inserted'] == 1 and result['patched'] == 1
+    assert calendar.events[edited]['summary'] != 'Moved by hand'
+    assert len(calendar.events) == 10
+
+
+def test_expired_sync_token_lists_everything_again(calendar, tmp_path):
+    records = assignments(10)
+    sync = make_sync(calendar, tmp_path)
+    sync.sync(records)
+    calendar.expire_sync_tokens()
+    lists = calendar.list_calls
+    result = sync.sync(records)
+    # The 410 for the stale token, then one full list.
+    assert calendar.list_calls - lists == 2
+    assert result['unchanged'] == 10 and result['inserted'] == 0
+
+
+def test_lost_mapping_adopts_events_and_deletes_duplicates(calendar, tmp_path):
+    records = assignments(5)
+    make_sync(calendar, tmp_path, 'first').sync(records)
+    extra = build_event(records[0], TZ)
+    calendar.apply('POST', '/calendar/v3/calendars/primary/events', {}, json.dumps(extra).encode())
+
+    result = make_sync(calendar, tmp_path, 'second').sync(records)
+    assert result['repaired']['duplicate'] == 1
+    assert result['inserted'] == 0 and result['deleted'] == 1
+    pages = [event['extendedProperties']['private'][PAGE_ID_PROPERTY] for event in calendar.events.values()]
+    assert sorted(pages) == sorted(record.page_id for record in records)
+
+
+def test_pruning_removes_events_for_dropped_assignments(calendar, tmp_path):
+    records = assignments(5)
+    sync = make_sync(calendar, tmp_path)
+    sync.sync(records)
+    assert sync.sync(records[:3], prune=False)['deleted'] == 0
+    assert len(calendar.events) == 5
+    assert sync.sync(records[:3])['deleted'] == 2
+    assert len(calendar.events) == 3
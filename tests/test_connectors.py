@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip('requests')
+
+from benchmarks.fake_servers import FakePrairieLearn
+from src.connectors import ConditionalCache, PrairieLearnConnector, prairielearn_courses
+from src.connectors.prairielearn import deadline
+from src.transport import get_transport
+
+COURSES = {'CS400': '1000', 'CS401': '1001'}
+
+
+@pytest.fixture
+def prairielearn():
+    get_transport().set_rate_limit('prairielearn', 1e9, 1e9)
+    with FakePrairieLearn(token='pl-token') as server:
+        for instance_id in COURSES.values():
+            server.seed(instance_id, 3)
+        yield server
+
+
+def make_connector(prairielearn, tmp_path, **kwargs):
+    cache = ConditionalCache(str(tmp_path / 'connector_cache.json'))
+    return PrairieLearnConnector(courses=COURSES, token=prairielearn.token, base_url=prairielearn.url,
+                                 cache=cache, **kwargs)
+
+
+def test_unchanged_courses_cost_one_304_each(prairielearn, tmp_path):
+    connector = make_connector(prairielearn, tmp_path)
+    rows = connector.fetch()
+    # One assessment list and three rule lists per course.
+    assert prairielearn.request_count == 8
+    assert len(rows) == 6
+    assert rows[0]['assignment'] == 'HW1: Homework 1' and rows[0]['course'] == 'CS400'
+    assert rows[0]['end date'] == '2025-01-06T23:59:00+00:00'
+    assert rows[0]['source id'] == 'prairielearn:1000:1'
+
+    before = prairielearn.request_count
+    assert connector.fetch() == rows
+    assert prairielearn.request_count - before == 2
+    assert connector.cache.not_modified == 2
+
+    # The validators and bodies survive a restart.
+    before = prairielearn.request_count
+    assert make_connector(prairielearn, tmp_path).fetch() == rows
+    assert prairielearn.request_count - before == 2
+
+
+def test_changed_course_refetches_its_rules(prairielearn, tmp_path):
+    connector = make_connector(prairielearn, tmp_path)
+    connector.fetch()
+    prairielearn.retitle('1000', '1', 'Homework 1 (revised)')
+    prairielearn.extend('1000', '2', 3)
+    before = prairielearn.request_count
+    rows = {row['source id']: row for row in connector.fetch()}
+    assert prairielearn.request_count - before == 5
+    assert rows['prairielearn:1000:1']['assignment'] == 'HW1: Homework 1 (revised)'
+    assert rows['prairielearn:1000:2']['end date'] == '2025-01-10T23:59:00+00:00'
+    assert rows['prairielearn:1001:2']['end date'] == '2025-01-07T23:59:00+00:00'
+
+
+def test_expired_rules_are_revalidated(prairielearn, tmp_path):
+    connector = make_connector(prairielearn, tmp_path, rules_max_age=0)
+    rows = connector.fetch()
+    assert connector.fetch() == rows
+    assert connector.cache.not_modified == 8
+
+
+def test_304_without_a_cached_body_is_an_error(tmp_path):
+    cache = ConditionalCache(str(tmp_path / 'connector_cache.json'))
+    with FakePrairieLearn() as server:
+        server.fail_next(304)
+        with pytest.raises(ValueError):
+            cache.get(f"{server.url}/pl/api/v1/course_instances/1/assessments", None, 'prairielearn.assessments')
+
+
+def test_deadline_ignores_extensions_and_partial_credit():
+    rules = [
+        {'credit': 100, 'uids': None, 'start_date': '2025-01-01', 'end_date': '2025-01-06'},
+        {'credit': 100, 'uids': ['late@example.edu'], 'end_date': '2025-01-09'},
+        {'credit': 50, 'uids': None, 'end_date': '2025-01-13'},
+    ]
+    assert deadline(rules) == ('2025-01-01', '2025-01-06')
+    assert deadline(rules[1:]) is None
+    assert prairielearn_courses('CS225:12345, CS 374:6789,bad') == {'CS225': '12345', 'CS 374': '6789'}
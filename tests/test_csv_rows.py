@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip('requests')
+
+from src.csv_import import CsvRowError, iter_csv_rows, iter_decoded_lines
+
+ASSIGNMENTS_CSV = """Name,Course,Start Date,End Date,Complete,Grade,Weightage,Repeat,Repeat Weeks
+Homework 1,CS400,2025-01-01,2025-01-06 23:59:00,Complete,91.5,0.05,No,
+Lab 1,CS400,,06-01-2025,Not Started,,0.1,Yes,4
+
+Quiz 1,MATH200,2025-01-02,2025-13-01,,,,,
+Quiz 2,,2025-01-02,2025-01-09,,,,,
+Quiz 3,MATH200,2025-01-02,2025-01-09,,A+,,,
+"""
+
+DUE_DATE_CSV = """Homework 1,CS400,2025-01-06 23:59:00,Complete,91.5,0.05
+Homework 2,CS400,tomorrow,Not Started,,
+"""
+
+
+def test_assignments_layout():
+    rows = list(iter_csv_rows(ASSIGNMENTS_CSV.splitlines(keepends=True)))
+    assert rows[0] == {
+        'assignment': 'Homework 1', 'course': 'CS400', 'start date': '2025-01-01',
+        'end date': '2025-01-06 23:59:00', 'complete': 'Complete', 'grade': '91.5',
+        'weightage': '0.05', 'repeat weeks': 1,
+    }
+    assert rows[1]['start date'] is None
+    assert rows[1]['end date'] == '2025-01-06'
+    assert rows[1]['grade'] == ''
+    assert rows[1]['repeat weeks'] == 4
+
+
+def test_invalid_rows_are_yielded_as_errors_with_their_line():
+    rows = list(iter_csv_rows(ASSIGNMENTS_CSV.splitlines(keepends=True)))
+    errors = [row for row in rows if isinstance(row, CsvRowError)]
+    assert [error.line for error in errors] == [5, 6, 7]
+    assert "invalid end date '2025-13-01'" in str(errors[0])
+    assert 'missing assignment name or course' in str(errors[1])
+    assert "invalid grade 'A+'" in str(errors[2])
+    assert len(rows) == 5
+
+
+def test_due_date_layout():
+    rows = list(iter_csv_rows(DUE_DATE_CSV.splitlines(keepends=True)))
+    assert rows[0]['start date'] == rows[0]['end date'] == '2025-01-06 23:59:00'
+    assert rows[0]['repeat weeks'] == 1
+    assert isinstance(rows[1], CsvRowError) and rows[1].line == 2
+
+
+def test_decoded_lines_strip_bom_and_rejoin_split_chunks():
+    data = ('﻿' + DUE_DATE_CSV.replace('Homework 1', 'Ünit ✓ 1')).encode('utf-8')
+    # One byte at a time splits every multi-byte character and every line across chunks.
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    lines = list(iter_decoded_lines(chunks))
+    assert lines == DUE_DATE_CSV.replace('Homework 1', 'Ünit ✓ 1').splitlines(keepends=True)
+    assert next(iter_csv_rows(lines))['assignment'] == 'Ünit ✓ 1'
+
+
+def test_decoded_lines_keep_a_last_line_without_newline():
+    assert list(iter_decoded_lines([b'a,b\r\n', b'c,', b'd'])) == ['a,b\r\n', 'c,d']
@@ -0,0 +1,60 @@
+from src.import_journal import ImportJournal, idempotency_key
+
+
+def test_resume_returns_only_uncommitted_retryable_rows(tmp_path):
+    path = tmp_path / 'import.journal'
+    journal = ImportJournal(str(path))
+    import_id = journal.begin(source='a.csv')
+    journal.plan(import_id, [('k1', {'assignment': 'HW1'}), ('k2', {'assignment': 'HW2'}),
+                             ('k3', {'assignment': 'HW3'}), ('k4', {'assignment': 'HW4'})])
+    journal.commit(import_id, 'k1', 'page-1')
+    journal.fail(import_id, 'k2', 400)
+    journal.fail(import_id, 'k3', 503)
+
+    # This process is still running the import, so it isn't up for resuming here.
+    assert journal.unfinished() == []
+
+    # A restarted process reads the same file.
+    [state] = ImportJournal(str(path)).unfinished()
+    assert state.import_id == import_id and state.source == 'a.csv'
+    assert state.committed == {'k1': 'page-1'}
+    assert state.uncommitted() == {'k3': {'assignment': 'HW3'}, 'k4': {'assignment': 'HW4'}}
+
+
+def test_commit_after_failure_clears_it(tmp_path):
+    journal = ImportJournal(str(tmp_path / 'import.journal'))
+    import_id = journal.begin()
+    journal.plan(import_id, [('k1', {})])
+    journal.fail(import_id, 'k1', 429)
+    journal.commit(import_id, 'k1', 'page-1')
+    [state] = ImportJournal(journal.path).unfinished()
+    assert state.failed == {} and state.uncommitted() == {}
+
+
+def test_torn_line_is_skipped_and_next_append_starts_clean(tmp_path):
+    path = tmp_path / 'import.journal'
+    journal = ImportJournal(str(path))
+    import_id = journal.begin()
+    with open(path, 'a') as f:
+        f.write('{"op": "plan", "imp')
+    journal.plan(import_id, [('k1', {'assignment': 'HW1'})])
+    [state] = ImportJournal(str(path)).unfinished()
+    assert state.uncommitted() == {'k1': {'assignment': 'HW1'}}
+
+
+def test_claim_and_end(tmp_path):
+    path = tmp_path / 'import.journal'
+    first = ImportJournal(str(path))
+    import_id = first.begin()
+    resumer = ImportJournal(str(path))
+    assert resumer.claim(import_id)
+    assert not resumer.claim(import_id)
+    resumer.end(import_id)
+    assert ImportJournal(str(path)).unfinished() == []
+    assert path.read_text() == ''
+
+
+def test_idempotency_key_is_stable():
+    key = ('HW1', 'cs400', '2025-01-06T23:59')
+    assert idempotency_key(key) == idempotency_key(list(key))
+    assert idempotency_key(key) != idempotency_key(('HW2', 'cs400', '2025-01-06T23:59'))
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from benchmarks.fake_servers import EventReplayer
+from src.push_receiver import PushReceiver, normalize_id
+
+SECRET = 'webhook-secret'
+
+
+@pytest.fixture
+def pushed(notion, make_tracker):
+    """A warm tracker fed by a running receiver; yields (tracker, replayer, calendar changes seen)."""
+    notion.seed(20)
+    tracker = make_tracker()
+    tracker.fetch_assignments_from_notion(full=True)
+    changes = []
+    receiver = PushReceiver(
+        lambda database_id: [tracker] if database_id == normalize_id('db') else [],
+        notion_secret=SECRET, calendar_token='channel-token',
+        on_calendar_change=lambda: changes.append(time.monotonic()), coalesce_seconds=0.1,
+    ).start(port=0)
+    receiver.calendar_channels.add('channel')
+    yield tracker, EventReplayer(receiver.url, notion_secret=SECRET, calendar_token='channel-token'), changes
+    receiver.stop()
+
+
+def wait_for(tracker, page_id, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition(tracker.fetch_assignments_from_notion().get(page_id)):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_signed_events_fetch_each_changed_page_once(notion, pushed):
+    tracker, replayer, _ = pushed
+    page_id = sorted(notion.pages)[1]
+    notion.touch(page_id, Grade={'number': 77.0})
+    before = notion.request_count
+    for _ in range(3):
+        assert replayer.notion_event('page.properties_updated', page_id, 'db', ['Grade']) == 200
+    wait_for(tracker, page_id, lambda record: record.grade == 77.0)
+    assert notion.request_count - before == 1
+
+
+def test_deleted_page_is_dropped_without_a_fetch(notion, pushed):
+    tracker, replayer, _ = pushed
+    page_id = sorted(notion.pages)[2]
+    before = notion.request_count
+    assert replayer.notion_event('page.deleted', page_id, 'db') == 200
+    wait_for(tracker, page_id, lambda record: record is None)
+    assert notion.request_count == before
+
+
+def test_forged_and_unsigned_events_are_rejected(notion, pushed):
+    tracker, replayer, _ = pushed
+    page_id = sorted(notion.pages)[1]
+    notion.touch(page_id, Grade={'number': 12.0})
+    event = {'type': 'page.properties_updated', 'entity': {'id': page_id, 'type': 'page'},
+             'data': {'parent': {'id': 'db', 'type': 'database'}}}
+    before = notion.request_count
+    assert replayer.replay(event, secret='not-the-secret') == 401
+    assert EventReplayer(replayer.receiver_url).replay(event) == 401
+    time.sleep(0.3)
+    assert notion.request_count == before
+    assert tracker.fetch_assignments_from_notion().get(page_id).grade is None
+
+
+def test_events_for_other_databases_and_handshakes_are_acknowledged(notion, pushed):
+    tracker, replayer, _ = pushed
+    before = notion.request_count
+    assert replayer.notion_event('page.properties_updated', sorted(notion.pages)[1], 'other-db') == 200
+    assert replayer.notion_event('page.content_updated', sorted(notion.pages)[1], 'db') == 200
+    assert EventReplayer(replayer.receiver_url).replay({'verification_token': 'token'}) == 200
+    time.sleep(0.3)
+    assert notion.request_count == before
+
+
+def test_calendar_pushes_need_the_channel_token(pushed):
+    _, replayer, changes = pushed
+    assert replayer.calendar_push('channel', state='sync') == 200
+    assert changes == []
+    assert replayer.calendar_push('channel') == 200
+    assert len(changes) == 1
+    assert replayer.calendar_push('channel', token='wrong-token') == 401
+    assert replayer.calendar_push('other-channel') == 401
+    assert len(changes) == 1
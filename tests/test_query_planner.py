@@ -0,0 +1,123 @@
+import time
+from dataclasses import replace
+from datetime import date, timedelta
+
+from src import query_planner
+from src.assignment_store import AssignmentStore
+from src.query_planner import AssignmentQuery, plan_query, run_query
+from src.recurrence import RecurrenceRule, RecurrenceStore
+
+FIRST_DUE = date(2025, 1, 6)
+
+
+class LocalTracker:
+    """Just what the planner reads from a tracker whose snapshot is fresh."""
+
+    def __init__(self, store, recurrences):
+        self.store = store.freeze()
+        self.recurrences = recurrences
+
+    def snapshot_is_fresh(self):
+        return True
+
+    def fetch_assignments_from_notion(self):
+        return self.store
+
+
+def lab_series(tmp_path, materialized):
+    """A 10-week lab series whose first `materialized` occurrences have Notion pages."""
+    rule = RecurrenceRule(name='Lab', course='CS461', start=None, end=f'{FIRST_DUE} 23:59:00', count=10)
+    recurrences = RecurrenceStore(str(tmp_path / 'recurrences.json'))
+    recurrences.put(rule)
+    store = AssignmentStore()
+    for index in range(materialized):
+        store.upsert(replace(rule.record(index), page_id=f'page-{index}'))
+        recurrences.mark_materialized(rule.key, index, f'page-{index}')
+    return LocalTracker(store, recurrences)
+
+
+def names(records):
+    return [record.name for record in records]
+
+
+def test_non_range_queries_include_unmaterialized_occurrences(tmp_path):
+    tracker = lab_series(tmp_path, materialized=2)
+    every_lab = [f'Lab{i}' for i in range(1, 11)]
+    assert names(run_query(tracker, AssignmentQuery(incomplete=True))) == every_lab
+    assert names(run_query(tracker, AssignmentQuery(course='cs461'))) == every_lab
+    assert names(run_query(tracker, AssignmentQuery())) == every_lab
+    assert run_query(tracker, AssignmentQuery(course='CS400')) == []
+
+
+def test_open_ended_ranges_include_occurrences_past_the_bound(tmp_path):
+    tracker = lab_series(tmp_path, materialized=2)
+    later = FIRST_DUE + timedelta(weeks=7)
+    assert names(run_query(tracker, AssignmentQuery(due_from=later))) == ['Lab8', 'Lab9', 'Lab10']
+    assert names(run_query(tracker, AssignmentQuery(due_to=FIRST_DUE + timedelta(weeks=2)))) == ['Lab1', 'Lab2', 'Lab3']
+    assert names(run_query(tracker, AssignmentQuery(due_from=later, due_to=later))) == ['Lab8']
+
+
+def test_materialized_occurrences_are_not_listed_twice(tmp_path):
+    tracker = lab_series(tmp_path, materialized=10)
+    results = run_query(tracker, AssignmentQuery(incomplete=True))
+    assert [r.page_id for r in results] == [f'page-{i}' for i in range(10)]
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def stale_without_high_water_mark(make_tracker):
+    """A populated snapshot that can't be delta-synced, as after a warm start from an older mirror."""
+    make_tracker('seeded').fetch_assignments_from_notion(full=True)
+    tracker = make_tracker('seeded')
+    tracker.high_water_mark = None
+    return tracker
+
+
+def test_fresh_or_delta_syncable_snapshots_are_answered_locally(notion, make_tracker):
+    notion.seed(30)
+    tracker = make_tracker()
+    tracker.fetch_assignments_from_notion()
+    assert plan_query(tracker, AssignmentQuery(course='CS598')) == 'local'
+    tracker.invalidate_snapshot()
+    assert tracker.can_delta_sync()
+    assert plan_query(tracker, AssignmentQuery(course='CS598')) == 'local'
+
+
+def test_cold_query_is_pushed_down_and_warms_the_snapshot(notion, make_tracker):
+    notion.seed(60)
+    tracker = make_tracker()
+    query = AssignmentQuery(course='CS411', incomplete=True)
+    assert plan_query(tracker, query) == 'pushdown'
+    records = run_query(tracker, query)
+    assert len(records) == 10
+    assert all(record.in_course('CS411') and not record.is_complete for record in records)
+    wait_until(tracker.snapshot_is_fresh)
+    assert len(tracker.store) == 60
+    assert plan_query(tracker, query) == 'local'
+
+
+def test_stale_snapshot_estimates_the_result_size(notion, make_tracker, monkeypatch):
+    notion.seed(300)
+    tracker = stale_without_high_water_mark(make_tracker)
+    assert len(tracker.store) == 300 and not tracker.snapshot_is_fresh()
+    assert plan_query(tracker, AssignmentQuery(course='CS598')) == 'pushdown'
+    assert plan_query(tracker, AssignmentQuery(incomplete=True)) == 'refresh'
+    monkeypatch.setattr(query_planner, 'PUSHDOWN_MAX_ROWS', 10)
+    assert plan_query(tracker, AssignmentQuery(course='CS598')) == 'refresh'
+
+
+def test_failed_pushdown_answers_from_the_stale_snapshot(notion, make_tracker):
+    notion.seed(30)
+    tracker = stale_without_high_water_mark(make_tracker)
+    notion.touch(sorted(notion.pages)[0], Name={'title': [{'text': {'content': 'Renamed'}}]})
+    notion.fail_next(400)
+    records = run_query(tracker, AssignmentQuery(course='CS598'))
+    assert [record.name for record in records][:1] == ['Assignment 0']
+    assert len(records) == 5
+    wait_until(tracker.snapshot_is_fresh)
+    assert tracker.store.get(sorted(notion.pages)[0]).name == 'Renamed'
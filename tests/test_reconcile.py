@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('requests')
+
+from src.assignment_store import AssignmentRecord, AssignmentStore  # noqa: E402
+from src.csv_import import CsvRowError  # noqa: E402
+from src.reconcile import plan_reconcile  # noqa: E402
+
+
+def record(page_id, name, course='CS400', due='2025-01-06 23:59:00', complete='Not started', grade=None,
+           weightage=None):
+    due = datetime.fromisoformat(due).replace(tzinfo=timezone.utc)
+    return AssignmentRecord(page_id, name, (course,), None, due, due.date(), complete, grade, weightage)
+
+
+def row(name, course='CS400', end='2025-01-06 23:59:00', complete='', grade='', weightage='', **extra):
+    return {'assignment': name, 'course': course, 'start date': None, 'end date': end,
+            'complete': complete, 'grade': grade, 'weightage': weightage, 'repeat weeks': 1, **extra}
+
+
+def test_plan_sorts_rows_into_creates_updates_and_unchanged():
+    store = AssignmentStore([record('p1', 'HW1'), record('p2', 'HW2', grade=80.0)])
+    plan = plan_reconcile(store, [
+        row('HW1'),
+        row('hw2', course='cs400'),  # names match exactly, courses case-insensitively
+        row('HW2', course='cs400', complete='Completed', grade='95'),
+        row('HW1'),
+    ])
+    assert [r['assignment'] for r in plan.creates] == ['hw2']
+    assert [(record.page_id, fields) for record, _, fields in plan.updates] == [('p2', ['Complete', 'Grade'])]
+    assert plan.unchanged == 1
+    assert plan.writes == 2
+
+
+def test_blank_cells_leave_notion_values_alone():
+    store = AssignmentStore([record('p1', 'HW1', complete='Complete', grade=88.0, weightage=0.1)])
+    plan = plan_reconcile(store, [row('HW1')])
+    assert plan.updates == [] and plan.unchanged == 1
+
+
+def test_archive_missing_and_invalid_rows():
+    store = AssignmentStore([record('p1', 'HW1'), record('p2', 'HW2')])
+    rows = [row('HW1'), CsvRowError(3, 'invalid end date')]
+    assert plan_reconcile(store, rows).archives == []
+    plan = plan_reconcile(store, rows, archive_missing=True)
+    assert [r.page_id for r in plan.archives] == ['p2']
+    assert len(plan.invalid) == 1 and 'invalid end date' in plan.invalid[0]
+
+
+def test_source_id_matches_a_renamed_and_moved_page():
+    store = AssignmentStore([record('p1', 'HW1')])
+    moved = row('HW1 (revised)', end='2025-01-09 23:59:00', **{'source id': 'pl:1:1'})
+    plan = plan_reconcile(store, [moved], sources={'pl:1:1': 'p1'})
+    assert plan.creates == []
+    assert [(r.page_id, fields) for r, _, fields in plan.updates] == [('p1', ['Name', 'End Date'])]
+    assert plan.sources == []
+
+
+def test_first_seen_source_id_adopts_a_dedupe_match():
+    store = AssignmentStore([record('p1', 'HW1')])
+    plan = plan_reconcile(store, [row('HW1', **{'source id': 'pl:1:1'})])
+    assert plan.sources == [('pl:1:1', 'p1')]
+    assert plan.unchanged == 1
+
+
+def test_repeating_row_expands_within_the_horizon(monkeypatch):
+    monkeypatch.setenv('RECURRENCE_HORIZON_DAYS', '14')
+    first = date.today() - timedelta(days=7)
+    end = f"{first.isoformat()} 23:59:00"
+    existing = f"{(first + timedelta(weeks=5)).isoformat()} 23:59:00"
+    store = AssignmentStore([record('p6', 'Quiz6', due=existing)])
+    plan = plan_reconcile(store, [dict(row('Quiz', end=end), **{'repeat weeks': 10})])
+    # Weeks -1, 0, 1 and 2 are due within the horizon; week 5 already has a page.
+    assert [r['assignment'] for r in plan.creates] == ['Quiz1', 'Quiz2', 'Quiz3', 'Quiz4']
+    assert plan.unchanged == 1
+    assert plan.occurrences == [('quiz|cs400', 5, 'p6')]
+    assert [rule.count for rule in plan.rules] == [10]
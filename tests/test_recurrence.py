@@ -0,0 +1,44 @@
+from datetime import date
+
+from src.recurrence import RecurrenceRule
+
+
+def weekly(**kwargs):
+    return RecurrenceRule(name='Quiz', course='CS400', start=None, end='2025-01-06 23:59:00', **kwargs)
+
+
+def test_indices_between_covers_the_range_inclusively():
+    rule = weekly(count=10)
+    assert rule.indices_between(None, date(2025, 1, 20)) == [0, 1, 2]
+    assert rule.indices_between(date(2025, 1, 13), date(2025, 1, 27)) == [1, 2, 3]
+    # A first day between occurrences starts at the next one.
+    assert rule.indices_between(date(2025, 1, 7), date(2025, 1, 13)) == [1]
+
+
+def test_indices_between_before_the_series_starts():
+    assert weekly(count=10).indices_between(None, date(2025, 1, 5)) == []
+
+
+def test_indices_between_stops_at_count_and_until():
+    assert weekly(count=3).indices_between(None, date(2026, 1, 1)) == [0, 1, 2]
+    assert weekly(count=10, until='2025-01-20').indices_between(None, date(2026, 1, 1)) == [0, 1, 2]
+    assert weekly(until='2025-01-19').indices_between(None, date(2026, 1, 1)) == [0, 1]
+
+
+def test_indices_between_skips_exceptions_and_honors_interval():
+    assert weekly(count=4, exceptions=['2025-01-13']).indices_between(None, date(2026, 1, 1)) == [0, 2, 3]
+    rule = weekly(count=4, interval_weeks=2)
+    assert rule.indices_between(date(2025, 1, 7), date(2025, 2, 3)) == [1, 2]
+    assert rule.due_day(2) == date(2025, 2, 3)
+
+
+def test_occurrence_names_and_shifts_dates():
+    row = weekly(count=3).occurrence(2)
+    assert row['assignment'] == 'Quiz3'
+    assert row['end date'] == '2025-01-20 23:59:00'
+    assert row['occurrence'] == ('quiz|cs400', 2)
+
+
+def test_json_round_trip_keeps_materialized_indices():
+    rule = weekly(count=3, materialized={0: 'page-a', 2: 'page-c'})
+    assert RecurrenceRule.from_json(rule.to_json()) == rule
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.assignment_store import AssignmentRecord
+from src.reminders import ReminderScheduler
+
+OFFSETS = (timedelta(hours=24), timedelta(hours=1))
+
+
+def record(page_id, due_in, complete='Not started'):
+    due = datetime.now(timezone.utc) + due_in
+    return AssignmentRecord(page_id, page_id, ('CS400',), None, due, due.date(), complete, None, None)
+
+
+async def ignore(record, offset):
+    pass
+
+
+def test_records_whose_reminders_have_all_passed_are_not_kept():
+    scheduler = ReminderScheduler(ignore, OFFSETS)
+    scheduler.update([record('soon', timedelta(minutes=30)), record('past', timedelta(hours=-2))], ())
+    assert len(scheduler) == 0
+    assert scheduler.next_fire_time() is None
+
+
+def test_moving_a_deadline_inside_every_lead_time_drops_the_record():
+    scheduler = ReminderScheduler(ignore, OFFSETS)
+    scheduler.update([record('a', timedelta(days=2))], ())
+    assert len(scheduler) == 1
+    scheduler.update([record('a', timedelta(minutes=30))], ())
+    assert len(scheduler) == 0
+    assert scheduler.next_fire_time() is None
+
+
+def test_only_future_lead_times_are_scheduled():
+    scheduler = ReminderScheduler(ignore, OFFSETS)
+    scheduler.update([record('a', timedelta(hours=3))], ())
+    assert len(scheduler) == 1
+    assert abs(scheduler.next_fire_time() - (time.time() + 2 * 3600)) < 5
+
+
+def test_heap_yields_earliest_live_entry_first():
+    scheduler = ReminderScheduler(ignore, OFFSETS)
+    scheduler.update([record('late', timedelta(days=3)), record('early', timedelta(days=2))], ())
+    assert abs(scheduler.next_fire_time() - (time.time() + 24 * 3600)) < 5
+    # Moving 'early' out leaves its entries in the heap; they are skipped, not fired.
+    scheduler.update([record('early', timedelta(days=5))], ())
+    assert abs(scheduler.next_fire_time() - (time.time() + 48 * 3600)) < 5
+    scheduler.update([record('late', timedelta(days=3), complete='Complete')], ())
+    assert len(scheduler) == 1
+    assert abs(scheduler.next_fire_time() - (time.time() + 4 * 24 * 3600)) < 5
+    scheduler.update((), ['early'])
+    assert len(scheduler) == 0 and scheduler.next_fire_time() is None
+
+
+def test_reminders_fire_in_order_and_skip_changed_records():
+    sent = []
+
+    async def send(record, offset):
+        sent.append((record.page_id, offset))
+
+    async def run():
+        offsets = (timedelta(seconds=0.4), timedelta(seconds=0.2))
+        scheduler = ReminderScheduler(send, offsets)
+        scheduler.start()
+        scheduler.update([record('a', timedelta(seconds=0.5)), record('b', timedelta(seconds=1.0)),
+                          record('done', timedelta(seconds=0.5))], ())
+        await asyncio.sleep(0.05)
+        scheduler.update([record('done', timedelta(seconds=0.5), complete='Complete')], ())
+        await asyncio.sleep(1.0)
+        scheduler.stop()
+        return scheduler, offsets
+
+    scheduler, (first, last) = asyncio.run(run())
+    assert sent == [('a', first), ('a', last), ('b', first), ('b', last)]
+    # The last reminder for each deadline drops its record.
+    assert len(scheduler) == 0
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+
+def slow_queries(tracker, delay):
+    """Slow the tracker's Notion queries down; returns the list of queries made and an event set once one has run."""
+    query = tracker.query_database_pages
+    calls = []
+    queried = threading.Event()
+
+    def slow(**kwargs):
+        calls.append(kwargs)
+        pages = query(**kwargs)
+        queried.set()
+        time.sleep(delay)
+        return pages
+    tracker.query_database_pages = slow
+    return calls, queried
+
+
+def test_concurrent_refreshes_share_one_query(notion, make_tracker):
+    notion.seed(250)
+    tracker = make_tracker()
+    calls, _ = slow_queries(tracker, 0.3)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def fetch():
+        barrier.wait()
+        results.append(tracker.fetch_assignments_from_notion(force=True))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(store is results[0] for store in results)
+    assert len(results[0]) == 250
+    # 250 pages is three query pages, fetched once.
+    assert notion.request_count == 3
+
+
+def test_fresh_snapshot_is_served_without_a_query(notion, make_tracker):
+    notion.seed(10)
+    tracker = make_tracker()
+    store = tracker.fetch_assignments_from_notion()
+    requests_made = notion.request_count
+    assert tracker.fetch_assignments_from_notion() is store
+    assert notion.request_count == requests_made
+
+
+@pytest.mark.parametrize('full', [True, False])
+def test_write_during_a_refresh_is_kept_and_not_blocked(notion, make_tracker, full):
+    notion.seed(50)
+    tracker = make_tracker()
+    held = tracker.fetch_assignments_from_notion(full=True)
+    page_id = sorted(notion.pages)[1]
+    _, queried = slow_queries(tracker, 0.5)
+
+    refresh = threading.Thread(target=tracker.fetch_assignments_from_notion, kwargs={'full': full, 'force': True})
+    refresh.start()
+    queried.wait()
+    page = tracker.notion.update_page(page_id, properties={'Grade': {'number': 88.0}})
+    started = time.monotonic()
+    tracker.record_written_page(page)
+    assert time.monotonic() - started < 0.25
+    refresh.join()
+
+    assert tracker.fetch_assignments_from_notion().get(page_id).grade == 88.0
+    # The snapshot handed out before the write is frozen and never changes.
+    assert held.get(page_id).grade is None
+    with pytest.raises(TypeError):
+        held.upsert(held.get(page_id))
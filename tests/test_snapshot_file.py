@@ -0,0 +1,45 @@
+from datetime import date, datetime, timedelta, timezone
+
+from src.assignment_store import AssignmentRecord
+from src.snapshot_file import read_snapshot, write_snapshot
+
+EASTERN = timezone(timedelta(hours=-5))
+
+
+def sample_records():
+    due = datetime(2025, 1, 6, 23, 59, tzinfo=EASTERN)
+    return [
+        AssignmentRecord('page-1', 'Homework 1', ('CS400',), datetime(2025, 1, 1, tzinfo=timezone.utc), due,
+                         date(2025, 1, 6), 'Complete', 91.5, 0.05, '2025-01-07T10:00:00.000Z'),
+        AssignmentRecord('page-2', 'Lab ✓ 2', ('CS400', 'MATH200'), None, due + timedelta(days=7),
+                         date(2025, 1, 13), 'In progress', None, 0.1, None),
+        AssignmentRecord('page-3', '', (), None, None, None, 'Not started', None, None, '2025-01-08T00:00:00.000Z'),
+    ]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'mirror.snapshot')
+    records = sample_records()
+    write_snapshot(path, records, '2025-01-08T00:00:00.000Z', 1736294400.0)
+    loaded, high_water_mark, last_full_sync = read_snapshot(path)
+    assert loaded == records
+    assert loaded[0].due.utcoffset() == timedelta(hours=-5)
+    assert high_water_mark == '2025-01-08T00:00:00.000Z'
+    assert last_full_sync == 1736294400.0
+
+
+def test_round_trip_empty_without_marks(tmp_path):
+    path = str(tmp_path / 'mirror.snapshot')
+    write_snapshot(path, [], None, None)
+    assert read_snapshot(path) == ([], None, None)
+
+
+def test_unreadable_snapshots_read_as_none(tmp_path):
+    path = tmp_path / 'mirror.snapshot'
+    assert read_snapshot(str(path)) is None
+    write_snapshot(str(path), sample_records(), None, None)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    assert read_snapshot(str(path)) is None
+    path.write_bytes(data[:4] + b'\xff\xff' + data[6:])
+    assert read_snapshot(str(path)) is None
@@ -0,0 +1,62 @@
+import os
+import stat
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+from src.tenants import TenantPool, TenantRegistry, guild_key, user_key
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = TenantRegistry(str(tmp_path / 'tenants.json'))
+    for key in ('a', 'b', 'c'):
+        registry.register(key, f'secret-{key}', f'db-{key}')
+    return registry
+
+
+def test_registry_persists_owner_readable_only(tmp_path, registry):
+    assert stat.S_IMODE(os.stat(registry.path).st_mode) == 0o600
+    reloaded = TenantRegistry(registry.path)
+    assert reloaded.keys() == ['a', 'b', 'c']
+    assert reloaded.get('b') == {'token': 'secret-b', 'database_id': 'db-b', 'webhook_url': ''}
+    assert reloaded.unregister('b') and not reloaded.unregister('b')
+    assert 'b' not in TenantRegistry(registry.path)
+    assert guild_key(1) != user_key(1)
+
+
+def test_least_recently_used_tenant_is_evicted(tmp_path, registry):
+    pool = TenantPool(registry, max_tenants=2, state_dir=str(tmp_path / 'state'))
+    a = pool.get('a')
+    pool.get('b')
+    assert pool.get('a') is a
+    pool.get('c')
+    assert len(pool) == 2 and pool.evictions == 1
+    assert {tracker.database_id for tracker in pool.loaded()} == {'db-a', 'db-c'}
+    assert pool.get('a') is a
+    assert pool.get('missing') is None
+
+
+def test_idle_tenants_are_evicted(tmp_path, registry):
+    pool = TenantPool(registry, idle_seconds=0.05, state_dir=str(tmp_path / 'state'))
+    pool.get('a')
+    pool.get('b')
+    time.sleep(0.1)
+    pool.get('c')
+    assert [tracker.database_id for tracker in pool.loaded()] == ['db-c']
+    assert pool.evictions == 2
+    time.sleep(0.1)
+    pool.evict_idle()
+    assert len(pool) == 0 and pool.evictions == 3
+
+
+def test_reregistering_builds_a_new_tracker(tmp_path, registry):
+    pool = TenantPool(registry, state_dir=str(tmp_path / 'state'))
+    a = pool.get('a')
+    registry.register('a', 'secret-a', 'db-other')
+    rebuilt = pool.get('a')
+    assert rebuilt is not a and rebuilt.database_id == 'db-other'
+    assert len(pool) == 1
+    assert os.path.exists(os.path.join(pool.state_dir, 'a.db'))
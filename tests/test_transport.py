@@ -0,0 +1,77 @@
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from benchmarks.fake_servers import FakeNotion
+from src.transport import Transport
+
+
+@pytest.fixture
+def notion():
+    with FakeNotion() as server:
+        server.seed(3)
+        yield server
+
+
+@pytest.fixture
+def transport():
+    # No bucket for the 'test' service, so nothing is throttled.
+    transport = Transport(max_retries=3, backoff=0.01, timeout=5, rate_limits={'other': (1.0, 1)})
+    yield transport
+    transport.close()
+
+
+def create_page(transport, notion, **kwargs):
+    return transport.request(
+        'POST', f"{notion.api_url}/pages", service='test', endpoint='pages.create',
+        json={'parent': {'database_id': 'db'}, 'properties': {}}, **kwargs
+    )
+
+
+def test_post_is_resent_after_429(notion, transport):
+    notion.fail_next(429)
+    response = create_page(transport, notion)
+    assert response.status_code == 200
+    assert len(notion.pages) == 4
+    stats = transport.endpoint_stats()['pages.create']
+    assert stats['calls'] == 2 and stats['retries'] == 1
+    assert stats['rate_limit_wait'] > 0 and stats['retry_wait'] == 0
+
+
+def test_post_is_not_resent_after_5xx(notion, transport):
+    notion.fail_next(500)
+    response = create_page(transport, notion)
+    assert response.status_code == 500
+    assert notion.request_count == 1
+    assert transport.endpoint_stats()['pages.create']['retries'] == 0
+
+
+def test_post_is_not_resent_after_read_timeout(notion, transport):
+    notion.response_delay = 0.3
+    with pytest.raises(requests.ReadTimeout):
+        create_page(transport, notion, timeout=0.1)
+    assert notion.request_count == 1
+
+
+def test_idempotent_post_is_resent_after_5xx(notion, transport):
+    notion.fail_next(503)
+    response = transport.request(
+        'POST', f"{notion.api_url}/databases/db/query", service='test', endpoint='databases.query',
+        idempotent=True, json={}
+    )
+    assert response.status_code == 200
+    assert len(response.json()['results']) == 3
+
+
+def test_get_backs_off_on_5xx_until_retries_run_out(notion, transport):
+    page_id = next(iter(notion.pages))
+    notion.fail_next(502, 2)
+    response = transport.request('GET', f"{notion.api_url}/pages/{page_id}", service='test', endpoint='pages.get')
+    assert response.status_code == 200
+    stats = transport.endpoint_stats()['pages.get']
+    assert stats['retries'] == 2 and stats['errors'] == 2
+    assert stats['retry_wait'] > 0 and stats['rate_limit_wait'] == 0
+
+    notion.fail_next(502, 4)
+    response = transport.request('GET', f"{notion.api_url}/pages/{page_id}", service='test', endpoint='pages.get')
+    assert response.status_code == 502
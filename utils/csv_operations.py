@@ -1,19 +1,6 @@
-import csv
-from notion.database_operations import upload_assignment_to_notion
+from src.assignment_tracker import AssignmentTracker
 
-def read_csv(filepath):
-    responses = []
-    with open(filepath, 'r') as file:
-        csv_reader = csv.reader(file)
-        for row in csv_reader:
-            assignment_data = {
-                'assignment': row[0],
-                'course': row[1],
-                'due_date': row[2],
-                'status': row[3],
-                'grade': row[4] if row[4] else None,
-                'weightage': row[5] if row[5] else None
-            }
-            upload_assignment_to_notion(assignment_data)
-            responses.append(200)
-    return responses
+def read_csv(filepath, tracker=None):
+    """Import a CSV in either supported layout through the tracker's shared ingestion path."""
+    tracker = tracker or AssignmentTracker()
+    return tracker.read_csv(filepath)